@@ -52,6 +52,8 @@ class MPLAgent:
         self.learning_refinement_module = learning_refinement_module
         self.reporting_module = reporting_module
         self.system_diagnoser = system_diagnoser
+        # The most recently started session. Runs track their own session ID, so one
+        # agent can serve several refinement cycles concurrently.
         self.current_session_id: Optional[str] = None
         self.self_correction_config = self_correction_config
 
@@ -85,8 +87,7 @@ class MPLAgent:
             logger.info("Self-correction modules initialized successfully.")
 
     async def _initialize_session(self, original_prompt_text: str, user_id: Optional[str] = None) -> OriginalPrompt:
-        """Initializes a new refinement session and saves the original prompt."""
-        self.current_session_id = str(uuid.uuid4())
+        """Saves the original prompt of a new refinement session."""
         original_prompt = OriginalPrompt(
             text=original_prompt_text, 
             user_id=user_id,
@@ -189,6 +190,7 @@ class MPLAgent:
         """Runs the full iterative prompt refinement process."""
         await self.kb.connect()
 
+        session_id = self.current_session_id = str(uuid.uuid4())
         original_prompt_obj = await self._initialize_session(original_prompt_text, user_id)
         if not original_prompt_obj.id:
             raise KnowledgeBaseError("Failed to save original prompt to the database.")
@@ -201,7 +203,7 @@ class MPLAgent:
         
         for i in range(max_iterations):
             iteration_count = i + 1
-            logger.info(f"--- Starting Iteration {iteration_count} for session {self.current_session_id} ---")
+            logger.info(f"--- Starting Iteration {iteration_count} for session {session_id} ---")
 
             # 1. Enhance Prompt using the text from the previous step.
             try:
@@ -274,7 +276,7 @@ class MPLAgent:
             # 4. Report Iteration
             iteration_log = IterationLog(
                 original_prompt_id=original_prompt_obj.id,
-                session_id=self.current_session_id,
+                session_id=session_id,
                 iteration_number=iteration_count,
                 active_prompt_version_id=saved_prompt_version.id,
                 ai_output_id=saved_ai_output.id,
@@ -302,7 +304,7 @@ class MPLAgent:
                 logger.info("--- Max iterations reached. ---")
 
         # Generate the final report after all iterations are complete.
-        final_report = await self.reporting_module.generate_final_report(self.current_session_id)
+        final_report = await self.reporting_module.generate_final_report(session_id)
         yield {"event": "final_report", "data": final_report}
 
     async def stream_refinement_cycle(
@@ -322,6 +324,7 @@ class MPLAgent:
         await self.kb.connect()
         await self._initialize_self_correction_modules() # Initialize modules after DB connection
 
+        session_id = self.current_session_id = str(uuid.uuid4())
         original_prompt_obj = await self._initialize_session(original_prompt_text, user_id)
         if not original_prompt_obj.id:
             raise KnowledgeBaseError("Failed to save original prompt to the database.")
@@ -332,7 +335,7 @@ class MPLAgent:
         
         for i in range(max_iterations):
             iteration_count = i + 1
-            logger.info(f"--- Starting Stream Iteration {iteration_count} for session {self.current_session_id} ---")
+            logger.info(f"--- Starting Stream Iteration {iteration_count} for session {session_id} ---")
 
             # 1. Enhance Prompt
             try:
@@ -432,7 +435,7 @@ class MPLAgent:
             # 4. Report Iteration Log
             iteration_log = IterationLog(
                 original_prompt_id=original_prompt_obj.id,
-                session_id=self.current_session_id,
+                session_id=session_id,
                 iteration_number=iteration_count,
                 active_prompt_version_id=saved_prompt_version.id,
                 ai_output_id=saved_ai_output.id,
@@ -469,9 +472,9 @@ class MPLAgent:
                 logger.info("--- Stream: Max iterations reached. ---")
 
         # --- Final Report ---
-        logger.info(f"--- Stream finished for session {self.current_session_id}. Generating final report. ---")
+        logger.info(f"--- Stream finished for session {session_id}. Generating final report. ---")
         
         # Call the reporting module to generate the final report.
-        report_data = await self.reporting_module.generate_final_report(self.current_session_id)
+        report_data = await self.reporting_module.generate_final_report(session_id)
         
         yield {"event": "final_report", "data": report_data}
\ No newline at end of file
@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import typer
 from typing_extensions import Annotated
 import json
@@ -12,22 +13,18 @@ from rich.table import Table
 # Configuration
 from mpla.config.loader import load_config, Config
 from mpla.utils.logging import setup_logging, logger
+from mpla.utils import event_loop
 
 # Agent and Components
 from mpla.agent.mpla_agent import MPLAgent
 from mpla.knowledge_base.sqlite_kb import SQLiteKnowledgeBase
 from mpla.core.prompt_enhancer import RuleBasedPromptEnhancer
-from mpla.core.llm_assisted_prompt_enhancer import LLMAssistedPromptEnhancer
-from mpla.external.openai_orchestrator import OpenAIDeploymentOrchestrator
-from mpla.external.google_gemini_orchestrator import GoogleGeminiDeploymentOrchestrator
 from mpla.core.evaluation_engine import BasicEvaluationEngine
 from mpla.core.learning_refinement import RuleBasedLearningRefinementModule
-from mpla.core.llm_assisted_learning_refinement import LLMAssistedLearningRefinementModule
 from mpla.reporting.database_reporting import DatabaseReportingModule
 from mpla.core.reporting import ReportingModule
 from mpla.knowledge_base.schemas import IterationLog, MetaPrompt
 from mpla.core.exceptions import ConfigurationError, MPLAError
-from mpla.enhancers.architect_enhancer import ArchitectPromptEnhancer
 
 # Load .env file for development
 project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -42,8 +39,9 @@ app = typer.Typer(
 metaprompt_app = typer.Typer(name="metaprompt", help="Manage the agent's meta-prompts.")
 app.add_typer(metaprompt_app, name="metaprompt")
 
+@functools.cache
 def get_default_config_path() -> str:
-    """Determines the default config path, making it portable for PyInstaller."""
+    """Determines the default config path, making it portable for PyInstaller. Fixed per process, so computed once."""
     # If the app is frozen (packaged by PyInstaller), the base path is the directory of the executable
     if getattr(sys, 'frozen', False):
         base_path = os.path.dirname(sys.executable)
@@ -53,59 +51,88 @@ def get_default_config_path() -> str:
     
     return os.path.join(base_path, 'config.yaml')
 
+_ERR_LLM_REQUIRED = "LLM-assisted enhancer/learning module requires a real LLM orchestrator (Gemini or OpenAI)."
+
+# Component factories by provider name. Factories of LLM-assisted components check the
+# orchestrator's `is_llm_capable` flag before using it. Components that pull in an LLM SDK
+# are imported inside their factory, so a run only loads the providers it is configured for.
+def _make_openai_orchestrator(config: Config):
+    from mpla.external.openai_orchestrator import OpenAIDeploymentOrchestrator
+    return OpenAIDeploymentOrchestrator(api_key=config.api_keys.openai_api_key)
+
+def _make_gemini_orchestrator(config: Config):
+    from mpla.external.google_gemini_orchestrator import GoogleGeminiDeploymentOrchestrator
+    return GoogleGeminiDeploymentOrchestrator(api_key=config.api_keys.google_api_key)
+
+def _make_llm_assisted_enhancer(orchestrator, kb):
+    from mpla.core.llm_assisted_prompt_enhancer import LLMAssistedPromptEnhancer
+    return LLMAssistedPromptEnhancer(orchestrator=_require_llm(orchestrator))
+
+def _make_architect_enhancer(orchestrator, kb):
+    from mpla.enhancers.architect_enhancer import ArchitectPromptEnhancer
+    return ArchitectPromptEnhancer(orchestrator=_require_llm(orchestrator), kb=kb)
+
+def _make_llm_assisted_learning_module(orchestrator):
+    from mpla.core.llm_assisted_learning_refinement import LLMAssistedLearningRefinementModule
+    return LLMAssistedLearningRefinementModule(orchestrator=_require_llm(orchestrator))
+
+_KNOWLEDGE_BASE_FACTORIES = {
+    'sqlite': lambda config: SQLiteKnowledgeBase(db_path=config.agent.knowledge_base.db_path),
+}
+_ORCHESTRATOR_FACTORIES = {
+    'openai': _make_openai_orchestrator,
+    'gemini': _make_gemini_orchestrator,
+}
+_PROMPT_ENHANCER_FACTORIES = {
+    'rule_based': lambda orchestrator, kb: RuleBasedPromptEnhancer(),
+    # This assumes the main orchestrator is what the enhancer should use.
+    'llm_assisted': _make_llm_assisted_enhancer,
+    'architect': _make_architect_enhancer,
+}
+_LEARNING_REFINEMENT_FACTORIES = {
+    'rule_based': lambda orchestrator: RuleBasedLearningRefinementModule(),
+    'llm_assisted': _make_llm_assisted_learning_module,
+}
+_REPORTING_MODULE_FACTORIES = {
+    'database': lambda kb: DatabaseReportingModule(kb=kb),
+}
+
+def _require_llm(orchestrator):
+    if not orchestrator.is_llm_capable:
+        raise ConfigurationError(_ERR_LLM_REQUIRED)
+    return orchestrator
+
+def _factory_for(factories: Dict[str, Any], component: str, provider: str):
+    try:
+        return factories[provider]
+    except KeyError:
+        raise ConfigurationError(f"Unsupported or missing {component} provider: {provider}") from None
+
 def build_agent_from_config(config: Config) -> MPLAgent:
-    """Builds and returns an MPLAgent based on the provided configuration."""
-    
-    # Knowledge Base
-    if config.agent.knowledge_base.provider == 'sqlite':
-        kb = SQLiteKnowledgeBase(db_path=config.agent.knowledge_base.db_path)
-    else:
-        raise ValueError(f"Unsupported knowledge_base provider: {config.agent.knowledge_base.provider}")
-
-    # Deployment Orchestrator
-    orchestrator_config = config.agent.deployment_orchestrator
-    if orchestrator_config.provider == 'openai':
-        deployment_orchestrator = OpenAIDeploymentOrchestrator(api_key=config.api_keys.openai_api_key)
-    elif orchestrator_config.provider == 'gemini':
-        deployment_orchestrator = GoogleGeminiDeploymentOrchestrator(api_key=config.api_keys.google_api_key)
-    else:
-        raise ConfigurationError(f"Unsupported or missing deployment_orchestrator provider: {orchestrator_config.provider}")
-
-    # Prompt Enhancer
-    if config.agent.prompt_enhancer.provider == 'rule_based':
-        prompt_enhancer = RuleBasedPromptEnhancer()
-    elif config.agent.prompt_enhancer.provider == 'llm_assisted':
-        # This assumes the main orchestrator is what the enhancer should use.
-        # This could be made more flexible in the future.
-        if not isinstance(deployment_orchestrator, (GoogleGeminiDeploymentOrchestrator, OpenAIDeploymentOrchestrator)):
-            raise ConfigurationError("LLM-assisted enhancer requires a real LLM orchestrator (Gemini or OpenAI).")
-        prompt_enhancer = LLMAssistedPromptEnhancer(orchestrator=deployment_orchestrator)
-    elif config.agent.prompt_enhancer.provider == 'architect':
-        if not isinstance(deployment_orchestrator, (GoogleGeminiDeploymentOrchestrator, OpenAIDeploymentOrchestrator)):
-            raise ConfigurationError("Architect enhancer requires a real LLM orchestrator (Gemini or OpenAI).")
-        prompt_enhancer = ArchitectPromptEnhancer(orchestrator=deployment_orchestrator, kb=kb)
-    else:
-        raise ConfigurationError(f"Unsupported prompt_enhancer provider: {config.agent.prompt_enhancer.provider}")
+    """
+    Builds and returns an MPLAgent based on the provided configuration.
+
+    Raises:
+        ConfigurationError: If a component's provider is not supported.
+    """
+    agent_config = config.agent
+    kb = _factory_for(_KNOWLEDGE_BASE_FACTORIES, "knowledge_base", agent_config.knowledge_base.provider)(config)
+    deployment_orchestrator = _factory_for(
+        _ORCHESTRATOR_FACTORIES, "deployment_orchestrator", agent_config.deployment_orchestrator.provider
+    )(config)
+    prompt_enhancer = _factory_for(
+        _PROMPT_ENHANCER_FACTORIES, "prompt_enhancer", agent_config.prompt_enhancer.provider
+    )(deployment_orchestrator, kb)
+    learning_refinement_module = _factory_for(
+        _LEARNING_REFINEMENT_FACTORIES, "learning_refinement_module", agent_config.learning_refinement_module.provider
+    )(deployment_orchestrator)
+    reporting_module = _factory_for(
+        _REPORTING_MODULE_FACTORIES, "reporting_module", agent_config.reporting_module.provider
+    )(kb)
 
     # Evaluation Engine (assuming basic for now, can be extended)
     evaluation_engine = BasicEvaluationEngine()
 
-    # Learning and Refinement Module
-    if config.agent.learning_refinement_module.provider == 'rule_based':
-        learning_refinement_module = RuleBasedLearningRefinementModule()
-    elif config.agent.learning_refinement_module.provider == 'llm_assisted':
-        if not isinstance(deployment_orchestrator, (GoogleGeminiDeploymentOrchestrator, OpenAIDeploymentOrchestrator)):
-            raise ConfigurationError("LLM-assisted learning module requires a real LLM orchestrator (Gemini or OpenAI).")
-        learning_refinement_module = LLMAssistedLearningRefinementModule(orchestrator=deployment_orchestrator)
-    else:
-        raise ConfigurationError(f"Unsupported learning_refinement_module provider: {config.agent.learning_refinement_module.provider}")
-
-    # Reporting Module
-    if config.agent.reporting_module.provider == 'database':
-        reporting_module = DatabaseReportingModule(kb=kb)
-    else:
-        raise ConfigurationError(f"Unsupported or missing reporting_module provider: {config.agent.reporting_module.provider}")
-
     return MPLAgent(
         knowledge_base=kb,
         prompt_enhancer=prompt_enhancer,
@@ -193,12 +220,19 @@ def refine(
             logger.critical(f"An unexpected error occurred during the refinement cycle: {e}", exc_info=True)
             typer.echo(typer.style(f"\nAn unexpected error occurred: {type(e).__name__} - {e}", fg=typer.colors.RED, bold=True), err=True)
         finally:
+            # Independent teardown steps run concurrently. Each one completes even if the
+            # other fails, and their failures are logged rather than masking the error above.
+            teardown = {}
             if agent.kb and getattr(agent.kb, '_conn', None):
-                await agent.kb.disconnect()
+                teardown["knowledge base disconnect"] = agent.kb.disconnect()
             if hasattr(agent.deployment_orchestrator, 'close'):
-                await agent.deployment_orchestrator.close()
+                teardown["orchestrator close"] = agent.deployment_orchestrator.close()
+            results = await asyncio.gather(*teardown.values(), return_exceptions=True)
+            for step, result in zip(teardown, results):
+                if isinstance(result, Exception):
+                    logger.opt(exception=result).error("Teardown step {!r} failed: {}", step, result)
 
-    asyncio.run(main_async())
+    event_loop.run(main_async())
 
 @metaprompt_app.command("list")
 def list_metaprompts(
@@ -240,7 +274,7 @@ def list_metaprompts(
             if kb._conn:
                 await kb.disconnect()
 
-    asyncio.run(main_async())
+    event_loop.run(main_async())
 
 @app.command()
 def show_schema(
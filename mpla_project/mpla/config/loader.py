@@ -1,38 +1,45 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Literal, Optional
 import yaml
+import copy
+import functools
 import os
 
-class ApiKeys(BaseModel):
+class _FrozenModel(BaseModel):
+    # Configuration is validated once at load and read-only afterwards, so a loaded
+    # `Config` can be shared and hashed; derive a changed copy with `model_copy(update=...)`.
+    model_config = ConfigDict(frozen=True)
+
+class ApiKeys(_FrozenModel):
     google_api_key: Optional[str] = Field(None)
     openai_api_key: Optional[str] = Field(None)
 
-class DeploymentOrchestratorConfig(BaseModel):
+class DeploymentOrchestratorConfig(_FrozenModel):
     provider: Literal['gemini', 'openai', 'mock']
 
-class KnowledgeBaseConfig(BaseModel):
+class KnowledgeBaseConfig(_FrozenModel):
     provider: Literal['sqlite']
     db_path: str
 
-class PromptEnhancerConfig(BaseModel):
+class PromptEnhancerConfig(_FrozenModel):
     provider: Literal['rule_based', 'llm_assisted', 'architect']
 
-class EvaluationEngineConfig(BaseModel):
+class EvaluationEngineConfig(_FrozenModel):
     provider: Literal['basic']
 
-class LearningRefinementModuleConfig(BaseModel):
+class LearningRefinementModuleConfig(_FrozenModel):
     provider: Literal['rule_based', 'llm_assisted']
 
-class ReportingModuleConfig(BaseModel):
+class ReportingModuleConfig(_FrozenModel):
     provider: Literal['mock', 'database']
 
-class SelfCorrectionConfig(BaseModel):
+class SelfCorrectionConfig(_FrozenModel):
     enabled: bool
     max_iterations: int
     analysis_temperature: float
     revision_temperature: float
 
-class AgentConfig(BaseModel):
+class AgentConfig(_FrozenModel):
     deployment_orchestrator: DeploymentOrchestratorConfig
     knowledge_base: KnowledgeBaseConfig
     prompt_enhancer: PromptEnhancerConfig
@@ -41,14 +48,21 @@ class AgentConfig(BaseModel):
     reporting_module: ReportingModuleConfig
     self_correction: Optional[SelfCorrectionConfig] = None
 
-class Config(BaseModel):
+class Config(_FrozenModel):
     agent: AgentConfig
     api_keys: ApiKeys
 
 
 def load_config(path: str = "mpla/config/config.yaml") -> Config:
-    with open(path, 'r') as f:
-        config_data = yaml.safe_load(f)
+    """
+    Loads and validates the YAML configuration at `path`.
+
+    The parsed YAML is cached until the file's modification time or size changes, so
+    repeated loads skip reading and parsing the file. Environment variables are
+    substituted and the result validated on every call, so each caller gets its own
+    `Config` reflecting the current environment.
+    """
+    config_data = copy.deepcopy(_parse_yaml(path))
 
     # Substitute environment variables
     for key, value in config_data.get('api_keys', {}).items():
@@ -56,4 +70,14 @@ def load_config(path: str = "mpla/config/config.yaml") -> Config:
             env_var = value[2:-1]
             config_data['api_keys'][key] = os.getenv(env_var)
 
-    return Config(**config_data) 
\ No newline at end of file
+    return Config(**config_data)
+
+def _parse_yaml(path: str) -> dict:
+    stat = os.stat(path)
+    return _parse_yaml_version(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+@functools.lru_cache(maxsize=8)
+def _parse_yaml_version(path: str, mtime_ns: int, size: int) -> dict:
+    # The modification time and size only key the cache: an edited file is parsed again.
+    with open(path, 'r') as f:
+        return yaml.safe_load(f)
@@ -1,8 +1,15 @@
+import asyncio
+import contextlib
 from abc import ABC, abstractmethod
-from typing import Optional
+from typing import ClassVar, List, Optional
 
 from mpla.knowledge_base.schemas import PromptVersion, TargetAIProfile, AIOutput
 
+try:
+    from aiolimiter import AsyncLimiter
+except ImportError:
+    AsyncLimiter = None # aiolimiter not installed, batches cannot be rate limited
+
 class DeploymentOrchestrator(ABC):
     """Abstract Base Class for Deployment Orchestrator modules.
     
@@ -10,6 +17,9 @@ class DeploymentOrchestrator(ABC):
     and collecting their outputs.
     """
 
+    # True for orchestrators backed by a real LLM, which LLM-assisted components can use.
+    is_llm_capable: ClassVar[bool] = False
+
     @abstractmethod
     async def deploy_and_collect(
         self, 
@@ -25,4 +35,43 @@ class DeploymentOrchestrator(ABC):
         Returns:
             An AIOutput object containing the data from the AI, or None if deployment/collection fails.
         """
-        pass 
\ No newline at end of file
+        pass
+
+    async def deploy_and_collect_batch(
+        self,
+        prompts: List[PromptVersion],
+        ai_profile: TargetAIProfile,
+        max_concurrency: int = 10,
+        requests_per_minute: Optional[float] = None
+    ) -> List[Optional[AIOutput]]:
+        """Deploys many prompts concurrently and collects their outputs in order.
+
+        A failure in one prompt does not abort the batch; it is returned as an
+        AIOutput carrying the error instead.
+
+        Args:
+            prompts: The PromptVersion objects to deploy.
+            ai_profile: The TargetAIProfile defining the AI system to use.
+            max_concurrency: Maximum number of requests in flight at once.
+            requests_per_minute: Optional provider rate limit. Requires `aiolimiter`.
+
+        Returns:
+            One result per prompt, in the same order as `prompts`.
+        """
+        if requests_per_minute is not None and AsyncLimiter is None:
+            raise ImportError("Rate-limited batches require the 'aiolimiter' package to be installed.")
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limiter = AsyncLimiter(requests_per_minute, 60) if requests_per_minute is not None else None
+
+        async def deploy_one(prompt_version: PromptVersion) -> Optional[AIOutput]:
+            async with semaphore, (limiter or contextlib.nullcontext()):
+                return await self.deploy_and_collect(prompt_version, ai_profile)
+
+        results = await asyncio.gather(*(deploy_one(p) for p in prompts), return_exceptions=True)
+        return [
+            AIOutput(
+                prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
+                raw_output_data={"error": "API communication error", "details": str(result)}
+            ) if isinstance(result, Exception) else result
+            for prompt_version, result in zip(prompts, results)
+        ]
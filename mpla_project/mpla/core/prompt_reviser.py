@@ -1,12 +1,40 @@
 # mpla_project/mpla/core/prompt_reviser.py
 
-import json
 import logging
-from typing import Dict, Any
+import string
+from typing import Dict, Any, List, Optional, Tuple
+
+from mpla.utils.serialization import dumps
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Prompts longer than this are returned unrevised to bound the size of the revision call.
+MAX_REVISE_CHARS = 20000
+
+# The only placeholders a revision template may use.
+TEMPLATE_FIELDS = frozenset({"prompt", "analysis_report"})
+
+# Flaw severities that are not worth spending an LLM revision call on.
+TRIVIAL_FLAW_SEVERITIES = frozenset({"info", "trivial"})
+
+def _has_actionable_flaws(analysis_report: Dict[str, Any]) -> bool:
+    """
+    Returns True if the analysis report contains flaws worth revising for.
+
+    `flaws_found` is normally a boolean, but a list of flaw dicts is also accepted;
+    in that case a list containing only 'info'/'trivial' severities is not actionable.
+    """
+    flaws = analysis_report.get("flaws_found")
+    if not flaws:
+        return False
+    if isinstance(flaws, list):
+        return any(
+            not isinstance(flaw, dict) or str(flaw.get("severity", "")).lower() not in TRIVIAL_FLAW_SEVERITIES
+            for flaw in flaws
+        )
+    return True
+
 class PromptReviser:
     """
     Revises a prompt based on analysis feedback.
@@ -26,6 +54,37 @@ class PromptReviser:
         self.orchestrator = orchestrator
         self.meta_prompt_template = meta_prompt_template
         self.temperature = temperature
+        self._template_segments = self._split_template(meta_prompt_template)
+        # Number of revise() calls answered without contacting the LLM.
+        self.skipped_revisions = 0
+
+    @staticmethod
+    def _split_template(template: str) -> Optional[List[Tuple[str, Optional[str]]]]:
+        """
+        Pre-parses the template into (literal_text, field_name) pairs so that rendering
+        it is a single join rather than a full `str.format` parse on every call.
+
+        Returns None if the template uses anything other than plain `{prompt}` and
+        `{analysis_report}` fields, in which case rendering falls back to `str.format`.
+        """
+        try:
+            parsed = list(string.Formatter().parse(template))
+        except ValueError:
+            return None
+        for _, field_name, format_spec, conversion in parsed:
+            if field_name is not None and (field_name not in TEMPLATE_FIELDS or format_spec or conversion):
+                return None
+        return [(literal_text, field_name) for literal_text, field_name, _, _ in parsed]
+
+    def _render(self, prompt: str, analysis_str: str) -> str:
+        """Fills the revision template with the prompt and the serialized analysis report."""
+        if self._template_segments is None:
+            return self.meta_prompt_template.format(prompt=prompt, analysis_report=analysis_str)
+        values = {"prompt": prompt, "analysis_report": analysis_str}
+        return "".join(
+            literal_text + values[field_name] if field_name is not None else literal_text
+            for literal_text, field_name in self._template_segments
+        )
 
     async def revise(self, prompt: str, analysis_report: Dict[str, Any]) -> str:
         """
@@ -38,19 +97,22 @@ class PromptReviser:
         Returns:
             The revised prompt.
         """
-        if not analysis_report.get("flaws_found"):
-            logger.info("No flaws found in the analysis report. Prompt revision is not required.")
+        if not _has_actionable_flaws(analysis_report):
+            self.skipped_revisions += 1
+            logger.info("No actionable flaws found in the analysis report. Prompt revision is not required (%d skipped so far).", self.skipped_revisions)
+            return prompt
+
+        if len(prompt) > MAX_REVISE_CHARS:
+            self.skipped_revisions += 1
+            logger.warning("Prompt is %d characters, above the %d revision limit. Skipping revision (%d skipped so far).", len(prompt), MAX_REVISE_CHARS, self.skipped_revisions)
             return prompt
 
         logger.info("Revising prompt based on feedback...")
         
         # We convert the analysis dict to a JSON string for clean insertion into the prompt.
-        analysis_str = json.dumps(analysis_report, indent=2)
+        analysis_str = dumps(analysis_report, indent=True)
         
-        revision_prompt = self.meta_prompt_template.format(
-            prompt=prompt,
-            analysis_report=analysis_str
-        )
+        revision_prompt = self._render(prompt, analysis_str)
 
         try:
             # Use the corrected invoke_model method.
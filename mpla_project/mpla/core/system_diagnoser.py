@@ -1,12 +1,27 @@
 import json
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Literal, Optional
+
+from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
+# The diagnosis prompt is split into a static prefix and a dynamic context suffix.
+# The prefix never contains interpolated fields, so the orchestrator can cache it
+# server-side and only the (small) suffix is sent and processed on each call.
 DIAGNOSIS_META_PROMPT = """
-You are an expert AI System Reliability Engineer. A component within your autonomous agent framework has thrown an exception. Your task is to analyze the context and the error to determine the root cause and propose a concrete, actionable recovery strategy.
+You are an expert AI System Reliability Engineer. A component within your autonomous agent framework has thrown an exception. Your task is to analyze the context and the error provided after these instructions to determine the root cause and propose a concrete, actionable recovery strategy.
 
+**Analysis Instructions:**
+1.  **Root Cause Analysis:** Based on the traceback and the component that failed, what is the most likely cause of this error? (e.g., "API key invalid," "Network timeout," "Malformed input data," "LLM provider outage," "Internal bug in component").
+2.  **Propose Recovery Strategy:** Based on the root cause, choose the most appropriate recovery strategy from the list below.
+    *   `retry`: The error seems transient (e.g., temporary network issue, rare API glitch). The operation should be retried.
+    *   `use_fallback`: The primary component seems to be failing consistently or is unavailable. The system should switch to a simpler, more reliable fallback component if one exists.
+    *   `abort_iteration`: The error is severe and likely unrecoverable within this iteration (e.g., a critical bug, fundamentally invalid input). The agent should stop the current iteration and move to the next.
+    *   `halt_system`: The error is critical and affects the entire system's stability (e.g., invalid configuration, database connection lost). The agent should halt all operations safely.
+"""
+
+DIAGNOSIS_CONTEXT_TEMPLATE = """
 **Context:**
 - **Failing Component:** `{component_name}`
 - **Input to Component:** 
@@ -17,23 +32,19 @@ You are an expert AI System Reliability Engineer. A component within your autono
 ```
 {traceback}
 ```
+"""
 
-**Analysis Instructions:**
-1.  **Root Cause Analysis:** Based on the traceback and the component that failed, what is the most likely cause of this error? (e.g., "API key invalid," "Network timeout," "Malformed input data," "LLM provider outage," "Internal bug in component").
-2.  **Propose Recovery Strategy:** Based on the root cause, choose the most appropriate recovery strategy from the list below.
-    *   `retry`: The error seems transient (e.g., temporary network issue, rare API glitch). The operation should be retried.
-    *   `use_fallback`: The primary component seems to be failing consistently or is unavailable. The system should switch to a simpler, more reliable fallback component if one exists.
-    *   `abort_iteration`: The error is severe and likely unrecoverable within this iteration (e.g., a critical bug, fundamentally invalid input). The agent should stop the current iteration and move to the next.
-    *   `halt_system`: The error is critical and affects the entire system's stability (e.g., invalid configuration, database connection lost). The agent should halt all operations safely.
+class DiagnosisResult(BaseModel):
+    """
+    The structured diagnosis returned by the LLM.
 
-**Required JSON Output:**
-Your output MUST be a valid JSON object with the following structure:
-{{
-  "root_cause_analysis": "<Your detailed analysis of the root cause>",
-  "recovery_strategy": "<'retry'|'use_fallback'|'abort_iteration'|'halt_system'>",
-  "justification": "<A concise justification for your chosen strategy>"
-}}
-"""
+    Passed to the orchestrator as a response schema so the model is constrained
+    to emit exactly this JSON shape, which replaces the textual output spec that
+    used to live in the meta-prompt.
+    """
+    root_cause_analysis: str
+    recovery_strategy: Literal["retry", "use_fallback", "abort_iteration", "halt_system"]
+    justification: str
 
 class SystemDiagnoser:
     """
@@ -74,7 +85,7 @@ class SystemDiagnoser:
         
         input_str = json.dumps(component_input, indent=2, default=str) # Safely serialize input
         
-        diagnosis_prompt = DIAGNOSIS_META_PROMPT.format(
+        diagnosis_context = DIAGNOSIS_CONTEXT_TEMPLATE.format(
             component_name=component_name,
             component_input=input_str,
             traceback=traceback_str
@@ -82,17 +93,19 @@ class SystemDiagnoser:
 
         try:
             response = await self.orchestrator.invoke_model(
-                prompt=diagnosis_prompt,
+                prompt=diagnosis_context,
+                cached_prefix=DIAGNOSIS_META_PROMPT,
                 temperature=self.temperature,
-                response_format="json_object"
+                response_format="json_object",
+                response_schema=DiagnosisResult
             )
 
             if not response or not response.get("text"):
                 logger.error("System diagnosis failed: LLM returned an empty response.")
                 return None
             
-            diagnosis_result = json.loads(response["text"])
-            logger.info(f"Diagnosis complete. Proposed strategy: {diagnosis_result.get('recovery_strategy')}")
+            diagnosis_result = DiagnosisResult.model_validate_json(response["text"]).model_dump()
+            logger.info(f"Diagnosis complete. Proposed strategy: {diagnosis_result['recovery_strategy']}")
             return diagnosis_result
 
         except Exception as e:
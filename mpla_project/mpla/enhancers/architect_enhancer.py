@@ -3,7 +3,12 @@ The ArchitectPromptEnhancer uses an LLM with a specific meta-prompt
 to recursively refine a user's prompt.
 """
 import re
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None # pyahocorasick not installed, fall back to plain str.find scanning
 
 from mpla.core.deployment_orchestrator import DeploymentOrchestrator
 from mpla.core.prompt_enhancer import BasePromptEnhancer
@@ -47,6 +52,34 @@ Now, please apply this process to the following Original Prompt.
 "{user_prompt}"
 """
 
+# Section headings the architect meta-prompt asks the LLM to emit, in order.
+PROMPT_HEADING = "**Enhanced Prompt:**"
+ELUCIDATION_HEADING = "**Elucidation:**"
+RESPONSE_HEADINGS = (PROMPT_HEADING, ELUCIDATION_HEADING)
+
+# All headings are compiled into a single automaton so a response is scanned once,
+# regardless of how many headings we look for.
+_HEADING_AUTOMATON = None
+if ahocorasick is not None:
+    _HEADING_AUTOMATON = ahocorasick.Automaton()
+    for _heading in RESPONSE_HEADINGS:
+        _HEADING_AUTOMATON.add_word(_heading, _heading)
+    _HEADING_AUTOMATON.make_automaton()
+
+def _find_headings(response_text: str) -> List[Tuple[int, str]]:
+    """Returns the (start_offset, heading) of every heading occurrence, ordered by offset."""
+    if _HEADING_AUTOMATON is not None:
+        return [(end - len(heading) + 1, heading) for end, heading in _HEADING_AUTOMATON.iter(response_text)]
+
+    matches = []
+    for heading in RESPONSE_HEADINGS:
+        start = response_text.find(heading)
+        while start != -1:
+            matches.append((start, heading))
+            start = response_text.find(heading, start + len(heading))
+    matches.sort()
+    return matches
+
 class ArchitectPromptEnhancer(BasePromptEnhancer):
     """
     An advanced prompt enhancer that uses a meta-prompt loaded from the 
@@ -128,25 +161,21 @@ class ArchitectPromptEnhancer(BasePromptEnhancer):
         expecting a clean, well-formatted output as per the meta-prompt's instructions.
         """
         try:
-            # Use simple string splitting based on the strict headings we requested.
-            # This is more robust than regex if the LLM follows instructions.
-            prompt_heading = "**Enhanced Prompt:**"
-            elucidation_heading = "**Elucidation:**"
+            # Locate every heading in a single pass, then slice each section up to the
+            # next heading. Only the first occurrence of a heading is used.
+            matches = _find_headings(response_text)
+            boundaries = [start for start, _ in matches[1:]] + [len(response_text)]
+            sections = {}
+            for (start, heading), end in zip(matches, boundaries):
+                sections.setdefault(heading, response_text[start + len(heading):end].strip())
 
             # Check if both headings are present
-            if prompt_heading not in response_text or elucidation_heading not in response_text:
+            if PROMPT_HEADING not in sections or ELUCIDATION_HEADING not in sections:
                 logger.warning(f"Response did not contain the expected headings. Response: {response_text}")
                 return None, None
 
-            # Split the response text by the elucidation heading first
-            parts = response_text.split(elucidation_heading)
-            elucidation = parts[1].strip() if len(parts) > 1 else None
-
-            # The first part should contain the enhanced prompt
-            prompt_part = parts[0]
-            # Split the first part by the prompt heading
-            prompt_parts = prompt_part.split(prompt_heading)
-            enhanced_prompt = prompt_parts[1].strip() if len(prompt_parts) > 1 else None
+            enhanced_prompt = sections[PROMPT_HEADING] or None
+            elucidation = sections[ELUCIDATION_HEADING] or None
 
             if not enhanced_prompt:
                  logger.warning(f"Could not parse 'Enhanced Prompt' between the headings. Response: {response_text}")
@@ -1,31 +1,299 @@
+from __future__ import annotations
+
 import os
-import google.generativeai as genai
-from typing import Optional, List, Literal
+import asyncio
+import contextlib
+import hashlib
+import itertools
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import ClassVar, Optional, List, Literal, Dict, Tuple, AsyncIterator, Union
 
 from mpla.core.deployment_orchestrator import DeploymentOrchestrator
+from mpla.core.exceptions import APIConnectionError, APITimeoutError
+from mpla.external.llm_cache import LLMCache, SingleFlight
+from mpla.external.semantic_cache import SemanticCache
 from mpla.knowledge_base.schemas import PromptVersion, TargetAIProfile, AIOutput
 from mpla.utils.logging import logger
+from mpla.utils.retry import retry_async
+
+# Lifetime of server-side context caches for static prompt prefixes, and how close to
+# expiry a cache may get before its TTL is extended on the next use.
+CONTEXT_CACHE_TTL = timedelta(hours=1)
+CONTEXT_CACHE_REFRESH_MARGIN = timedelta(minutes=5)
+# Number of context caches tracked per orchestrator, and how long a prefix the API
+# declined to cache is sent inline before caching it is tried again.
+CONTEXT_CACHE_SIZE = 32
+CONTEXT_CACHE_RETRY_S = 600.0
+
+# The Gemini SDK pulls in grpc and protobuf, which take about half a second to import,
+# so it is loaded when the first orchestrator is created rather than with this module.
+genai = None
+glm = None
+content_types = None
+field_mask_pb2 = None
+# Upstream errors that indicate a temporary condition; these are raised as
+# APIConnectionError so the call is retried before it is reported as failed.
+TRANSIENT_API_ERRORS: Tuple[type, ...] = ()
+
+def _import_sdk() -> None:
+    """Binds the Gemini SDK modules to this module's globals on first use."""
+    global genai, glm, content_types, field_mask_pb2, TRANSIENT_API_ERRORS
+    if genai is not None:
+        return
+    import google.generativeai
+    import google.ai.generativelanguage
+    from google.generativeai.types import content_types as sdk_content_types
+    from google.api_core import exceptions as google_exceptions
+    from google.protobuf import field_mask_pb2 as sdk_field_mask_pb2
+
+    glm = google.ai.generativelanguage
+    content_types = sdk_content_types
+    field_mask_pb2 = sdk_field_mask_pb2
+    TRANSIENT_API_ERRORS = (
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.ResourceExhausted,
+    )
+    genai = google.generativeai
+
+# Speaker of each turn in a flat conversation history, indexed by turn parity.
+HISTORY_ROLES = ("user", "model")
+
+# Number of configured GenerativeModel instances kept for reuse.
+MODEL_CACHE_SIZE = 32
+
+def _is_retryable(error: Exception) -> bool:
+    # Timeouts already waited the full call budget, so they go straight to the caller.
+    return isinstance(error, APIConnectionError) and not isinstance(error, APITimeoutError)
 
 class GoogleGeminiOrchestrator(DeploymentOrchestrator):
     """
     An orchestrator for interacting with Google's Gemini models.
     """
 
-    def __init__(self, api_key: str | None = None):
+    is_llm_capable: ClassVar[bool] = True
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        call_timeout_s: float = 60.0,
+        max_concurrency: int = 32,
+        cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[SemanticCache] = None
+    ):
         """
-        Initializes the orchestrator and configures the Gemini API.
+        Initializes the orchestrator with its own Gemini API credentials.
+
+        The key is bound to clients owned by this instance rather than set through the
+        process-global `genai.configure`, so orchestrators with different keys can coexist.
 
         Args:
             api_key: The Google API key.
+            call_timeout_s: Upper bound, in seconds, for a single model call.
+            max_concurrency: Maximum number of model calls in flight at once.
+            cache: Cache for temperature-0 responses. Defaults to an in-memory LRU.
+            semantic_cache: Optional similarity cache for profiles that enable `semantic_cache`.
 
         Raises:
             ValueError: If the API key is not provided.
         """
         if not api_key:
             raise ValueError("Google API key must be provided.")
+        _import_sdk()
         
         self.api_key = api_key
-        genai.configure(api_key=self.api_key)
+        self.call_timeout_s = call_timeout_s
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.cache = cache if cache is not None else LLMCache()
+        self.semantic_cache = semantic_cache
+        # Identical cacheable calls (and context cache creations) made while one is already in
+        # flight share its outcome.
+        self._inflight = SingleFlight()
+        self._client_options = {"api_key": self.api_key}
+        # The async gRPC clients are created on first use so they bind to the running event loop.
+        self._generative_client: Optional[glm.GenerativeServiceAsyncClient] = None
+        self._cache_client: Optional[glm.CacheServiceAsyncClient] = None
+        # Maps (model_name, prefix_hash) to (time tracked, CachedContent resource), least
+        # recently used first. The resource is None when the API declined to cache that
+        # prefix, so we don't retry on every call.
+        self._context_caches: "OrderedDict[Tuple[str, str], Tuple[float, Optional[glm.CachedContent]]]" = OrderedDict()
+        # Configured models keyed by everything that goes into their construction, least recently used first.
+        self._models: "OrderedDict[tuple, genai.GenerativeModel]" = OrderedDict()
+
+    def _bind_model(self, model: genai.GenerativeModel) -> genai.GenerativeModel:
+        """Makes `model` send its requests through this orchestrator's own client."""
+        if self._generative_client is None:
+            self._generative_client = glm.GenerativeServiceAsyncClient(client_options=self._client_options)
+        # GenerativeModel falls back to the globally configured client when this is unset.
+        model._async_client = self._generative_client
+        return model
+
+    def _get_model(
+        self,
+        model_name: str,
+        temperature: Optional[float] = None,
+        response_format: Optional[str] = None,
+        response_schema: Optional[type] = None,
+        context_cache: Optional[glm.CachedContent] = None
+    ) -> genai.GenerativeModel:
+        """
+        Returns a bound GenerativeModel for the given settings, reusing a previously built one.
+
+        Models hold no per-request state, so one instance can serve any number of calls.
+        """
+        if temperature is not None:
+            temperature = float(temperature)
+        key = (model_name, temperature, response_format, response_schema, context_cache.name if context_cache else None)
+        model = self._models.get(key)
+        if model is not None:
+            self._models.move_to_end(key)
+            return model
+
+        generation_config = None
+        if temperature is not None or response_format is not None or response_schema is not None:
+            generation_config = genai.types.GenerationConfig(temperature=temperature)
+            if response_format == "json_object" or response_schema is not None:
+                generation_config.response_mime_type = "application/json"
+            if response_schema is not None:
+                generation_config.response_schema = response_schema
+
+        if context_cache is not None:
+            model = genai.GenerativeModel.from_cached_content(context_cache, generation_config=generation_config)
+        else:
+            model = genai.GenerativeModel(model_name=model_name, generation_config=generation_config)
+        self._models[key] = self._bind_model(model)
+        if len(self._models) > MODEL_CACHE_SIZE:
+            self._models.popitem(last=False)
+        return model
+
+    @contextlib.asynccontextmanager
+    async def _bounded_call(self):
+        """
+        Wraps a single model call: caps the number of in-flight calls and bounds the call
+        to `call_timeout_s`.
+
+        Raises:
+            APITimeoutError: If the call does not finish in time.
+            APIConnectionError: If the API reports a transient failure.
+        """
+        async with self._semaphore:
+            try:
+                async with asyncio.timeout(self.call_timeout_s):
+                    yield
+            except TimeoutError as e:
+                raise APITimeoutError(f"Gemini API call did not complete within {self.call_timeout_s}s.") from e
+            except TRANSIENT_API_ERRORS as e:
+                raise APIConnectionError(f"Transient Gemini API error: {e}") from e
+
+    async def _call_gemini(
+        self,
+        target: Union[genai.GenerativeModel, genai.ChatSession],
+        content: str
+    ) -> Optional[str]:
+        """
+        Sends `content` to a model (or the next turn of a chat) and returns the response text.
+
+        Every non-streaming call goes through here, so they all share the concurrency cap,
+        the per-call timeout and the retries of transient failures.
+
+        Returns:
+            The response text, or None if the response was empty.
+
+        Raises:
+            APIConnectionError: If the call times out or keeps failing transiently.
+        """
+        send = target.send_message_async if isinstance(target, genai.ChatSession) else target.generate_content_async
+
+        async def attempt() -> genai.types.GenerateContentResponse:
+            async with self._bounded_call():
+                return await send(content)
+
+        response = await retry_async(attempt, _is_retryable)
+        return response.text if response and response.text else None
+
+    def _get_cache_client(self) -> glm.CacheServiceAsyncClient:
+        """Returns this orchestrator's context-cache client, creating it on first use."""
+        if self._cache_client is None:
+            self._cache_client = glm.CacheServiceAsyncClient(client_options=self._client_options)
+        return self._cache_client
+
+    async def _get_context_cache(
+        self,
+        model_name: str,
+        contents: List[dict]
+    ) -> Optional[glm.CachedContent]:
+        """
+        Returns a server-side context cache for a static prompt prefix, creating it on first use.
+
+        Caches close to expiry have their TTL extended. If the API refuses to cache the
+        prefix (e.g. it is below the model's minimum cacheable size), None is returned and
+        the caller should send the prefix inline; caching it is retried after
+        `CONTEXT_CACHE_RETRY_S`. At most `CONTEXT_CACHE_SIZE` caches are tracked; the least
+        recently used one is deleted from the server when another is created.
+        """
+        key = (model_name, hashlib.sha256(repr(contents).encode("utf-8")).hexdigest())
+        entry = self._context_caches.get(key)
+        if entry is not None:
+            tracked_at, cached = entry
+            if cached is None:
+                if time.monotonic() - tracked_at < CONTEXT_CACHE_RETRY_S:
+                    self._context_caches.move_to_end(key)
+                    return None
+            else:
+                self._context_caches.move_to_end(key)
+                if cached.expire_time - datetime.now(timezone.utc) < CONTEXT_CACHE_REFRESH_MARGIN:
+                    try:
+                        cached = await self._get_cache_client().update_cached_content(
+                            glm.UpdateCachedContentRequest(
+                                cached_content=glm.CachedContent(name=cached.name, ttl=CONTEXT_CACHE_TTL),
+                                update_mask=field_mask_pb2.FieldMask(paths=["ttl"]),
+                            )
+                        )
+                        self._context_caches[key] = (tracked_at, cached)
+                    except Exception as e:
+                        logger.warning(f"Failed to refresh context cache for model '{model_name}': {e}")
+                        self._context_caches.pop(key, None)
+                        return None
+                return cached
+
+        # Concurrent first calls for a prefix share one creation, so no cache is left untracked.
+        return await self._inflight.do(f"context-cache:{key[0]}:{key[1]}", lambda: self._create_context_cache(key, contents))
+
+    async def _create_context_cache(
+        self, key: Tuple[str, str], contents: List[dict]
+    ) -> Optional[glm.CachedContent]:
+        """Creates and tracks the context cache for `key`, evicting the least recently used one if over capacity."""
+        model_name = key[0]
+        try:
+            cached = await self._get_cache_client().create_cached_content(
+                glm.CreateCachedContentRequest(
+                    cached_content=glm.CachedContent(
+                        model=model_name if "/" in model_name else f"models/{model_name}",
+                        contents=content_types.to_contents(contents),
+                        ttl=CONTEXT_CACHE_TTL,
+                    )
+                )
+            )
+            logger.debug(f"Created context cache '{cached.name}' for model '{model_name}'.")
+        except Exception as e:
+            logger.debug(f"Context caching unavailable for model '{model_name}', sending prefix inline: {e}")
+            cached = None
+        self._context_caches[key] = (time.monotonic(), cached)
+        self._context_caches.move_to_end(key)
+        if len(self._context_caches) > CONTEXT_CACHE_SIZE:
+            _, (_, evicted) = self._context_caches.popitem(last=False)
+            if evicted is not None:
+                await self._delete_context_cache(evicted)
+        return cached
+
+    async def _delete_context_cache(self, cached: glm.CachedContent) -> None:
+        """Deletes a context cache from the server, so it stops being billed before it expires."""
+        try:
+            await self._get_cache_client().delete_cached_content(name=cached.name)
+        except Exception as e:
+            logger.warning(f"Failed to delete context cache '{cached.name}': {e}")
 
     async def deploy_and_collect(
         self,
@@ -40,10 +308,8 @@ class GoogleGeminiOrchestrator(DeploymentOrchestrator):
             ai_profile: The TargetAIProfile, where `name` is the model name.
 
         Returns:
-            An AIOutput object containing the data from the AI, or None on failure.
-            
-        Raises:
-            Exception: If the API call fails or returns an empty response.
+            An AIOutput object containing the data from the AI, or the error if the call
+            failed (including timeouts that persisted through the retries).
         """
         model_name = ai_profile.name or 'gemini-1.5-flash'
         
@@ -51,36 +317,35 @@ class GoogleGeminiOrchestrator(DeploymentOrchestrator):
         capabilities = ai_profile.capabilities or {}
         temperature = capabilities.get("temperature")
 
-        generation_config = None
-        if temperature is not None:
-            generation_config = genai.types.GenerationConfig(temperature=float(temperature))
-
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=generation_config
-        )
-        
-        try:
-            print(f"Deploying prompt to Gemini model: {model_name} with temp: {temperature}...")
-            request_options = {"timeout": 60}
-            response: genai.types.GenerateContentResponse = await model.generate_content_async(
-                prompt_version.prompt_text,
-                request_options=request_options
-            )
-            
-            if response and response.text:
-                print("...Response received successfully.")
+        cache_key = None
+        if LLMCache.is_cacheable(temperature):
+            cache_key = LLMCache.make_key(model_name, prompt_version.prompt_text)
+            cached_output = await self.cache.get(cache_key)
+            if cached_output is not None:
+                logger.debug(f"Serving Gemini response for model {model_name} from cache.")
                 return AIOutput(
                     prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
-                    raw_output_data={"text": response.text, "full_response": str(response)}
+                    raw_output_data=cached_output
                 )
-            else:
-                print("API call returned an empty or invalid response.")
+
+        embedding = None
+        if self.semantic_cache is not None and SemanticCache.applies_to(capabilities):
+            embedding = await self.semantic_cache.embed(prompt_version.prompt_text)
+            cached_output = await self.semantic_cache.get(model_name, embedding)
+            if cached_output is not None:
                 return AIOutput(
                     prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
-                    raw_output_data={"error": "Empty response from API", "full_response": str(response)}
+                    raw_output_data=cached_output
                 )
 
+        model = self._get_model(model_name, temperature)
+        
+        try:
+            logger.debug("Deploying prompt to Gemini model {} with temp {}", model_name, temperature)
+            if cache_key is not None:
+                text = await self._inflight.do(cache_key, lambda: self._call_gemini(model, prompt_version.prompt_text))
+            else:
+                text = await self._call_gemini(model, prompt_version.prompt_text)
         except Exception as e:
             logger.error(f"An error occurred while communicating with the Google Gemini API: {e}")
             return AIOutput(
@@ -88,6 +353,68 @@ class GoogleGeminiOrchestrator(DeploymentOrchestrator):
                 raw_output_data={"error": "API communication error", "details": str(e)}
             )
 
+        if text is None:
+            logger.warning("Gemini API call returned an empty or invalid response.")
+            return AIOutput(
+                prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
+                raw_output_data={"error": "Empty response from API"}
+            )
+
+        raw_output_data = {"text": text}
+        if cache_key is not None:
+            await self.cache.set(cache_key, raw_output_data)
+        if embedding is not None:
+            await self.semantic_cache.set(model_name, embedding, raw_output_data)
+        return AIOutput(
+            prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
+            raw_output_data=raw_output_data
+        )
+
+    async def deploy_and_collect_stream(
+        self,
+        prompt_version: PromptVersion,
+        ai_profile: TargetAIProfile
+    ) -> AsyncIterator[Union[str, AIOutput]]:
+        """
+        Streams a Gemini response as it is generated.
+
+        Yields each text fragment as it arrives so consumers can start work before the
+        response finishes, then yields a final AIOutput holding the assembled text
+        (or the error, if the call failed).
+
+        Args:
+            prompt_version: The PromptVersion object containing the prompt text.
+            ai_profile: The TargetAIProfile, where `name` is the model name.
+        """
+        prompt_version_id = prompt_version.id if prompt_version.id is not None else -1
+        model_name = ai_profile.name or 'gemini-1.5-flash'
+        temperature = (ai_profile.capabilities or {}).get("temperature")
+        model = self._get_model(model_name, temperature)
+        fragments: List[str] = []
+        try:
+            logger.debug("Streaming prompt to Gemini model {} with temp {}", model_name, temperature)
+            async with self._bounded_call():
+                response = await model.generate_content_async(prompt_version.prompt_text, stream=True)
+            # The timeout applies per fragment: it must not span the consumer's work between yields.
+            chunks = aiter(response)
+            while True:
+                async with self._bounded_call():
+                    chunk = await anext(chunks, None)
+                if chunk is None:
+                    break
+                if chunk.parts:
+                    fragments.append(chunk.text)
+                    yield chunk.text
+        except Exception as e:
+            logger.error(f"An error occurred while streaming from the Google Gemini API: {e}")
+            yield AIOutput(
+                prompt_version_id=prompt_version_id,
+                raw_output_data={"error": "API communication error", "details": str(e)}
+            )
+            return
+
+        yield AIOutput(prompt_version_id=prompt_version_id, raw_output_data={"text": "".join(fragments)})
+
     async def deploy_and_collect_from_history(
         self,
         history: List[str],
@@ -103,54 +430,36 @@ class GoogleGeminiOrchestrator(DeploymentOrchestrator):
             ai_profile: The TargetAIProfile, where `name` is the model name.
 
         Returns:
-            An AIOutput object containing the data from the AI, or None on failure.
+            An AIOutput object containing the data from the AI, or the error if the call
+            failed (including timeouts that persisted through the retries).
         """
         model_name = ai_profile.name or 'gemini-1.5-flash'
         
         capabilities = ai_profile.capabilities or {}
         temperature = capabilities.get("temperature")
 
-        generation_config = None
-        if temperature is not None:
-            generation_config = genai.types.GenerationConfig(temperature=float(temperature))
-
-        model = genai.GenerativeModel(
-            model_name=model_name,
-            generation_config=generation_config
-        )
-        
         # Convert the flat list of strings into the required dict format
-        formatted_history = []
-        for i, content in enumerate(history[:-1]): # All but the last message
-            role = "user" if i % 2 == 0 else "model"
-            formatted_history.append({'role': role, 'parts': [content]})
+        # All but the last message; islice avoids copying the history and a tuple is the cheapest parts container.
+        formatted_history = [
+            {'role': HISTORY_ROLES[i & 1], 'parts': (content,)}
+            for i, content in enumerate(itertools.islice(history, len(history) - 1))
+        ]
 
         try:
-            print(f"Deploying conversation to Gemini model: {model_name} with temp: {temperature}...")
-            
-            # Start a chat session with the formatted history
-            chat_session = model.start_chat(history=formatted_history)
+            logger.debug("Deploying conversation to Gemini model {} with temp {}", model_name, temperature)
+
+            # The first turn (e.g. the architect meta-prompt) is static, so serve it from a
+            # context cache when possible; the turns after it change per call and are sent inline.
+            context_cache = await self._get_context_cache(model_name, formatted_history[:1]) if formatted_history else None
+            model = self._get_model(model_name, temperature, context_cache=context_cache)
+            if context_cache is not None:
+                chat_session = model.start_chat(history=formatted_history[1:])
+            else:
+                # Start a chat session with the formatted history
+                chat_session = model.start_chat(history=formatted_history)
             
             # Send the final message
-            last_prompt = history[-1]
-            response: genai.types.GenerateContentResponse = await chat_session.send_message_async(
-                last_prompt,
-            )
-            
-            if response and response.text:
-                print("...Response received successfully.")
-                # We don't have a real PromptVersion, so we use a dummy ID.
-                return AIOutput(
-                    prompt_version_id=-1, 
-                    raw_output_data={"text": response.text, "full_response": str(response)}
-                )
-            else:
-                print("API call returned an empty or invalid response.")
-                return AIOutput(
-                    prompt_version_id=-1,
-                    raw_output_data={"error": "Empty response from API", "full_response": str(response)}
-                )
-
+            text = await self._call_gemini(chat_session, history[-1])
         except Exception as e:
             logger.error(f"An error occurred while communicating with the Google Gemini API: {e}")
             return AIOutput(
@@ -158,12 +467,20 @@ class GoogleGeminiOrchestrator(DeploymentOrchestrator):
                 raw_output_data={"error": "API communication error", "details": str(e)}
             )
 
+        # We don't have a real PromptVersion, so we use a dummy ID.
+        if text is None:
+            logger.warning("Gemini API call returned an empty or invalid response.")
+            return AIOutput(prompt_version_id=-1, raw_output_data={"error": "Empty response from API"})
+        return AIOutput(prompt_version_id=-1, raw_output_data={"text": text})
+
     async def invoke_model(
         self, 
         prompt: str, 
         temperature: float, 
         model: str = 'gemini-1.5-flash',
-        response_format: Optional[Literal["json_object"]] = None
+        response_format: Optional[Literal["json_object"]] = None,
+        response_schema: Optional[type] = None,
+        cached_prefix: Optional[str] = None
     ) -> Optional[dict]:
         """
         Invokes a Gemini model with a specific prompt and settings.
@@ -173,43 +490,68 @@ class GoogleGeminiOrchestrator(DeploymentOrchestrator):
             temperature: The generation temperature.
             model: The specific model to use.
             response_format: If 'json_object', configures the model to return JSON.
+            response_schema: An optional Pydantic model (or other type) describing the
+                             expected JSON. When given, decoding is constrained to it.
+            cached_prefix: Optional static text that precedes `prompt`. It is served from a
+                           server-side context cache when possible, otherwise prepended.
 
         Returns:
             The model's response as a dictionary, or None on failure.
         """
-        generation_config = genai.types.GenerationConfig(
-            temperature=float(temperature)
-        )
-        
-        if response_format == "json_object":
-            generation_config.response_mime_type = "application/json"
+        cache_key = None
+        if LLMCache.is_cacheable(temperature):
+            cache_key = LLMCache.make_key(
+                model,
+                (cached_prefix or "") + prompt,
+                response_format,
+                response_schema=getattr(response_schema, "__qualname__", response_schema)
+            )
+            cached_response = await self.cache.get(cache_key)
+            if cached_response is not None:
+                logger.debug(f"Serving invocation of model '{model}' from cache.")
+                return cached_response
 
-        genai_model = genai.GenerativeModel(
-            model_name=model,
-            generation_config=generation_config
-        )
-        
         try:
-            logger.debug(f"Invoking model '{model}' with temp={temperature} and format='{response_format}'")
-            response: genai.types.GenerateContentResponse = await genai_model.generate_content_async(
-                prompt
-            )
-            
-            if not response or not response.text:
-                logger.warning("Model invocation returned no text content.")
-                return None
-            
-            # The 'text' attribute of the response object will be a string, 
-            # which we return directly for the caller to handle (e.g., json.loads).
-            return {"text": response.text}
+            context_cache = None
+            if cached_prefix:
+                context_cache = await self._get_context_cache(
+                    model, [{'role': 'user', 'parts': [cached_prefix]}]
+                )
+                if context_cache is None:
+                    prompt = cached_prefix + prompt
+
+            genai_model = self._get_model(model, temperature, response_format, response_schema, context_cache)
 
+            logger.debug("Invoking model '{}' with temp={} and format='{}'", model, temperature, response_format)
+            text = await self._call_gemini(genai_model, prompt)
         except Exception as e:
             logger.error(f"An error occurred during model invocation: {e}")
             return None
 
+        if text is None:
+            logger.warning("Model invocation returned no text content.")
+            return None
+
+        # The text is returned as-is for the caller to handle (e.g., json.loads).
+        result = {"text": text}
+        if cache_key is not None:
+            await self.cache.set(cache_key, result)
+        return result
+
     async def close(self):
-        """A no-op for the Gemini client, which doesn't need to be closed."""
-        pass
+        """
+        Deletes this orchestrator's server-side context caches, then closes the gRPC
+        channels of its clients, if they were opened.
+        """
+        caches = [cached for _, cached in self._context_caches.values() if cached is not None]
+        self._context_caches.clear()
+        if caches:
+            await asyncio.gather(*(self._delete_context_cache(cached) for cached in caches))
+        for api_client in (self._generative_client, self._cache_client):
+            if api_client is not None:
+                await api_client.transport.close()
+        self._generative_client = None
+        self._cache_client = None
 
     # Architectural Note:
     # The current `MPLAgent` class is designed to use a `deploy_and_collect` method
@@ -0,0 +1,163 @@
+"""
+Response cache for deterministic LLM calls.
+
+Calls made with temperature 0 are (for practical purposes) deterministic, so an
+identical request can be answered from a previous response instead of another
+round trip to the provider. Orchestrators derive a SHA-256 key from the request
+parameters and consult an `LLMCache` before calling the API.
+"""
+import asyncio
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+from mpla.utils.serialization import dumps, dumps_bytes, loads
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None # redis not installed, RedisBackend is unavailable
+
+T = TypeVar("T")
+
+class CacheBackend(ABC):
+    """Abstract storage for serialized cache entries."""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Returns the stored value for `key`, or None if absent or expired."""
+        pass
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        """Stores `value` under `key`, expiring after `ttl` seconds if given."""
+        pass
+
+class InMemoryLRUBackend(CacheBackend):
+    """A process-local backend that evicts the least recently used entry beyond `max_entries`."""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[Optional[float], bytes]]" = OrderedDict()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+class RedisBackend(CacheBackend):
+    """A backend shared between processes, stored in Redis. Requires the `redis` package."""
+
+    def __init__(self, url: str = "redis://localhost:6379/0", key_prefix: str = "mpla:llm:"):
+        if aioredis is None:
+            raise ImportError("RedisBackend requires the 'redis' package to be installed.")
+        self._redis = aioredis.from_url(url)
+        self.key_prefix = key_prefix
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self.key_prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: Optional[float] = None) -> None:
+        await self._redis.set(self.key_prefix + key, value, ex=int(ttl) if ttl else None)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+class LLMCache:
+    """
+    Caches LLM responses keyed by a hash of the request.
+
+    Values must be JSON-serializable; they are stored serialized, so callers always
+    receive a fresh copy. Hit and miss counts are kept in `stats`.
+    """
+
+    def __init__(self, backend: Optional[CacheBackend] = None, ttl: Optional[float] = None):
+        """
+        Args:
+            backend: Where entries are stored. Defaults to an in-memory LRU.
+            ttl: Lifetime of an entry in seconds. Entries never expire if None.
+        """
+        self.backend = backend or InMemoryLRUBackend()
+        self.ttl = ttl
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def is_cacheable(temperature: Optional[float]) -> bool:
+        """Only explicit temperature-0 calls are deterministic enough to cache."""
+        return temperature is not None and float(temperature) == 0.0
+
+    @staticmethod
+    def make_key(model: str, prompt: str, response_format: Optional[str] = None, **params: Any) -> str:
+        """Builds a SHA-256 key over everything that influences the response."""
+        payload = {"model": model, "prompt": prompt, "fmt": response_format, "params": params}
+        return hashlib.sha256(dumps(payload, default=str).encode("utf-8")).hexdigest()
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Returns the cached value for `key`, or None on a miss."""
+        value = await self.backend.get(key)
+        if value is None:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        return loads(value)
+
+    async def set(self, key: str, value: Any) -> None:
+        """Caches `value` under `key`."""
+        await self.backend.set(key, dumps_bytes(value), ttl=self.ttl)
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The call runs in a task owned by the flight, and every caller (the first one
+    included) awaits it through `asyncio.shield`, so cancelling one caller never
+    cancels the others. The task itself is cancelled only once no caller is waiting
+    on it. Once it settles the key is released, so subsequent calls run afresh (or
+    hit the response cache).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+        self._waiters: Dict[str, int] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[T]]) -> T:
+        """Runs `func` for `key`, or joins the call already in flight for it."""
+        task = self._calls.get(key)
+        if task is None:
+            task = self._calls[key] = asyncio.ensure_future(func())
+            self._waiters[key] = 0
+            task.add_done_callback(lambda t: self._release(key, t))
+        self._waiters[key] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            if self._calls.get(key) is task:
+                self._waiters[key] -= 1
+                if not self._waiters[key] and not task.done():
+                    # The last caller left; nobody needs the result any more.
+                    self._release(key, task)
+                    task.cancel()
+
+    def _release(self, key: str, task: asyncio.Future) -> None:
+        """Forgets `task` as the call in flight for `key` and marks its outcome as retrieved."""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+            del self._waiters[key]
+        # Retrieve the outcome so a failure nobody awaited isn't reported as unhandled.
+        if task.done() and not task.cancelled():
+            task.exception()
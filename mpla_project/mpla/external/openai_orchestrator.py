@@ -1,9 +1,17 @@
+from __future__ import annotations
+
 import os
-import httpx
-from typing import Optional, Dict, Any, List
+import asyncio
+from typing import ClassVar, Optional, Dict, Any, List, AsyncIterator, Union
 
 from mpla.core.deployment_orchestrator import DeploymentOrchestrator
+from mpla.core.exceptions import APIResponseError
 from mpla.knowledge_base.schemas import PromptVersion, TargetAIProfile, AIOutput
+from mpla.external.llm_cache import LLMCache, SingleFlight
+from mpla.external.semantic_cache import SemanticCache
+from mpla.utils.logging import logger
+from mpla.utils.retry import retry_async
+from mpla.utils.serialization import dumps_bytes, loads
 
 # Load .env file for local development if python-dotenv is installed
 try:
@@ -14,21 +22,102 @@ except ImportError:
 
 DEFAULT_OPENAI_API_BASE = "https://api.openai.com/v1"
 DEFAULT_MODEL = "gpt-3.5-turbo" # A common, cost-effective model
+BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+# Rate limiting and server-side failures that are worth retrying; other 4xx errors are final.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Upper bound on a server-requested Retry-After wait.
+MAX_RETRY_AFTER_S = 60.0
+
+# httpx is imported when the first orchestrator is created, keeping it off the start-up
+# path of processes that only talk to other providers.
+httpx = None
+HTTP2_AVAILABLE = False
+
+def _import_httpx() -> None:
+    """Binds httpx to this module's globals on first use."""
+    global httpx, HTTP2_AVAILABLE
+    if httpx is not None:
+        return
+    try:
+        import h2 # noqa: F401 -- only needed so httpx can negotiate HTTP/2
+        HTTP2_AVAILABLE = True
+    except ImportError:
+        HTTP2_AVAILABLE = False # h2 not installed, the client falls back to HTTP/1.1
+    import httpx as httpx_module
+    httpx = httpx_module
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Returns the wait requested by a Retry-After header (in seconds form), if any."""
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    try:
+        return min(float(error.response.headers["Retry-After"]), MAX_RETRY_AFTER_S)
+    except (KeyError, ValueError):
+        return None
 
 class OpenAIDeploymentOrchestrator(DeploymentOrchestrator):
     """A DeploymentOrchestrator for interacting with OpenAI's Chat Completions API."""
 
-    def __init__(self, api_key: str, api_base: Optional[str] = None):
+    is_llm_capable: ClassVar[bool] = True
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: Optional[str] = None,
+        cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[SemanticCache] = None
+    ):
         """
         Initializes the orchestrator.
 
         Args:
             api_key: The OpenAI API key.
             api_base: The OpenAI API base URL (optional).
+            cache: Cache for temperature-0 responses. Defaults to an in-memory LRU.
+            semantic_cache: Optional similarity cache for profiles that enable `semantic_cache`.
         """
+        _import_httpx()
         self.api_key = api_key
         self.api_base = api_base or DEFAULT_OPENAI_API_BASE
-        self.client = httpx.AsyncClient()
+        # One long-lived client per orchestrator so connections (and HTTP/2 streams) are shared by all calls.
+        # Content-Type is left per-request: JSON bodies set it themselves and file uploads need multipart.
+        self.client = httpx.AsyncClient(
+            base_url=self.api_base,
+            http2=HTTP2_AVAILABLE,
+            # Sized for concurrent batches; idle connections are kept warm to skip repeated TLS handshakes.
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+            headers={"Authorization": f"Bearer {self.api_key}"}
+        )
+        self.cache = cache if cache is not None else LLMCache()
+        self.semantic_cache = semantic_cache
+        # Identical cacheable calls made while one is already in flight share its response.
+        self._inflight = SingleFlight()
+
+    @staticmethod
+    def _build_payload(prompt_version: PromptVersion, ai_profile: TargetAIProfile) -> Dict[str, Any]:
+        """Builds the Chat Completions request body for a prompt."""
+        # Constructing a simple payload. This can be extended to include roles, history, etc.
+        # For now, we treat the prompt_text as a single user message.
+        payload = {
+            "model": ai_profile.name if ai_profile.name else DEFAULT_MODEL,
+            "messages": [
+                {"role": "user", "content": prompt_version.prompt_text}
+            ],
+        }
+
+        # Add other parameters from ai_profile.capabilities if they exist
+        if ai_profile.capabilities:
+            if "temperature" in ai_profile.capabilities:
+                payload["temperature"] = float(ai_profile.capabilities["temperature"])
+            if "max_tokens" in ai_profile.capabilities:
+                payload["max_tokens"] = int(ai_profile.capabilities["max_tokens"])
+        return payload
 
     async def deploy_and_collect(
         self, 
@@ -46,82 +135,235 @@ class OpenAIDeploymentOrchestrator(DeploymentOrchestrator):
             An AIOutput object containing the data from the AI, or None if deployment/collection fails.
         """
         if not self.api_key:
-            print(f"Error: OpenAI API key was not provided to the orchestrator.")
+            logger.error("OpenAI API key was not provided to the orchestrator.")
             return None
 
         model_name = ai_profile.name if ai_profile.name else DEFAULT_MODEL
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json",
-        }
-        
-        # Constructing a simple payload. This can be extended to include roles, history, etc.
-        # For now, we treat the prompt_text as a single user message.
-        payload = {
-            "model": model_name,
-            "messages": [
-                {"role": "user", "content": prompt_version.prompt_text}
-            ],
-        }
+        payload = self._build_payload(prompt_version, ai_profile)
 
-        # Add other parameters from ai_profile.capabilities if they exist
-        if ai_profile.capabilities:
-            if "temperature" in ai_profile.capabilities:
-                payload["temperature"] = float(ai_profile.capabilities["temperature"])
-            if "max_tokens" in ai_profile.capabilities:
-                payload["max_tokens"] = int(ai_profile.capabilities["max_tokens"])
-
-        chat_completions_url = f"{self.api_base.rstrip('/')}/chat/completions"
+        cache_key = None
+        if LLMCache.is_cacheable(payload.get("temperature")):
+            cache_key = LLMCache.make_key(
+                model_name,
+                prompt_version.prompt_text,
+                api_base=self.api_base,
+                max_tokens=payload.get("max_tokens")
+            )
+            cached_output = await self.cache.get(cache_key)
+            if cached_output is not None:
+                return AIOutput(
+                    prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
+                    raw_output_data=cached_output
+                )
 
-        try:
-            print(f"Sending prompt to OpenAI model: {model_name} at {chat_completions_url}...")
-            response = await self.client.post(chat_completions_url, headers=headers, json=payload, timeout=60.0)
-            response.raise_for_status()  # Raises HTTPStatusError for 4xx/5xx responses
-            
-            response_data = response.json()
-            
-            # Extract the content from the first choice's message
-            # (OpenAI API can return multiple choices, we typically use the first)
-            if response_data.get("choices") and len(response_data["choices"]) > 0:
-                message = response_data["choices"][0].get("message")
-                if message and "content" in message:
-                    ai_content = message["content"]
-                    # The AIOutput expects prompt_version_id, which will be set by the agent
-                    # when this AIOutput object is persisted.
-                    return AIOutput(
-                        prompt_version_id=prompt_version.id if prompt_version.id is not None else -1, # Placeholder if id not set yet
-                        raw_output_data={"text": ai_content, "full_response": response_data}
-                    )
-                else:
-                    print(f"Error: 'content' not found in OpenAI response message: {message}")
-                    return AIOutput(
-                        prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
-                        raw_output_data={"error": "Content not found in response", "full_response": response_data}
-                    )
-            else:
-                print(f"Error: 'choices' not found or empty in OpenAI response: {response_data}")
+        embedding = None
+        if self.semantic_cache is not None and SemanticCache.applies_to(ai_profile.capabilities):
+            embedding = await self.semantic_cache.embed(prompt_version.prompt_text)
+            cached_output = await self.semantic_cache.get(model_name, embedding)
+            if cached_output is not None:
                 return AIOutput(
                     prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
-                    raw_output_data={"error": "Choices not found in response", "full_response": response_data}
+                    raw_output_data=cached_output
                 )
 
+        try:
+            logger.debug("Sending prompt to OpenAI model {} at {}", model_name, self.api_base)
+
+            async def post() -> httpx.Response:
+                response = await self.client.post("/chat/completions", json=payload)
+                response.raise_for_status()  # Raises HTTPStatusError for 4xx/5xx responses
+                return response
+
+            async def post_with_retries() -> httpx.Response:
+                return await retry_async(post, _is_retryable, retry_after=_retry_after_seconds)
+
+            if cache_key is not None:
+                response = await self._inflight.do(cache_key, post_with_retries)
+            else:
+                response = await post_with_retries()
+            
+            ai_output = self._completion_to_output(prompt_version, loads(response.content))
+            if "error" not in ai_output.raw_output_data:
+                if cache_key is not None:
+                    await self.cache.set(cache_key, ai_output.raw_output_data)
+                if embedding is not None:
+                    await self.semantic_cache.set(model_name, embedding, ai_output.raw_output_data)
+            return ai_output
+
         except httpx.HTTPStatusError as e:
-            print(f"HTTP error calling OpenAI API: {e.response.status_code} - {e.response.text}")
+            logger.error("HTTP error calling OpenAI API: {} - {}", e.response.status_code, e.response.text)
             error_content = {"error": f"HTTP {e.response.status_code}", "details": e.response.text}
             try: # Try to parse JSON error from OpenAI if possible
-                error_content["details_json"] = e.response.json()
+                error_content["details_json"] = loads(e.response.content)
             except Exception:
                 pass
             return AIOutput(prompt_version_id=prompt_version.id if prompt_version.id is not None else -1, raw_output_data=error_content)
         except httpx.RequestError as e:
-            print(f"Request error calling OpenAI API: {e}")
+            logger.error("Request error calling OpenAI API: {}", e)
             return AIOutput(prompt_version_id=prompt_version.id if prompt_version.id is not None else -1, raw_output_data={"error": "RequestError", "details": str(e)})
         except Exception as e:
-            print(f"An unexpected error occurred during OpenAI API call: {e}")
-            import traceback
-            traceback.print_exc() # For debugging unexpected issues
+            logger.exception("An unexpected error occurred during OpenAI API call: {}", e)
             return AIOutput(prompt_version_id=prompt_version.id if prompt_version.id is not None else -1, raw_output_data={"error": "UnexpectedError", "details": str(e)})
 
+    async def deploy_and_collect_stream(
+        self,
+        prompt_version: PromptVersion,
+        ai_profile: TargetAIProfile
+    ) -> AsyncIterator[Union[str, AIOutput]]:
+        """Streams a completion from the OpenAI API as it is generated.
+
+        Yields each text fragment as it arrives so consumers can start work before the
+        completion finishes, then yields a final AIOutput holding the assembled text
+        (or the error, if the request failed).
+
+        Args:
+            prompt_version: The PromptVersion object containing the prompt text.
+            ai_profile: The TargetAIProfile defining the model and its parameters.
+        """
+        prompt_version_id = prompt_version.id if prompt_version.id is not None else -1
+        payload = {**self._build_payload(prompt_version, ai_profile), "stream": True}
+        fragments: List[str] = []
+        try:
+            async with self.client.stream("POST", "/chat/completions", json=payload) as response:
+                if response.is_error:
+                    await response.aread()
+                    logger.error("HTTP error streaming from OpenAI API: {} - {}", response.status_code, response.text)
+                    yield AIOutput(
+                        prompt_version_id=prompt_version_id,
+                        raw_output_data={"error": f"HTTP {response.status_code}", "details": response.text}
+                    )
+                    return
+                async for line in response.aiter_lines():
+                    if not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    choices = loads(data).get("choices") or [{}]
+                    fragment = choices[0].get("delta", {}).get("content")
+                    if fragment:
+                        fragments.append(fragment)
+                        yield fragment
+        except httpx.RequestError as e:
+            logger.error("Request error streaming from OpenAI API: {}", e)
+            yield AIOutput(prompt_version_id=prompt_version_id, raw_output_data={"error": "RequestError", "details": str(e)})
+            return
+
+        yield AIOutput(prompt_version_id=prompt_version_id, raw_output_data={"text": "".join(fragments)})
+
+    @staticmethod
+    def _completion_to_output(prompt_version: PromptVersion, response_data: Dict[str, Any]) -> AIOutput:
+        """Converts a Chat Completions response body into an AIOutput, flagging malformed responses."""
+        # Extract the content from the first choice's message
+        # (OpenAI API can return multiple choices, we typically use the first)
+        if response_data.get("choices") and len(response_data["choices"]) > 0:
+            message = response_data["choices"][0].get("message")
+            if message and "content" in message:
+                # The AIOutput expects prompt_version_id, which will be set by the agent
+                # when this AIOutput object is persisted.
+                return AIOutput(
+                    prompt_version_id=prompt_version.id if prompt_version.id is not None else -1, # Placeholder if id not set yet
+                    raw_output_data={"text": message["content"]}
+                )
+            else:
+                logger.error("'content' not found in OpenAI response message: {}", message)
+                return AIOutput(
+                    prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
+                    raw_output_data={"error": "Content not found in response", "full_response": response_data}
+                )
+        else:
+            logger.error("'choices' not found or empty in OpenAI response: {}", response_data)
+            return AIOutput(
+                prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
+                raw_output_data={"error": "Choices not found in response", "full_response": response_data}
+            )
+
+    async def deploy_and_collect_batch_offline(
+        self,
+        prompts: List[PromptVersion],
+        ai_profile: TargetAIProfile,
+        poll_interval_s: float = 30.0,
+        completion_window: str = "24h"
+    ) -> List[AIOutput]:
+        """Runs prompts through the OpenAI Batch API and collects the outputs in order.
+
+        Batch jobs are billed at a discount but may take up to `completion_window`
+        to finish, so this suits large offline runs (sweeps, evaluation suites)
+        rather than interactive refinement.
+
+        Args:
+            prompts: The PromptVersion objects to deploy.
+            ai_profile: The TargetAIProfile defining the model and its parameters.
+            poll_interval_s: Seconds to wait between batch status checks.
+            completion_window: The turnaround window requested from OpenAI.
+
+        Returns:
+            One AIOutput per prompt, in the same order as `prompts`.
+
+        Raises:
+            APIResponseError: If the batch job does not complete.
+            httpx.HTTPError: If any of the Batch API requests fail.
+        """
+        # Positions, not PromptVersion ids, identify requests: ids may be unset or repeated.
+        batch_input = b"\n".join(
+            dumps_bytes({
+                "custom_id": f"pv_{position}",
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._build_payload(prompt_version, ai_profile),
+            })
+            for position, prompt_version in enumerate(prompts)
+        )
+
+        upload = await self.client.post(
+            "/files",
+            data={"purpose": "batch"},
+            files={"file": ("batch_input.jsonl", batch_input, "application/jsonl")}
+        )
+        upload.raise_for_status()
+        created = await self.client.post(
+            "/batches",
+            json={
+                "input_file_id": loads(upload.content)["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": completion_window,
+            }
+        )
+        created.raise_for_status()
+        batch = loads(created.content)
+
+        while batch.get("status") not in BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(poll_interval_s)
+            polled = await self.client.get(f"/batches/{batch['id']}")
+            polled.raise_for_status()
+            batch = loads(polled.content)
+        if batch["status"] != "completed" or not batch.get("output_file_id"):
+            raise APIResponseError(f"OpenAI batch {batch['id']} ended with status '{batch['status']}'")
+
+        content = await self.client.get(f"/files/{batch['output_file_id']}/content")
+        content.raise_for_status()
+        results_by_id = {}
+        for line in content.content.splitlines():
+            if line.strip():
+                result = loads(line)
+                results_by_id[result["custom_id"]] = result
+
+        outputs = []
+        for position, prompt_version in enumerate(prompts):
+            result = results_by_id.get(f"pv_{position}")
+            response = (result or {}).get("response") or {}
+            if response.get("status_code") == 200:
+                outputs.append(self._completion_to_output(prompt_version, response.get("body") or {}))
+            else:
+                outputs.append(AIOutput(
+                    prompt_version_id=prompt_version.id if prompt_version.id is not None else -1,
+                    raw_output_data={
+                        "error": "Batch request failed" if result else "Missing from batch output",
+                        "details": (result or {}).get("error") or response.get("body"),
+                    }
+                ))
+        return outputs
+
     async def close(self):
         """Closes the httpx client session."""
         await self.client.aclose()
@@ -0,0 +1,144 @@
+"""
+Embedding-similarity cache for paraphrased prompts.
+
+The exact `LLMCache` only matches byte-identical requests. `SemanticCache` sits
+behind it and answers a prompt from a previous response when the two prompts'
+embeddings are close enough (cosine similarity above a threshold). It is opt-in
+per profile via the `semantic_cache` capability and only used for low
+temperatures, where reusing a response is indistinguishable from a fresh call.
+"""
+import asyncio
+import math
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from mpla.utils.logging import logger
+
+try:
+    import numpy as np
+except ImportError:
+    np = None # numpy not installed, similarity search falls back to pure Python
+
+try:
+    import faiss
+except ImportError:
+    faiss = None # faiss not installed, similarity search falls back to a linear scan
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None # sentence-transformers not installed, an embedder must be supplied
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+DEFAULT_SIMILARITY_THRESHOLD = 0.92
+# Above this temperature responses vary enough that reusing one would be noticeable.
+MAX_SEMANTIC_CACHE_TEMPERATURE = 0.3
+# An exact flat index is fastest for small caches; switch to HNSW beyond this size.
+HNSW_MIN_ENTRIES = 50_000
+HNSW_NEIGHBORS = 32
+
+Embedder = Callable[[str], Sequence[float]]
+
+class _SimilarityIndex:
+    """Normalized embeddings of one model's cached prompts and their responses."""
+
+    def __init__(self):
+        self.responses: List[Dict[str, Any]] = []
+        self._vectors: List[Sequence[float]] = []
+        self._faiss_index = None
+
+    def search(self, query: Sequence[float]) -> tuple[float, int]:
+        """Returns the best (similarity, position) for `query`, or (-1.0, -1) if empty."""
+        if not self.responses:
+            return -1.0, -1
+        if self._faiss_index is not None:
+            scores, ids = self._faiss_index.search(np.asarray([query], dtype="float32"), 1)
+            return float(scores[0][0]), int(ids[0][0])
+        best_score, best_id = -1.0, -1
+        for position, vector in enumerate(self._vectors):
+            score = math.fsum(a * b for a, b in zip(query, vector))
+            if score > best_score:
+                best_score, best_id = score, position
+        return best_score, best_id
+
+    def add(self, vector: Sequence[float], response: Dict[str, Any]) -> None:
+        self.responses.append(response)
+        if faiss is None or np is None:
+            self._vectors.append(vector)
+            return
+        if self._faiss_index is None:
+            self._faiss_index = faiss.IndexFlatIP(len(vector))
+        elif len(self.responses) == HNSW_MIN_ENTRIES and isinstance(self._faiss_index, faiss.IndexFlatIP):
+            self._faiss_index = self._rebuild_as_hnsw(self._faiss_index)
+        self._faiss_index.add(np.asarray([vector], dtype="float32"))
+
+    @staticmethod
+    def _rebuild_as_hnsw(flat_index):
+        vectors = flat_index.reconstruct_n(0, flat_index.ntotal)
+        hnsw_index = faiss.IndexHNSWFlat(flat_index.d, HNSW_NEIGHBORS, faiss.METRIC_INNER_PRODUCT)
+        hnsw_index.add(vectors)
+        return hnsw_index
+
+class SemanticCache:
+    """
+    Reuses responses for prompts whose embeddings are nearly identical.
+
+    Entries are partitioned by model name so that one model's answer is never
+    served for another. Hit and miss counts are kept in `stats`.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL
+    ):
+        """
+        Args:
+            embedder: Maps a prompt to an embedding. Defaults to a local sentence-transformers model.
+            threshold: Minimum cosine similarity for a cached response to be reused.
+            embedding_model: The sentence-transformers model used when no embedder is given.
+
+        Raises:
+            ImportError: If no embedder is given and sentence-transformers is not installed.
+        """
+        if embedder is None:
+            if SentenceTransformer is None:
+                raise ImportError("SemanticCache requires 'sentence-transformers' unless an embedder is supplied.")
+            model = SentenceTransformer(embedding_model)
+            embedder = lambda text: model.encode(text, normalize_embeddings=True)
+        self._embedder = embedder
+        self.threshold = threshold
+        self._indexes: Dict[str, _SimilarityIndex] = {}
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def applies_to(capabilities: Optional[Dict[str, Any]]) -> bool:
+        """True if a profile opted in and runs at a low enough temperature to share responses."""
+        capabilities = capabilities or {}
+        temperature = capabilities.get("temperature")
+        return (
+            bool(capabilities.get("semantic_cache", False))
+            and temperature is not None
+            and float(temperature) <= MAX_SEMANTIC_CACHE_TEMPERATURE
+        )
+
+    async def embed(self, prompt: str) -> List[float]:
+        """Embeds `prompt` off the event loop and L2-normalizes the result."""
+        vector = [float(x) for x in await asyncio.to_thread(self._embedder, prompt)]
+        norm = math.sqrt(math.fsum(x * x for x in vector)) or 1.0
+        return [x / norm for x in vector]
+
+    async def get(self, model: str, embedding: Sequence[float]) -> Optional[Dict[str, Any]]:
+        """Returns the response cached for the most similar prompt, or None if none is close enough."""
+        index = self._indexes.get(model)
+        score, position = index.search(embedding) if index is not None else (-1.0, -1)
+        if position < 0 or score < self.threshold:
+            self.stats["misses"] += 1
+            return None
+        self.stats["hits"] += 1
+        logger.debug(f"Semantic cache hit for model '{model}' (similarity {score:.3f}).")
+        return dict(index.responses[position])
+
+    async def set(self, model: str, embedding: Sequence[float], response: Dict[str, Any]) -> None:
+        """Caches `response` for the prompt with the given embedding."""
+        self._indexes.setdefault(model, _SimilarityIndex()).add(embedding, dict(response))
@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import List, Optional, TypeVar, Type, Generic
+from typing import Any, AsyncContextManager, AsyncIterator, Dict, List, Optional, Sequence, TypeVar, Type, Generic
 
 from .schemas import BaseMPLAModel, OriginalPrompt, PromptVersion, EvaluationResult, IterationLog, TargetAIProfile, AIOutput
 
@@ -23,10 +24,26 @@ class KnowledgeBase(ABC):
         """Close connection to the database."""
         pass
 
+    @abstractmethod
+    def session(self) -> AsyncContextManager[Any]:
+        """Reserves a connection for exclusive use within an `async with` block.
+
+        Implementations backed by a connection pool hand out one pooled connection per
+        block and return it to the pool on exit, so concurrent tasks never interleave
+        statements or transactions on the same connection.
+
+        Returns:
+            AsyncContextManager[Any]: Yields the backend-specific connection.
+        """
+        pass
+
     @abstractmethod
     async def add(self, record: T) -> T:
         """Adds a new record to the database and returns the persisted record (e.g., with ID).
 
+        JSON-valued fields should be encoded exactly once per write; large
+        `full_response` blobs dominate the cost of persisting an `AIOutput`.
+
         Args:
             record (T): The Pydantic model instance to add.
 
@@ -35,6 +52,20 @@ class KnowledgeBase(ABC):
         """
         pass
 
+    async def add_many(self, records: Sequence[T]) -> List[T]:
+        """Adds several records and returns the persisted records in the same order.
+
+        Implementations should override this to insert the batch in a single
+        transaction; the default simply adds the records one at a time.
+
+        Args:
+            records (Sequence[T]): The Pydantic model instances to add.
+
+        Returns:
+            List[T]: The persisted Pydantic model instances.
+        """
+        return [await self.add(record) for record in records]
+
     @abstractmethod
     async def get(self, model: Type[T], record_id: int) -> Optional[T]:
         """Retrieves a record by its ID.
@@ -48,10 +79,32 @@ class KnowledgeBase(ABC):
         """
         pass
 
+    async def get_many(self, model: Type[T], record_ids: Sequence[int]) -> Dict[int, T]:
+        """Retrieves several records of one type by their IDs.
+
+        Implementations should override this to fetch all records in a single query;
+        the default issues the individual lookups concurrently.
+
+        Args:
+            model (Type[T]): The Pydantic model class of the records to retrieve.
+            record_ids (Sequence[int]): The IDs of the records.
+
+        Returns:
+            Dict[int, T]: The records found, keyed by ID. Missing IDs are omitted.
+        """
+        unique_ids = list(dict.fromkeys(record_ids))
+        records = await asyncio.gather(*(self.get(model, record_id) for record_id in unique_ids))
+        return {record_id: record for record_id, record in zip(unique_ids, records) if record is not None}
+
     @abstractmethod
     async def update(self, record_id: int, update_data: T) -> Optional[T]:
         """Updates an existing record.
 
+        Implementations should dump only the fields the caller set
+        (`model_dump(exclude_unset=True)`) rather than the whole model, so that
+        defaulted fields and untouched JSON payloads such as `raw_output_data`
+        are not re-serialized on every write.
+
         Args:
             record_id (int): The ID of the record to update.
             update_data (T): A Pydantic model instance containing the fields to update.
@@ -69,6 +122,22 @@ class KnowledgeBase(ABC):
         """Retrieves all prompt versions associated with an original prompt."""
         pass
 
+    async def get_prompt_versions_for_originals(self, original_prompt_ids: Sequence[int]) -> Dict[int, List[PromptVersion]]:
+        """Retrieves the prompt versions of several original prompts, keyed by original prompt ID."""
+        unique_ids = list(dict.fromkeys(original_prompt_ids))
+        versions = await asyncio.gather(*(self.get_prompt_versions_for_original(i) for i in unique_ids))
+        return dict(zip(unique_ids, versions))
+
+    async def iter_prompt_versions_for_original(
+        self, original_prompt_id: int, chunk_size: int = 500
+    ) -> AsyncIterator[PromptVersion]:
+        """Streams the prompt versions of an original prompt, holding at most `chunk_size` rows at once.
+
+        The default materializes the full list; implementations should override it with a cursor.
+        """
+        for prompt_version in await self.get_prompt_versions_for_original(original_prompt_id):
+            yield prompt_version
+
     @abstractmethod
     async def get_evaluations_for_prompt_version(self, prompt_version_id: int) -> List[EvaluationResult]:
         """Retrieves all evaluation results for a specific prompt version."""
@@ -89,6 +158,14 @@ class KnowledgeBase(ABC):
         """Retrieves all iterations for a given session ID."""
         pass
 
+    async def iter_iterations_for_session(self, session_id: str, chunk_size: int = 500) -> AsyncIterator[IterationLog]:
+        """Streams the iterations of a session, holding at most `chunk_size` rows at once.
+
+        The default materializes the full list; implementations should override it with a cursor.
+        """
+        for iteration_log in await self.get_iterations_for_session(session_id):
+            yield iteration_log
+
     # Add more specific query methods as needed, e.g., for LearnedStrategy, RefinementLog etc.
 
 # Example of a concrete implementation (e.g., for SQLite or PostgreSQL) would inherit from this.
@@ -0,0 +1,181 @@
+"""
+Async SQLAlchemy engine and session setup for the SQLModel schemas.
+
+`SQLiteKnowledgeBase` talks to SQLite directly through aiosqlite. This module is for
+code that works with the mapped models instead (reporting, bulk ingestion, Postgres
+deployments via asyncpg). Everything is async, so database writes overlap with
+in-flight LLM calls instead of blocking the event loop.
+
+Keep sync `Session`s on their own engine: an AsyncEngine must not be shared with
+synchronous code.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import Executable, event, insert
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import raiseload
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from .schemas import AIOutput, EvaluationResult, IterationLog, PromptVersion, TargetAIProfile
+
+# Connections kept open per engine for server databases (e.g. postgresql+asyncpg).
+DEFAULT_POOL_SIZE = 20
+# Rows folded into each multi-row INSERT ... VALUES (...), (...) RETURNING statement.
+INSERT_PAGE_SIZE = 1000
+
+StatementT = TypeVar("StatementT", bound=Executable)
+
+# Target AI profiles are few and rarely edited, so lookups are cached across sessions.
+PROFILE_CACHE_SIZE = 256
+PROFILE_CACHE_TTL_S = 300.0
+# Maps (database URL, profile id) to (time cached, detached profile), least recently used first.
+_profile_cache: "OrderedDict[Tuple[str, int], Tuple[float, TargetAIProfile]]" = OrderedDict()
+
+# Columns written by `copy_iteration_logs`; the rest are filled in by the database.
+ITERATION_LOG_COPY_COLUMNS = (
+    "original_prompt_id", "session_id", "iteration_number",
+    "active_prompt_version_id", "ai_output_id", "evaluation_result_id", "status",
+)
+
+def create_engine(url: str, pool_size: int = DEFAULT_POOL_SIZE, **kwargs) -> AsyncEngine:
+    """
+    Creates an AsyncEngine for `url` (e.g. "postgresql+asyncpg://..." or "sqlite+aiosqlite:///mpla.db").
+
+    Server databases get a queue pool of `pool_size` connections. SQLite keeps
+    SQLAlchemy's default pool, since its connections are local files. Batched inserts
+    (ORM flushes of many new objects and executemany-style `execute(insert(...), rows)`)
+    are sent as multi-row INSERTs of `INSERT_PAGE_SIZE` rows, one round trip per page.
+
+    SQLite connections run in WAL mode with synchronous=NORMAL, so a commit appends
+    to the log instead of forcing a full fsync of the database file.
+    """
+    if not url.startswith("sqlite"):
+        kwargs.setdefault("pool_size", pool_size)
+    kwargs.setdefault("insertmanyvalues_page_size", INSERT_PAGE_SIZE)
+    engine = create_async_engine(url, **kwargs)
+    if engine.dialect.name == "sqlite":
+        event.listen(engine.sync_engine, "connect", _configure_sqlite_connection)
+    return engine
+
+def _configure_sqlite_connection(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+def make_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    """
+    Returns a factory for sessions bound to `engine`.
+
+    Objects stay readable after commit (`expire_on_commit=False`), so callers don't
+    trigger a reload, which would need another await, just to read back what they wrote.
+    Typical use: `async with factory() as session, session.begin(): session.add_all(rows)`.
+    """
+    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+async def create_tables(engine: AsyncEngine) -> None:
+    """Creates the tables of all SQLModel schemas that don't exist yet."""
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+def read_only(statement: StatementT) -> StatementT:
+    """
+    Disables relationship loading for a reporting query.
+
+    No loaders run or are installed on the returned objects, including the
+    selectin loads configured on the models; touching an unloaded relationship raises
+    instead of issuing a query. Chain explicit loaders for what is needed, e.g.
+    `read_only(select(IterationLog)).options(selectinload(IterationLog.ai_output))`.
+    """
+    return statement.options(raiseload("*"))
+
+async def get_target_ai_profile(session: AsyncSession, profile_id: int) -> Optional[TargetAIProfile]:
+    """
+    Returns a target AI profile, served from an in-process cache for up to `PROFILE_CACHE_TTL_S`.
+
+    The returned profile is a detached copy shared between callers; treat it as read-only.
+    Call `invalidate_target_ai_profiles()` after editing profiles to see changes immediately.
+    """
+    key = (str(session.bind.url), profile_id)
+    entry = _profile_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < PROFILE_CACHE_TTL_S:
+        _profile_cache.move_to_end(key)
+        return entry[1]
+
+    profile = await session.get(TargetAIProfile, profile_id)
+    if profile is None:
+        _profile_cache.pop(key, None)
+        return None
+    detached = TargetAIProfile(**profile.model_dump())
+    _profile_cache[key] = (time.monotonic(), detached)
+    _profile_cache.move_to_end(key)
+    if len(_profile_cache) > PROFILE_CACHE_SIZE:
+        _profile_cache.popitem(last=False)
+    return detached
+
+def invalidate_target_ai_profiles() -> None:
+    """Drops all cached target AI profiles."""
+    _profile_cache.clear()
+
+async def persist_iteration(
+    session: AsyncSession,
+    prompt_version: PromptVersion,
+    ai_output: AIOutput,
+    evaluation_result: EvaluationResult,
+    iteration_log: IterationLog
+) -> IterationLog:
+    """
+    Saves the four records of one refinement iteration with a single commit.
+
+    The records are linked through their relationships, so one flush inserts them in
+    dependency order and fills in the foreign keys; the commit then costs one fsync
+    instead of one per record.
+    """
+    ai_output.prompt_version = prompt_version
+    evaluation_result.ai_output = ai_output
+    iteration_log.active_prompt_version = prompt_version
+    iteration_log.ai_output = ai_output
+    iteration_log.evaluation_result = evaluation_result
+    session.add(iteration_log)
+    await session.commit()
+    return iteration_log
+
+async def bulk_log_iterations(session: AsyncSession, rows: Sequence[Dict[str, Any]]) -> List[int]:
+    """
+    Inserts iteration log rows as multi-row INSERTs and returns their IDs in row order.
+
+    Leave `id`, `created_at` and `updated_at` out of the rows so the database fills them in.
+    The caller commits (e.g. by running this inside `session.begin()`). Because the IDs
+    must come back in row order, SQLite (which can't guarantee that for multi-row
+    RETURNING) gets one INSERT per row; Postgres gets one per page.
+    """
+    statement = insert(IterationLog).returning(IterationLog.id, sort_by_parameter_order=True)
+    return list((await session.exec(statement, params=rows)).scalars())
+
+async def copy_iteration_logs(session: AsyncSession, rows: Sequence[Dict[str, Any]]) -> int:
+    """
+    Ingests a large batch of iteration log rows as fast as the backend allows.
+
+    On Postgres (asyncpg) the rows are streamed with COPY, which skips per-statement
+    parsing and planning entirely; other databases fall back to `bulk_log_iterations`.
+    Rows omitting `status` get "pending". IDs are not returned. The caller commits.
+
+    Returns:
+        The number of rows written.
+    """
+    if session.bind.dialect.name != "postgresql":
+        return len(await bulk_log_iterations(session, rows))
+
+    records = [
+        tuple(row.get(column, "pending") if column == "status" else row[column] for column in ITERATION_LOG_COPY_COLUMNS)
+        for row in rows
+    ]
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    await raw_connection.driver_connection.copy_records_to_table(
+        IterationLog.__tablename__, records=records, columns=ITERATION_LOG_COPY_COLUMNS
+    )
+    return len(records)
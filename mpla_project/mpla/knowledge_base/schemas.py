@@ -1,17 +1,114 @@
-from typing import Optional, Dict, Any, List, Union
+import os
+from dataclasses import asdict, dataclass, is_dataclass
+from enum import Enum
+from typing import Optional, Dict, Any, List, Sequence, Union
 from datetime import datetime, timezone
-from sqlmodel import Field, SQLModel, Relationship, JSON, Column
-from pydantic import BaseModel
+from sqlmodel import Field, SQLModel, Session, Relationship, Column
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import DateTime, Enum as SAEnum, Index, SmallInteger, String, Uuid, func, insert, select
+from sqlalchemy.orm import configure_mappers, declared_attr, deferred
+from sqlalchemy.types import Text, TypeDecorator
+from pydantic import BaseModel, ConfigDict
+
+from mpla.utils.serialization import dumps, dumps_bytes, loads_packed
+
+# Re-validate model fields on every attribute assignment.
+STRICT_VALIDATION = bool(os.getenv("MPLA_STRICT"))
+# Rows per executemany in `BaseMPLAModel.bulk_create`.
+BULK_INSERT_CHUNK_SIZE = 5000
+
+class FastJSON(TypeDecorator):
+    """
+    A JSON column encoded with orjson (when installed) instead of the stdlib `json` module.
+
+    Values are stored as JSON text, which is how SQLite keeps JSON columns anyway. On
+    Postgres the column is JSONB instead, stored pre-parsed and indexable with GIN, and
+    encoding is left to the dialect (configure the engine's `json_serializer` to use orjson).
+    """
+    impl = Text
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(self.impl)
+
+    def process_bind_param(self, value: Any, dialect) -> Any:
+        if value is None or dialect.name == "postgresql":
+            return value
+        return dumps(value)
+
+    def process_result_value(self, value: Any, dialect) -> Any:
+        if value is None or dialect.name == "postgresql":
+            return value
+        # Also reads the compressed values SQLiteKnowledgeBase writes for large payloads.
+        return loads_packed(value)
 
 class BaseMPLAModel(SQLModel):
     """Base model for all MPLA data entities, providing common fields."""
     id: Optional[int] = Field(default=None, primary_key=True, description="Unique identifier, typically database-generated.")
-    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False, description="Timestamp of creation.")
-    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), nullable=False, sa_column_kwargs={"onupdate": datetime.now}, description="Timestamp of last update.")
+    # Records built in Python are stamped when created. The columns themselves have no
+    # Python-side default ("default": None) but a server default, so Core bulk inserts
+    # that leave the timestamps out neither build nor send a datetime per row.
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True), nullable=False, sa_column_kwargs={"default": None, "server_default": func.now()}, description="Timestamp of creation.")
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc), sa_type=DateTime(timezone=True), nullable=False, sa_column_kwargs={"default": None, "server_default": func.now(), "onupdate": func.now()}, description="Timestamp of last update.")
+
+    # Records mostly come back from the database already typed, so re-validating every
+    # attribute write is opt-in (set MPLA_STRICT=1 to catch bad assignments while debugging).
+    model_config = ConfigDict(from_attributes=True, validate_assignment=STRICT_VALIDATION)
+
+    def mark_clean(self) -> None:
+        """
+        Forgets which fields have been assigned, so that `model_dump(exclude_unset=True)`
+        afterwards yields only fields changed since. Knowledge bases call this on records
+        they load, which lets `update()` write back just the modified columns.
+        """
+        object.__setattr__(self, "__pydantic_fields_set__", set())
+
+    @classmethod
+    def from_trusted(cls, values: Dict[str, Any]) -> "BaseMPLAModel":
+        """
+        Builds a clean record (see `mark_clean`) of a table model from values read back
+        from the application's own database.
+
+        Table models skip validation anyway, but `__init__` still routes every field
+        through SQLAlchemy's attribute events. Like the ORM when it loads a row, this puts
+        the values straight into the instance dict, which is several times faster.
+        Unknown keys are ignored and missing fields take their defaults.
+        """
+        if not cls.__mapper__.configured:
+            configure_mappers()
+        record = cls._sa_class_manager.new_instance()
+        record.__dict__.update({
+            name: values[name] if name in values else field.get_default(call_default_factory=True)
+            for name, field in cls.model_fields.items()
+        })
+        object.__setattr__(record, "__pydantic_fields_set__", set())
+        object.__setattr__(record, "__pydantic_extra__", None)
+        object.__setattr__(record, "__pydantic_private__", None)
+        return record
+
+    def to_json_bytes(self, indent: bool = False) -> bytes:
+        """Serializes the record to JSON bytes with orjson (when installed) instead of `model_dump_json`."""
+        return dumps_bytes(self.model_dump(mode="json"), indent=indent, default=str)
+
+    @classmethod
+    def bulk_create(cls, session: Session, rows: Sequence[Dict[str, Any]], chunk_size: int = BULK_INSERT_CHUNK_SIZE) -> List[int]:
+        """
+        Inserts plain row dicts with Core INSERTs, skipping per-instance ORM bookkeeping.
 
-    class Config:
-        orm_mode = True # Allows easy mapping from SQLAlchemy models if used later
-        validate_assignment = True # Re-validate on attribute assignment
+        Each chunk is a single executemany (batched into multi-row VALUES where the driver
+        supports it). Leave `id`, `created_at` and `updated_at` out of the rows so the
+        database fills them in. The caller commits.
+
+        Returns:
+            The new primary keys, in the same order as `rows`.
+        """
+        statement = insert(cls).returning(cls.id, sort_by_parameter_order=True)
+        ids: List[int] = []
+        for start in range(0, len(rows), chunk_size):
+            ids.extend(session.scalars(statement, rows[start:start + chunk_size]))
+        return ids
 
 class MetaPrompt(BaseMPLAModel, table=True):
     """Stores meta-prompts used by the LLM-assisted enhancer."""
@@ -38,7 +135,7 @@ class TargetAIProfile(BaseMPLAModel, table=True):
     """Defines the profile of the target AI system for which a prompt is being optimized."""
     name: str = Field(index=True, description="Descriptive name of the AI system (e.g., 'GPT-4 Turbo').")
     api_endpoint: Optional[str] = Field(default=None, description="API endpoint for the AI system.")
-    capabilities: Dict[str, Any] = Field(sa_column=Column(JSON), default_factory=dict, description="List of known capabilities (e.g., 'text-generation').")
+    capabilities: Dict[str, Any] = Field(sa_column=Column(FastJSON), default_factory=dict, description="List of known capabilities (e.g., 'text-generation').")
     # Potentially add fields for API keys (managed securely), rate limits, specific model names/versions
 
     # Relationships
@@ -46,9 +143,12 @@ class TargetAIProfile(BaseMPLAModel, table=True):
 
 class PromptVersion(BaseMPLAModel, table=True):
     """Represents a specific version of a prompt during the refinement lifecycle."""
+    # Versions are listed per original prompt in version order.
+    __table_args__ = (Index("ix_pv_orig_ver", "original_prompt_id", "version_number"),)
+
     original_prompt_id: int = Field(foreign_key="originalprompt.id", description="Foreign key to the OriginalPrompt.")
     iteration_id: Optional[int] = Field(default=None, description="Foreign key to an IterationLog, linking it to a specific cycle.")
-    version_number: int = Field(..., description="Sequential version number of this prompt.")
+    version_number: int = Field(..., sa_type=SmallInteger, description="Sequential version number of this prompt.")
     prompt_text: str = Field(..., description="The actual text of this prompt version.")
     enhancement_rationale: Optional[str] = Field(default=None, description="Explanation of how this version was improved over the previous one.")
     target_ai_profile_id: Optional[int] = Field(default=None, description="Foreign key to the TargetAIProfile used for this version.")
@@ -60,13 +160,20 @@ class PromptVersion(BaseMPLAModel, table=True):
 class AIOutput(BaseMPLAModel, table=True):
     """Stores the output received from a target AI system for a given PromptVersion."""
     prompt_version_id: int = Field(foreign_key="promptversion.id", description="Foreign key to the PromptVersion that generated this output.")
-    raw_output_data: Union[str, Dict[str, Any], List[Any]] = Field(sa_column=Column(JSON), description="The raw output from the AI (text, JSON, etc.).")
+    raw_output_data: Union[str, Dict[str, Any], List[Any]] = Field(sa_column=Column(FastJSON), description="The raw output from the AI (text, JSON, etc.).")
     target_ai_profile_id: int = Field(foreign_key="targetaiprofile.id", description="Foreign key to the TargetAIProfile used for this output.")
     # error_message: Optional[str] = Field(default=None, description="Any error message if the AI call failed.")
 
     prompt_version: PromptVersion = Relationship(back_populates="ai_outputs")
     target_ai_profile: TargetAIProfile = Relationship(back_populates="ai_outputs")
-    evaluation_result: Optional["EvaluationResult"] = Relationship(back_populates="ai_output")
+    evaluation_result: Optional["EvaluationResult"] = Relationship(back_populates="ai_output", sa_relationship_kwargs={"lazy": "joined"})
+
+    @declared_attr
+    def __mapper_args__(cls) -> Dict[str, Any]:
+        # Outputs can be large and most queries (joins from IterationLog, ID lookups) never
+        # read them, so the column is loaded on first access. Queries that need it up front
+        # can add `undefer(AIOutput.raw_output_data)`.
+        return {"properties": {"raw_output_data": deferred(cls.__table__.c.raw_output_data)}}
 
 class PerformanceMetricDefinition(BaseMPLAModel):
     """Defines a type of metric used for evaluating AI outputs."""
@@ -78,8 +185,8 @@ class PerformanceMetricDefinition(BaseMPLAModel):
 class EvaluationResult(BaseMPLAModel, table=True):
     """Stores the evaluation results for a specific AIOutput."""
     ai_output_id: int = Field(foreign_key="aioutput.id")
-    metric_scores: Dict[str, Any] = Field(sa_column=Column(JSON))
-    target_metrics_snapshot: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    metric_scores: Dict[str, Any] = Field(sa_column=Column(FastJSON))
+    target_metrics_snapshot: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(FastJSON))
     qualitative_feedback: Optional[str] = Field(default=None)
     user_rating: Optional[int] = Field(default=None, ge=1, le=5)
     overall_score: Optional[float] = None
@@ -88,27 +195,79 @@ class EvaluationResult(BaseMPLAModel, table=True):
     ai_output: AIOutput = Relationship(back_populates="evaluation_result")
     iteration_logs: List["IterationLog"] = Relationship(back_populates="evaluation_result")
 
+class IterationStatus(str, Enum):
+    """Lifecycle states of an IterationLog. Stored by value, so plain status strings bind and read back too."""
+    pending = "pending"
+    evaluated = "evaluated"
+    completed = "completed"
+    failed = "failed"
+
 class IterationLog(BaseMPLAModel, table=True):
     """Logs a single iteration within a prompt refinement session."""
-    original_prompt_id: int = Field(foreign_key="originalprompt.id", description="Foreign key to the OriginalPrompt that started this session.")
-    session_id: str = Field(..., description="Unique identifier for the entire refinement session.")
-    iteration_number: int = Field(..., description="The sequence number of this iteration within the session.")
-    active_prompt_version_id: int = Field(foreign_key="promptversion.id", description="Foreign key to the PromptVersion used in this iteration.")
-    ai_output_id: int = Field(foreign_key="aioutput.id", description="Foreign key to the AIOutput from this iteration.")
-    evaluation_result_id: int = Field(foreign_key="evaluationresult.id", description="Foreign key to the EvaluationResult for this iteration.")
-    status: str = Field(default="pending", description="Current status of the iteration (e.g., 'pending', 'evaluated').")
-
-    original_prompt: OriginalPrompt = Relationship(back_populates="iteration_logs")
-    active_prompt_version: PromptVersion = Relationship(back_populates="iteration_logs")
-    ai_output: AIOutput = Relationship()
-    evaluation_result: EvaluationResult = Relationship(back_populates="iteration_logs")
+    # Iterations are listed per session in iteration order.
+    __table_args__ = (Index("ix_iterlog_session_iter", "session_id", "iteration_number", unique=True),)
+
+    original_prompt_id: int = Field(foreign_key="originalprompt.id", index=True, description="Foreign key to the OriginalPrompt that started this session.")
+    # Session IDs are dashed uuid4 strings. Postgres stores them natively as UUID (16 bytes) and
+    # returns them dashed; elsewhere they stay text, matching rows written with raw SQL.
+    session_id: str = Field(..., sa_type=String(36).with_variant(Uuid(as_uuid=False), "postgresql"), description="Unique identifier for the entire refinement session.")
+    iteration_number: int = Field(..., sa_type=SmallInteger, description="The sequence number of this iteration within the session.")
+    active_prompt_version_id: int = Field(foreign_key="promptversion.id", index=True, description="Foreign key to the PromptVersion used in this iteration.")
+    ai_output_id: int = Field(foreign_key="aioutput.id", index=True, description="Foreign key to the AIOutput from this iteration.")
+    evaluation_result_id: int = Field(foreign_key="evaluationresult.id", index=True, description="Foreign key to the EvaluationResult for this iteration.")
+    status: IterationStatus = Field(default=IterationStatus.pending, sa_type=SAEnum(IterationStatus, name="iteration_status", values_callable=lambda statuses: [status.value for status in statuses]), description="Current status of the iteration.")
+
+    # A session's log is always read with its related records, so load each relationship
+    # for all fetched logs in one extra `WHERE id IN (...)` query instead of one per log.
+    original_prompt: OriginalPrompt = Relationship(back_populates="iteration_logs", sa_relationship_kwargs={"lazy": "selectin"})
+    active_prompt_version: PromptVersion = Relationship(back_populates="iteration_logs", sa_relationship_kwargs={"lazy": "selectin"})
+    ai_output: AIOutput = Relationship(sa_relationship_kwargs={"lazy": "selectin"})
+    evaluation_result: EvaluationResult = Relationship(back_populates="iteration_logs", sa_relationship_kwargs={"lazy": "selectin"})
+
+@dataclass(slots=True)
+class IterationLogDTO:
+    """
+    A read-only, slotted copy of an IterationLog row for reporting.
+
+    Skips SQLModel entirely: no validation, no ORM instance state and no per-instance
+    `__dict__`, which adds up when replaying sessions with many iterations.
+    """
+    id: int
+    original_prompt_id: int
+    session_id: str
+    iteration_number: int
+    active_prompt_version_id: int
+    ai_output_id: int
+    evaluation_result_id: int
+    status: str
+    created_at: datetime
+    updated_at: datetime
+
+    @classmethod
+    def select_for_session(cls, session: Session, session_id: str) -> List["IterationLogDTO"]:
+        """Returns a session's iterations in order, read as plain row mappings."""
+        table = IterationLog.__table__
+        statement = select(table).where(table.c.session_id == session_id).order_by(table.c.iteration_number)
+        return [cls(**row) for row in session.execute(statement).mappings()]
+
+    def to_json_bytes(self) -> bytes:
+        """Serializes the row to JSON bytes. orjson encodes the dataclass directly, without an intermediate dict."""
+        return dumps_bytes(self, default=_dto_json_default)
+
+def _dto_json_default(obj: Any) -> Any:
+    # Only reached on the stdlib json fallback, which doesn't know dataclasses or datetimes.
+    if is_dataclass(obj):
+        return asdict(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
 
 # Add other schemas like RefinementLog, LearnedStrategy as needed based on the full plan.
 
 # Example usage (not part of the file, just for illustration)
 if __name__ == "__main__":
     original_prompt = OriginalPrompt(text="Describe quantum computing.", user_id="user123")
-    print(original_prompt.model_dump_json(indent=2))
+    print(original_prompt.to_json_bytes(indent=True).decode())
 
     prompt_v1 = PromptVersion(
         original_prompt_id=original_prompt.id, # Assuming ID is set after DB save
@@ -117,13 +276,11 @@ if __name__ == "__main__":
         prompt_text="Explain quantum computing in simple terms for a beginner.",
         enhancement_rationale="Added target audience and simplicity constraint."
     )
-    print(prompt_v1.model_dump_json(indent=2))
-
-# Resolve forward references after all models are defined
-AIOutput.model_rebuild()
-EvaluationResult.model_rebuild()
-IterationLog.model_rebuild()
-OriginalPrompt.model_rebuild()
-PromptVersion.model_rebuild()
-TargetAIProfile.model_rebuild()
-MetaPrompt.model_rebuild() 
\ No newline at end of file
+    print(prompt_v1.to_json_bytes(indent=True).decode())
+
+# Resolve forward references after all models are defined, referenced models first.
+# Only models Pydantic could not complete at class creation need a rebuild.
+_MODELS = (MetaPrompt, OriginalPrompt, TargetAIProfile, PromptVersion, AIOutput, EvaluationResult, IterationLog)
+for _model in _MODELS:
+    if not _model.__pydantic_complete__:
+        _model.model_rebuild()
@@ -1,7 +1,10 @@
-import json
+import contextlib
+import functools
+import pathlib
+import typing
 import aiosqlite
 from datetime import datetime, timezone
-from typing import List, Optional, TypeVar, Type, Dict, Any
+from typing import AsyncIterator, Callable, FrozenSet, List, NamedTuple, Optional, Sequence, TypeVar, Type, Dict, Any, Tuple
 import asyncio
 
 from .schemas import (
@@ -9,8 +12,211 @@ from .schemas import (
     IterationLog, TargetAIProfile, AIOutput, MetaPrompt
 )
 from .db_connector import KnowledgeBase, T # T is TypeVar('T', bound=BaseMPLAModel)
+from mpla.utils.serialization import dumps_packed, loads_packed
 
 DATABASE_SCHEMA_VERSION = 2 # Incremented due to new table
+# IN-list lookups are chunked to stay below SQLite's default limit of 999 bound parameters.
+MAX_IN_CLAUSE_PARAMS = 900
+# Results with at least this many rows are converted to models in a worker thread, so a
+# large read doesn't stall other tasks on the event loop.
+THREAD_OFFLOAD_MIN_ROWS = 128
+# Rows pulled from a cursor at a time when reading a whole result.
+FETCH_BATCH_SIZE = 256
+# Read-only connections opened next to the writers for file databases. In WAL mode they
+# read concurrently with each other and with an in-progress write.
+DEFAULT_READ_POOL_SIZE = 4
+# Most queued single-statement writes (add/update) committed together in one transaction.
+WRITE_BATCH_MAX_STATEMENTS = 500
+# Per-connection settings: keep temp tables and a 64 MB page cache in memory and read
+# through a 256 MB memory map. With WAL, synchronous=NORMAL syncs at checkpoints rather
+# than on every commit, and stays consistent after a crash.
+CONNECTION_PRAGMAS = """
+PRAGMA foreign_keys = ON;
+PRAGMA synchronous = NORMAL;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -64000;
+PRAGMA mmap_size = 268435456;
+"""
+# Model fields stored as JSON, keyed by model class name. Large values are written
+# zstd-compressed (a BLOB in the TEXT column) when zstandard is installed; see `dumps_packed`.
+JSON_FIELDS: Dict[str, Tuple[str, ...]] = {
+    'AIOutput': ('raw_output_data',),
+    'EvaluationResult': ('metric_scores', 'target_metrics_snapshot'),
+    'TargetAIProfile': ('capabilities',)
+}
+# Database table of each model class.
+TABLE_NAMES: Dict[Type[BaseMPLAModel], str] = {
+    MetaPrompt: "meta_prompts",
+    OriginalPrompt: "original_prompts",
+    PromptVersion: "prompt_versions",
+    TargetAIProfile: "target_ai_profiles",
+    AIOutput: "ai_outputs",
+    EvaluationResult: "evaluation_results",
+    IterationLog: "iteration_logs"
+}
+
+class _ModelMeta(NamedTuple):
+    """What row (de)serialization needs to know about a model class."""
+    table: str
+    json_fields: FrozenSet[str]
+    datetime_fields: FrozenSet[str]
+    bool_fields: FrozenSet[str]
+
+@functools.lru_cache(maxsize=None)
+def _model_meta(model_cls: Type[BaseMPLAModel]) -> _ModelMeta:
+    """Introspects a model class once; every row of that model reuses the result."""
+    datetime_fields = frozenset(
+        name for name, field in model_cls.model_fields.items()
+        if field.annotation is datetime or datetime in typing.get_args(field.annotation)
+    )
+    bool_fields = frozenset(
+        name for name, field in model_cls.model_fields.items()
+        if field.annotation is bool or bool in typing.get_args(field.annotation)
+    )
+    return _ModelMeta(
+        table=TABLE_NAMES.get(model_cls, model_cls.__name__.lower() + "s"),
+        json_fields=frozenset(JSON_FIELDS.get(model_cls.__name__, ())),
+        datetime_fields=datetime_fields,
+        bool_fields=bool_fields
+    )
+
+# Column values written for each model, looked up by exact record type.
+_SERIALIZERS: Dict[Type[BaseMPLAModel], Callable[[Any], Dict[str, Any]]] = {
+    MetaPrompt: lambda record: {"name": record.name, "template": record.template, "is_active": record.is_active},
+    OriginalPrompt: lambda record: {"text": record.text, "user_id": record.user_id},
+    PromptVersion: lambda record: {
+        "original_prompt_id": record.original_prompt_id,
+        "iteration_id": record.iteration_id,
+        "version_number": record.version_number,
+        "prompt_text": record.prompt_text,
+        "enhancement_rationale": record.enhancement_rationale,
+        "target_ai_profile_id": record.target_ai_profile_id
+    },
+    TargetAIProfile: lambda record: {
+        "name": record.name,
+        "api_endpoint": record.api_endpoint,
+        "capabilities_json": dumps_packed(record.capabilities or {}),
+    },
+    AIOutput: lambda record: {
+        "prompt_version_id": record.prompt_version_id,
+        "raw_output_data": dumps_packed(record.raw_output_data or {})
+    },
+    EvaluationResult: lambda record: {
+        "ai_output_id": record.ai_output_id,
+        "metric_scores": dumps_packed(record.metric_scores or {}),
+        "target_metrics_snapshot": dumps_packed(record.target_metrics_snapshot or {}),
+        "qualitative_feedback": record.qualitative_feedback,
+        "user_rating": record.user_rating,
+        "overall_score": record.overall_score
+    },
+    IterationLog: lambda record: {
+        "original_prompt_id": record.original_prompt_id,
+        "session_id": record.session_id,
+        "iteration_number": record.iteration_number,
+        "active_prompt_version_id": record.active_prompt_version_id,
+        "ai_output_id": record.ai_output_id,
+        "evaluation_result_id": record.evaluation_result_id,
+        "status": record.status
+    },
+}
+
+# SQL strings are built once per table and column set. Reusing the identical string also
+# lets sqlite3's per-connection statement cache skip re-parsing and re-planning it.
+@functools.lru_cache(maxsize=None)
+def _insert_sql(table_name: str, columns: Tuple[str, ...], returning: bool = False) -> str:
+    sql = f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    return f"{sql} RETURNING *" if returning else sql
+
+@functools.lru_cache(maxsize=None)
+def _update_sql(table_name: str, columns: Tuple[str, ...]) -> str:
+    return f"UPDATE {table_name} SET {', '.join(f'{column} = ?' for column in columns)} WHERE id = ?"
+
+# All tables, created in one transaction. foreign_keys is set per connection (CONNECTION_PRAGMAS),
+# since the PRAGMA has no effect inside a transaction.
+_SCHEMA_DDL = """
+BEGIN;
+CREATE TABLE IF NOT EXISTS meta_prompts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL UNIQUE,
+    template TEXT NOT NULL,
+    is_active BOOLEAN NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS original_prompts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    user_id TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS target_ai_profiles (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    api_endpoint TEXT,
+    capabilities_json TEXT, -- JSON list of strings
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS iteration_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    original_prompt_id INTEGER NOT NULL,
+    session_id TEXT NOT NULL,
+    iteration_number INTEGER NOT NULL,
+    active_prompt_version_id INTEGER, -- Nullable
+    ai_output_id INTEGER, -- Nullable
+    evaluation_result_id INTEGER, -- Nullable
+    status TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    FOREIGN KEY (original_prompt_id) REFERENCES original_prompts (id)
+    -- FKs to prompt_versions, ai_outputs, evaluation_results can be added if they always exist prior
+    -- For now, these are application-level links or updated post-creation.
+);
+CREATE TABLE IF NOT EXISTS prompt_versions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    original_prompt_id INTEGER,
+    iteration_id INTEGER, -- FK to iteration_logs
+    version_number INTEGER NOT NULL,
+    prompt_text TEXT NOT NULL,
+    enhancement_rationale TEXT,
+    target_ai_profile_id INTEGER,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    FOREIGN KEY (original_prompt_id) REFERENCES original_prompts (id),
+    FOREIGN KEY (iteration_id) REFERENCES iteration_logs (id) ON DELETE SET NULL, -- Or CASCADE
+    FOREIGN KEY (target_ai_profile_id) REFERENCES target_ai_profiles (id)
+);
+CREATE TABLE IF NOT EXISTS ai_outputs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    prompt_version_id INTEGER NOT NULL,
+    raw_output_data TEXT, -- JSON string
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    FOREIGN KEY (prompt_version_id) REFERENCES prompt_versions (id) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS evaluation_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ai_output_id INTEGER NOT NULL,
+    metric_scores TEXT, -- JSON dictionary
+    target_metrics_snapshot TEXT, -- JSON dictionary of the targets for this run
+    qualitative_feedback TEXT,
+    user_rating INTEGER,
+    overall_score REAL,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    FOREIGN KEY (ai_output_id) REFERENCES ai_outputs (id) ON DELETE CASCADE
+);
+-- Back the lookups by parent ID, session and prompt name, and their sort orders.
+CREATE INDEX IF NOT EXISTS idx_pv_original ON prompt_versions (original_prompt_id, version_number DESC);
+CREATE INDEX IF NOT EXISTS idx_il_session ON iteration_logs (session_id, iteration_number);
+CREATE INDEX IF NOT EXISTS idx_ao_prompt_version ON ai_outputs (prompt_version_id);
+CREATE INDEX IF NOT EXISTS idx_er_ai_output ON evaluation_results (ai_output_id);
+-- Prefix LIKE is case-insensitive, so only a NOCASE index can serve it. Not partial on
+-- is_active: the fallback in get_active_meta_prompt also reads inactive prompts.
+CREATE INDEX IF NOT EXISTS idx_mp_name_nocase ON meta_prompts (name COLLATE NOCASE);
+COMMIT;
+"""
 
 # This is a copy of the constant from the enhancer, used ONLY for seeding.
 # This avoids a potential circular import during database initialization.
@@ -112,192 +318,169 @@ class SQLiteKnowledgeBase(KnowledgeBase):
     
     Handles persistent storage and retrieval of MPLA operational data using aiosqlite.
     """
-    def __init__(self, db_path: str):
+    def __init__(self, db_path: str, pool_size: int = 1, read_pool_size: int = DEFAULT_READ_POOL_SIZE):
         """
         Initializes the SQLiteKnowledgeBase.
 
         Args:
             db_path (str): Path to the SQLite database file.
                            If ':memory:', an in-memory database is used.
+            pool_size (int): Number of connections handed out by `session()`. Each in-memory
+                             connection is a separate database, so ':memory:' always uses one.
+            read_pool_size (int): Number of read-only connections handed out by `read_session()`.
+                                  ':memory:' has none; reads there share the `session()` pool.
         """
         self.db_path = db_path
+        self.pool_size = 1 if db_path == ":memory:" else max(1, pool_size)
+        self.read_pool_size = 0 if db_path == ":memory:" else max(0, read_pool_size)
         self._conn: Optional[aiosqlite.Connection] = None
+        self._connections: List[aiosqlite.Connection] = []
+        self._pool: Optional[asyncio.Queue] = None
+        self._read_pool: Optional[asyncio.Queue] = None
+        self._write_queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def _open_connection(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Opens a connection configured the way every query in this class expects."""
+        if read_only:
+            conn = await aiosqlite.connect(f"{pathlib.Path(self.db_path).absolute().as_uri()}?mode=ro", uri=True)
+        else:
+            conn = await aiosqlite.connect(self.db_path)
+        conn.row_factory = aiosqlite.Row
+        await conn.executescript(CONNECTION_PRAGMAS)
+        return conn
 
     async def connect(self) -> None:
         """Establishes connection to the SQLite database and creates tables if they don't exist."""
-        if self._conn is None: 
+        # Concurrent first uses (e.g. gathered reads) all connect lazily; only one may set up.
+        async with self._connect_lock:
+            if self._conn is not None:
+                return
+            connections: List[aiosqlite.Connection] = []
             try:
-                self._conn = await aiosqlite.connect(self.db_path)
-                self._conn.row_factory = aiosqlite.Row 
-                await self._create_tables()
-                await self._seed_initial_data()
+                conn = await self._open_connection()
+                connections.append(conn)
+                if self.db_path != ":memory:":
+                    # Lets readers proceed while a write is in progress; persists in the database file.
+                    await conn.executescript("PRAGMA journal_mode = WAL;")
+                await self._create_tables(conn)
+                await self._seed_initial_data(conn)
+                for _ in range(self.pool_size - 1):
+                    connections.append(await self._open_connection())
+                read_connections = []
+                for _ in range(self.read_pool_size):
+                    read_connections.append(await self._open_connection(read_only=True))
+                    connections.append(read_connections[-1])
             except aiosqlite.Error as e:
                 print(f"Failed to connect to SQLite DB at {self.db_path}: {e}")
-                self._conn = None 
+                for opened in connections:
+                    await opened.close()
                 raise 
+            self._connections = connections
+            self._pool = asyncio.Queue()
+            for pooled in connections[:self.pool_size]:
+                self._pool.put_nowait(pooled)
+            if read_connections:
+                self._read_pool = asyncio.Queue()
+                for pooled in read_connections:
+                    self._read_pool.put_nowait(pooled)
+            self._write_queue = asyncio.Queue()
+            self._flusher = asyncio.create_task(self._flush_writes())
+            # Published last: other methods treat a set `_conn` as "pools and write queue are ready".
+            self._conn = conn
 
     async def disconnect(self) -> None:
-        """Closes the connection to the SQLite database."""
-        if self._conn:
-            try:
-                await self._conn.close()
-                # print(f"Disconnected from SQLite DB at {self.db_path}")
-            except aiosqlite.Error as e:
-                print(f"Error disconnecting from SQLite DB: {e}")
-            finally:
-                self._conn = None
+        """Closes all connections to the SQLite database."""
+        async with self._connect_lock:
+            if self._conn:
+                # Let the flusher commit whatever is still queued, then stop.
+                self._write_queue.put_nowait(None)
+                await self._flusher
+                try:
+                    # Refreshes query planner statistics for tables whose contents changed a lot.
+                    await self._conn.execute("PRAGMA optimize;")
+                    for conn in self._connections:
+                        await conn.close()
+                    # print(f"Disconnected from SQLite DB at {self.db_path}")
+                except aiosqlite.Error as e:
+                    print(f"Error disconnecting from SQLite DB: {e}")
+                finally:
+                    self._conn = None
+                    self._connections = []
+                    self._pool = None
+                    self._read_pool = None
+                    self._write_queue = None
+                    self._flusher = None
+
+    @contextlib.asynccontextmanager
+    async def session(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Reserves a pooled connection for the duration of the block.
+
+        Statements issued through it (including commits) cannot interleave with those of
+        other tasks. Don't call other methods of this class inside the block: with a
+        single-connection pool they would wait for the connection the block is holding.
+        """
+        if not self._conn: await self.connect()
+        pool = self._pool
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
+
+    @contextlib.asynccontextmanager
+    async def read_session(self) -> AsyncIterator[aiosqlite.Connection]:
+        """
+        Reserves a read-only pooled connection for SELECTs, leaving the `session()`
+        connections free for writes. Falls back to `session()` when there is no read pool.
+        """
+        if not self._conn: await self.connect()
+        pool = self._read_pool
+        if pool is None:
+            async with self.session() as conn:
+                yield conn
+            return
+        conn = await pool.get()
+        try:
+            yield conn
+        finally:
+            pool.put_nowait(conn)
 
     def _get_table_name(self, model_cls: Type[T]) -> str:
         """Maps a Pydantic model class to its corresponding database table name."""
-        schema_map = {
-            MetaPrompt: "meta_prompts",
-            OriginalPrompt: "original_prompts",
-            PromptVersion: "prompt_versions",
-            TargetAIProfile: "target_ai_profiles",
-            AIOutput: "ai_outputs",
-            EvaluationResult: "evaluation_results",
-            IterationLog: "iteration_logs"
-        }
-        return schema_map.get(model_cls, model_cls.__name__.lower() + "s")
-
-    async def _create_tables(self) -> None:
-        """Creates database tables if they do not already exist."""
-        if not self._conn: 
-            # This should ideally not happen if connect() is called first and handles its errors.
-            # However, as a safeguard:
-            # print("Warning: _create_tables called without an active connection. Attempting to connect.")
-            await self.connect()
-            if not self._conn: # Still no connection after attempt
-                raise ConnectionError("Cannot create tables: Database connection not established.")
-
-        async with self._conn.cursor() as cursor:
-            await cursor.execute("PRAGMA foreign_keys = ON;")
-
-            await cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS meta_prompts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL UNIQUE,
-                    template TEXT NOT NULL,
-                    is_active BOOLEAN NOT NULL DEFAULT 0,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-                """
-            )
-            await cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS original_prompts (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    text TEXT NOT NULL,
-                    user_id TEXT,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-                """
-            )
-            await cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS target_ai_profiles (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT NOT NULL,
-                    api_endpoint TEXT,
-                    capabilities_json TEXT, -- JSON list of strings
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL
-                )
-                """
-            )
-            await cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS iteration_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    original_prompt_id INTEGER NOT NULL,
-                    session_id TEXT NOT NULL,
-                    iteration_number INTEGER NOT NULL,
-                    active_prompt_version_id INTEGER, -- Nullable
-                    ai_output_id INTEGER, -- Nullable
-                    evaluation_result_id INTEGER, -- Nullable
-                    status TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    FOREIGN KEY (original_prompt_id) REFERENCES original_prompts (id)
-                    -- FKs to prompt_versions, ai_outputs, evaluation_results can be added if they always exist prior
-                    -- For now, these are application-level links or updated post-creation.
-                )
-                """
-            )
-            await cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS prompt_versions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    original_prompt_id INTEGER,
-                    iteration_id INTEGER, -- FK to iteration_logs
-                    version_number INTEGER NOT NULL,
-                    prompt_text TEXT NOT NULL,
-                    enhancement_rationale TEXT,
-                    target_ai_profile_id INTEGER,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    FOREIGN KEY (original_prompt_id) REFERENCES original_prompts (id),
-                    FOREIGN KEY (iteration_id) REFERENCES iteration_logs (id) ON DELETE SET NULL, -- Or CASCADE
-                    FOREIGN KEY (target_ai_profile_id) REFERENCES target_ai_profiles (id)
-                )
-                """
-            )
-            await cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS ai_outputs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    prompt_version_id INTEGER NOT NULL,
-                    raw_output_data TEXT, -- JSON string
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    FOREIGN KEY (prompt_version_id) REFERENCES prompt_versions (id) ON DELETE CASCADE
-                )
-                """
-            )
-            await cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS evaluation_results (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    ai_output_id INTEGER NOT NULL,
-                    metric_scores TEXT, -- JSON dictionary
-                    target_metrics_snapshot TEXT, -- JSON dictionary of the targets for this run
-                    qualitative_feedback TEXT,
-                    user_rating INTEGER,
-                    overall_score REAL,
-                    created_at TEXT NOT NULL,
-                    updated_at TEXT NOT NULL,
-                    FOREIGN KEY (ai_output_id) REFERENCES ai_outputs (id) ON DELETE CASCADE
-                )
-                """
-            )
-            await self._conn.commit()
+        return _model_meta(model_cls).table
+
+    async def _create_tables(self, conn: aiosqlite.Connection) -> None:
+        """Creates database tables on `conn` if they do not already exist."""
+        await conn.executescript(_SCHEMA_DDL)
 
-    async def _seed_prompt_if_not_exists(self, cursor, name: str, template: str, is_active: bool = True):
+    async def _seed_prompt_if_not_exists(self, conn: aiosqlite.Connection, name: str, template: str, is_active: bool = True):
         """Helper to seed a single meta-prompt if it doesn't exist by name."""
-        await cursor.execute("SELECT id FROM meta_prompts WHERE name = ?", (name,))
-        exists = await cursor.fetchone()
-        if not exists:
+        # A single statement in the common, already-seeded case: the insert is skipped on the name conflict.
+        now = datetime.now(timezone.utc).isoformat()
+        insert_sql = (
+            "INSERT INTO meta_prompts (name, template, is_active, created_at, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(name) DO NOTHING"
+        )
+        async with conn.execute(insert_sql, (name, template, is_active, now, now)) as cursor:
+            inserted = cursor.rowcount == 1
+        if inserted:
             print(f"Seeding '{name}' meta-prompt into the database.")
             # If this prompt is meant to be active, deactivate others of the same base name.
             if is_active:
                 base_name = name.split('_v')[0]
-                await cursor.execute("UPDATE meta_prompts SET is_active = 0 WHERE name LIKE ?", (f"{base_name}%",))
-
-            now = datetime.now(timezone.utc).isoformat()
-            insert_sql = "INSERT INTO meta_prompts (name, template, is_active, created_at, updated_at) VALUES (?, ?, ?, ?, ?)"
-            await cursor.execute(insert_sql, (name, template, is_active, now, now))
+                await conn.execute("UPDATE meta_prompts SET is_active = 0 WHERE name LIKE ? AND name != ?", (f"{base_name}%", name))
             print(f"Successfully seeded and activated '{name}'.")
 
-    async def _seed_initial_data(self):
-        """Seeds the database with all necessary initial meta-prompts."""
-        async with self._conn.cursor() as cursor:
-            await self._seed_prompt_if_not_exists(cursor, "architect_v1", _INITIAL_ARCHITECT_META_PROMPT, is_active=True)
-            await self._seed_prompt_if_not_exists(cursor, "analyzer_v1", _ANALYSIS_META_PROMPT, is_active=True)
-            await self._seed_prompt_if_not_exists(cursor, "reviser_v1", _REVISION_META_PROMPT, is_active=True)
-        await self._conn.commit()
+    async def _seed_initial_data(self, conn: aiosqlite.Connection):
+        """Seeds the database with all necessary initial meta-prompts, in one transaction."""
+        await conn.execute("BEGIN")
+        await self._seed_prompt_if_not_exists(conn, "architect_v1", _INITIAL_ARCHITECT_META_PROMPT, is_active=True)
+        await self._seed_prompt_if_not_exists(conn, "analyzer_v1", _ANALYSIS_META_PROMPT, is_active=True)
+        await self._seed_prompt_if_not_exists(conn, "reviser_v1", _REVISION_META_PROMPT, is_active=True)
+        await conn.commit()
 
     async def _seed_initial_metaprompt(self):
         """
@@ -313,10 +496,24 @@ class SQLiteKnowledgeBase(KnowledgeBase):
                 data[key] = value.isoformat()
         return data
 
+    def _row_to_data(self, row: aiosqlite.Row, model_cls: Type[T]) -> Dict[str, Any]:
+        """
+        Builds model keyword arguments from a row. Columns are copied straight from the row's
+        values (cheaper than `dict(row)`, which looks each one up by name); only the model's
+        JSON, datetime and boolean columns are decoded.
+        """
+        data = dict(zip(row.keys(), row))
+        data = self._handle_json_deserialization(data, model_cls)
+        for field_name in _model_meta(model_cls).bool_fields:
+            # SQLite stores booleans as 0/1; trusted construction would keep the ints.
+            if data.get(field_name) is not None:
+                data[field_name] = bool(data[field_name])
+        return self._deserialize_timestamps(data, model_cls)
+
     def _deserialize_timestamps(self, data: Dict[str, Any], model_cls: Type[T]) -> Dict[str, Any]:
         """Converts ISO 8601 strings back to datetime objects for datetime fields."""
-        for field_name, field_type in model_cls.model_fields.items():
-            if field_type.annotation == datetime and field_name in data and isinstance(data[field_name], str):
+        for field_name in _model_meta(model_cls).datetime_fields:
+            if field_name in data and isinstance(data[field_name], str):
                 try:
                     data[field_name] = datetime.fromisoformat(data[field_name])
                 except ValueError:
@@ -326,138 +523,154 @@ class SQLiteKnowledgeBase(KnowledgeBase):
 
     def _handle_json_deserialization(self, data: Dict[str, Any], model_cls: Type[T]):
         """Deserializes fields stored as JSON strings."""
-        json_fields = {
-            'AIOutput': ['raw_output_data'],
-            'EvaluationResult': ['metric_scores', 'target_metrics_snapshot'],
-            'TargetAIProfile': ['capabilities']
-        }
-        
-        model_name = model_cls.__name__
-        if model_name in json_fields:
-            for field_name in json_fields[model_name]:
-                if field_name in data and isinstance(data[field_name], str):
-                    try:
-                        data[field_name] = json.loads(data[field_name])
-                    except json.JSONDecodeError:
-                        print(f"Warning: Could not JSON decode field '{field_name}' for {model_cls.__name__}.")
+        for field_name in _model_meta(model_cls).json_fields:
+            if field_name in data and isinstance(data[field_name], (str, bytes)):
+                try:
+                    data[field_name] = loads_packed(data[field_name])
+                except ValueError: # Raised by both orjson and json on malformed input
+                    print(f"Warning: Could not JSON decode field '{field_name}' for {model_cls.__name__}.")
         return data
 
-    def _serialize_for_db(self, record: BaseMPLAModel) -> Dict[str, Any]:
+    def _serialize_for_db(self, record: BaseMPLAModel) -> Tuple[str, Dict[str, Any]]:
         """Prepares a Pydantic model instance for database insertion/update."""
-        if isinstance(record, MetaPrompt):
-            table_name = "meta_prompts"
-            data_dict = {"name": record.name, "template": record.template, "is_active": record.is_active}
-        elif isinstance(record, OriginalPrompt):
-            table_name = "original_prompts"
-            data_dict = {"text": record.text, "user_id": record.user_id}
-        elif isinstance(record, PromptVersion):
-            table_name = "prompt_versions"
-            data_dict = {
-                "original_prompt_id": record.original_prompt_id,
-                "iteration_id": record.iteration_id,
-                "version_number": record.version_number,
-                "prompt_text": record.prompt_text,
-                "enhancement_rationale": record.enhancement_rationale,
-                "target_ai_profile_id": record.target_ai_profile_id
-            }
-        elif isinstance(record, TargetAIProfile):
-            table_name = "target_ai_profiles"
-            data_dict = {
-                "name": record.name,
-                "api_endpoint": record.api_endpoint,
-                "capabilities_json": json.dumps(record.capabilities or {}),
-            }
-        elif isinstance(record, AIOutput):
-            table_name = "ai_outputs"
-            data_dict = {
-                "prompt_version_id": record.prompt_version_id, 
-                "raw_output_data": json.dumps(record.raw_output_data or {})
-            }
-        elif isinstance(record, EvaluationResult):
-            table_name = "evaluation_results"
-            data_dict = {
-                "ai_output_id": record.ai_output_id,
-                "metric_scores": json.dumps(record.metric_scores or {}),
-                "target_metrics_snapshot": json.dumps(record.target_metrics_snapshot or {}),
-                "qualitative_feedback": record.qualitative_feedback,
-                "user_rating": record.user_rating,
-                "overall_score": record.overall_score
-            }
-        elif isinstance(record, IterationLog):
-            table_name = "iteration_logs"
-            data_dict = {
-                "original_prompt_id": record.original_prompt_id,
-                "session_id": record.session_id,
-                "iteration_number": record.iteration_number,
-                "active_prompt_version_id": record.active_prompt_version_id,
-                "ai_output_id": record.ai_output_id,
-                "evaluation_result_id": record.evaluation_result_id,
-                "status": record.status
-            }
-        else:
+        serializer = _SERIALIZERS.get(type(record))
+        if serializer is None:
             raise ValueError(f"Unsupported model type: {type(record).__name__}")
-        
-        return table_name, data_dict
-
-    async def add(self, record: T) -> T:
-        """Adds a new record to the database and returns the complete record with its ID."""
-        if not self._conn:
-            raise ConnectionError("Database not connected")
+        return TABLE_NAMES[type(record)], serializer(record)
 
+    def _build_insert(self, record: BaseMPLAModel, now: str, returning: bool = False) -> Tuple[str, tuple]:
+        """Builds the INSERT statement (optionally `RETURNING *`) and parameters for a record, stamped with `now`."""
         table_name, data_to_insert = self._serialize_for_db(record)
         
         # Add timestamps
-        now = datetime.now(timezone.utc).isoformat()
         data_to_insert['created_at'] = now
         data_to_insert['updated_at'] = now
 
-        columns = ', '.join(data_to_insert.keys())
-        placeholders = ', '.join('?' for _ in data_to_insert)
-        
-        sql = f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})"
+        return _insert_sql(table_name, tuple(data_to_insert), returning), tuple(data_to_insert.values())
+
+    async def add(self, record: T) -> T:
+        """
+        Adds a new record to the database and returns the complete record with its ID.
+
+        The stored row comes back through `RETURNING *` (SQLite 3.35+) in the same round
+        trip as the insert, rather than being read back with a separate `get()`. The insert
+        shares a commit with other concurrent writes; see `_write`.
+        """
+        if not self._conn:
+            raise ConnectionError("Database not connected")
+
+        sql, params = self._build_insert(record, datetime.now(timezone.utc).isoformat(), returning=True)
         
-        async with self._conn.cursor() as cursor:
-            await cursor.execute(sql, tuple(data_to_insert.values()))
-            await self._conn.commit()
-            record_id = cursor.lastrowid
+        row, _ = await self._write(sql, params)
         
         # Return a new object with the ID and other db-defaults set.
         # This is simpler than trying to mutate the original record.
-        return await self.get(type(record), record_id)
+        return self._build_record(row, type(record))
+
+    async def add_many(self, records: Sequence[T]) -> List[T]:
+        """
+        Adds several records in a single transaction and returns them with their IDs.
+
+        Records are grouped by table and each group is written with one `executemany`, so
+        the batch costs one commit and one round trip per table. The persisted rows are
+        read back with one query per table rather than one per record.
+        """
+        if not self._conn:
+            raise ConnectionError("Database not connected")
+        if not records:
+            return []
+
+        now = datetime.now(timezone.utc).isoformat()
+        # Keyed by INSERT statement, i.e. by table: the positions in `records` and their parameters.
+        groups: Dict[str, Tuple[List[int], List[tuple]]] = {}
+        for position, record in enumerate(records):
+            sql, params = self._build_insert(record, now)
+            positions, rows = groups.setdefault(sql, ([], []))
+            positions.append(position)
+            rows.append(params)
+
+        record_ids: List[Optional[int]] = [None] * len(records)
+        async with self.session() as conn:
+            try:
+                # Takes the write lock up front: with no other writer, AUTOINCREMENT hands out
+                # consecutive IDs, ending at the last inserted row ID.
+                await conn.execute("BEGIN IMMEDIATE")
+                for sql, (positions, rows) in groups.items():
+                    await conn.executemany(sql, rows)
+                    async with conn.execute("SELECT last_insert_rowid()") as cursor:
+                        last_id = (await cursor.fetchone())[0]
+                    for offset, position in enumerate(positions):
+                        record_ids[position] = last_id - len(positions) + 1 + offset
+                await conn.commit()
+            except aiosqlite.Error:
+                await conn.rollback()
+                raise
+
+        ids_by_model: Dict[Type[BaseMPLAModel], List[int]] = {}
+        for record, record_id in zip(records, record_ids):
+            ids_by_model.setdefault(type(record), []).append(record_id)
+        persisted: Dict[Tuple[Type[BaseMPLAModel], int], BaseMPLAModel] = {}
+        for model_cls, ids in ids_by_model.items():
+            for record_id, persisted_record in (await self.get_many(model_cls, ids)).items():
+                persisted[(model_cls, record_id)] = persisted_record
+        return [persisted.get((type(record), record_id)) for record, record_id in zip(records, record_ids)]
+
+    async def get_many(self, model_cls: Type[T], record_ids: Sequence[int]) -> Dict[int, T]:
+        """Retrieves several records by ID with one IN query per chunk of IDs, keyed by ID."""
+        table_name = self._get_table_name(model_cls)
+        results: Dict[int, T] = {}
+        unique_ids = list(dict.fromkeys(record_ids))
+        for start in range(0, len(unique_ids), MAX_IN_CLAUSE_PARAMS):
+            chunk = unique_ids[start:start + MAX_IN_CLAUSE_PARAMS]
+            sql = f"SELECT * FROM {table_name} WHERE id IN ({', '.join('?' for _ in chunk)})"
+            async with self.read_session() as conn:
+                async with conn.execute(sql, tuple(chunk)) as cursor:
+                    rows = await cursor.fetchall()
+            for row in rows:
+                result = self._build_record(row, model_cls)
+                if result is not None:
+                    results[result.id] = result
+        return results
 
     async def get(self, model_cls: Type[T], record_id: int) -> Optional[T]:
         """Retrieves a single record by its ID."""
-        if not self._conn: await self.connect()
         table_name = self._get_table_name(model_cls)
         sql = f"SELECT * FROM {table_name} WHERE id = ?"
 
-        async with self._conn.execute(sql, (record_id,)) as cursor:
-            row = await cursor.fetchone()
+        async with self.read_session() as conn:
+            async with conn.execute(sql, (record_id,)) as cursor:
+                row = await cursor.fetchone()
 
-        if row:
-            data = dict(row)
-            data = self._handle_json_deserialization(data, model_cls)
-            data = self._deserialize_timestamps(data, model_cls)
-            try:
-                return model_cls(**data)
-            except Exception as e: # Catch Pydantic validation errors or other issues
-                print(f"Error constructing model {model_cls.__name__} from DB data: {e}, Data: {data}")
-                return None
-        return None
+        return self._build_record(row, model_cls) if row else None
+
+    def _build_record(self, row: aiosqlite.Row, model_cls: Type[T]) -> Optional[T]:
+        """Builds a fully deserialized model instance from a row, or None if the data is invalid."""
+        data = self._row_to_data(row, model_cls)
+        try:
+            record = model_cls(**data)
+        except Exception as e: # Catch Pydantic validation errors or other issues
+            print(f"Error constructing model {model_cls.__name__} from DB data: {e}, Data: {data}")
+            return None
+        record.mark_clean()
+        return record
 
     async def update(self, record_id: int, update_data: T) -> Optional[T]:
         """Updates a record in the database."""
-        if not self._conn: await self.connect()
         model_cls = type(update_data)
         table_name = self._get_table_name(model_cls)
 
         update_data.updated_at = datetime.now(timezone.utc)
         
-        data_to_update = update_data.model_dump(exclude_none=True, exclude={'id', 'created_at'})
+        # Only fields the caller actually set are dumped, so defaulted fields (and large
+        # JSON payloads that weren't touched) are neither serialized nor rewritten. Records
+        # read from this knowledge base start clean, so for them that means changed fields.
+        data_to_update = update_data.model_dump(exclude_unset=True, exclude_none=True, exclude={'id', 'created_at'})
         if not data_to_update: # Only updated_at might change
             data_to_update['updated_at'] = update_data.updated_at
         
-        data_to_update = self._handle_json_deserialization(data_to_update, model_cls)
+        for field_name in _model_meta(model_cls).json_fields:
+            if field_name in data_to_update:
+                data_to_update[field_name] = dumps_packed(data_to_update[field_name])
         data_to_update = self._serialize_timestamps(data_to_update)
 
         if not data_to_update:
@@ -467,39 +680,152 @@ class SQLiteKnowledgeBase(KnowledgeBase):
             else:
                 return await self.get(model_cls, record_id)
 
-        set_clause = ", ".join([f"{key} = ?" for key in data_to_update.keys()])
-        sql = f"UPDATE {table_name} SET {set_clause} WHERE id = ?"
+        sql = _update_sql(table_name, tuple(data_to_update))
         values = list(data_to_update.values()) + [record_id]
 
         try:
-            async with self._conn.cursor() as cursor:
-                await cursor.execute(sql, values)
-                await self._conn.commit()
-            if cursor.rowcount > 0:
+            _, updated_rows = await self._write(sql, values)
+            if updated_rows > 0:
                 return await self.get(model_cls, record_id)
             return None # Record with ID not found
         except aiosqlite.Error as e:
             print(f"SQLite error during update to {table_name} (ID: {record_id}): {e}")
             raise
 
-    async def _execute_query_and_fetch_all(self, model_cls: Type[T], sql: str, params: tuple = ()) -> List[T]:
-        """A generic method to execute a SELECT query and return a list of model instances."""
+    async def _write(self, sql: str, params: Sequence[Any]) -> Tuple[Optional[aiosqlite.Row], int]:
+        """
+        Queues a single-statement write and waits until it has been committed.
+
+        Writes queued while a batch is being committed go out together in the next
+        transaction, so concurrent callers share one commit (and fsync) instead of paying
+        for one each; a lone write is committed right away. Use `session()` directly for
+        writes that need their own transaction.
+
+        Returns:
+            The first row returned by the statement (for `RETURNING`), if any, and its rowcount.
+        """
         if not self._conn: await self.connect()
-        async with self._conn.execute(sql, params) as cursor:
-            rows = await cursor.fetchall()
-        
-        # Concurrently process all rows
+        future = asyncio.get_running_loop().create_future()
+        self._write_queue.put_nowait((sql, params, future))
+        return await future
+
+    async def _flush_writes(self) -> None:
+        """Background task draining the `_write` queue batch by batch until it reads None."""
+        queue = self._write_queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < WRITE_BATCH_MAX_STATEMENTS and not queue.empty():
+                batch.append(queue.get_nowait())
+            writes = [item for item in batch if item is not None]
+            if writes:
+                try:
+                    await self._commit_write_batch(writes)
+                except Exception as e: # Keep the flusher alive; the waiting callers get the error
+                    for _, _, future in writes:
+                        if not future.done():
+                            future.set_exception(e)
+            if len(writes) < len(batch):
+                return
+
+    async def _commit_write_batch(self, writes: List[Tuple[str, Sequence[Any], asyncio.Future]]) -> None:
         results = []
-        for row in rows:
-            results.append(await self._db_row_to_model(row, model_cls))
+        async with self.session() as conn:
+            try:
+                await conn.execute("BEGIN")
+                for sql, params, future in writes:
+                    try:
+                        async with conn.execute(sql, params) as cursor:
+                            results.append((future, (await cursor.fetchone(), cursor.rowcount)))
+                    except aiosqlite.Error as e:
+                        # SQLite undoes just the failed statement; the rest of the batch still commits.
+                        if not future.done():
+                            future.set_exception(e)
+                await conn.commit()
+            except aiosqlite.Error:
+                await conn.rollback()
+                raise
+        for future, result in results:
+            if not future.done():
+                future.set_result(result)
+
+    async def _execute_query_and_fetch_all(self, model_cls: Type[T], sql: str, params: tuple = ()) -> List[T]:
+        """
+        A generic method to execute a SELECT query and return a list of model instances.
+
+        Rows are fetched `FETCH_BATCH_SIZE` at a time and converted batch by batch, so the
+        raw rows of a large result are never held in memory alongside all of its models.
+        """
+        results: List[T] = []
+        async with self.read_session() as conn:
+            async with conn.execute(sql, params) as cursor:
+                while rows := await cursor.fetchmany(FETCH_BATCH_SIZE):
+                    results.extend(await self._rows_to_models(rows, model_cls))
         return results
 
+    async def _rows_to_models(self, rows: Sequence[aiosqlite.Row], model_cls: Type[T]) -> List[T]:
+        # Row conversion is pure CPU work, so it runs inline rather than as awaited coroutines.
+        if len(rows) >= THREAD_OFFLOAD_MIN_ROWS:
+            return await asyncio.to_thread(lambda: [self._db_row_to_model(row, model_cls) for row in rows])
+        return [self._db_row_to_model(row, model_cls) for row in rows]
+
+    async def _iter_query(
+        self, model_cls: Type[T], where: str, params: tuple, order_column: str, chunk_size: int
+    ) -> AsyncIterator[T]:
+        """
+        Yields the rows of `model_cls`'s table matching `where`, ordered by `order_column`
+        (then ID), fetching `chunk_size` rows at a time.
+
+        Pages are keyed on the last row read (`(order_column, id) > (?, ?)`) rather than an
+        OFFSET, so each page starts with an index seek instead of rescanning earlier rows,
+        and rows written between pages are neither skipped nor repeated. Each page is read
+        under its own short session, so callers may use the knowledge base between
+        iterations without waiting on a connection held by this generator.
+        """
+        table_name = self._get_table_name(model_cls)
+        select = f"SELECT * FROM {table_name} WHERE {where}"
+        order = f" ORDER BY {order_column}, id LIMIT ?"
+        sql, page_params = select + order, (*params, chunk_size)
+        while True:
+            async with self.read_session() as conn:
+                async with conn.execute(sql, page_params) as cursor:
+                    rows = await cursor.fetchall()
+            for row in rows:
+                yield self._db_row_to_model(row, model_cls)
+            if len(rows) < chunk_size:
+                return
+            sql = f"{select} AND ({order_column}, id) > (?, ?){order}"
+            page_params = (*params, rows[-1][order_column], rows[-1]["id"], chunk_size)
+
     async def get_prompt_versions_for_original(self, original_prompt_id: int) -> List[PromptVersion]:
         """Retrieves all prompt versions associated with a specific original prompt."""
         table_name = self._get_table_name(PromptVersion)
         sql = f"SELECT * FROM {table_name} WHERE original_prompt_id = ? ORDER BY version_number ASC"
         return await self._execute_query_and_fetch_all(PromptVersion, sql, (original_prompt_id,))
 
+    async def iter_prompt_versions_for_original(
+        self, original_prompt_id: int, chunk_size: int = 500
+    ) -> AsyncIterator[PromptVersion]:
+        """Streams the prompt versions of an original prompt in version order, `chunk_size` rows at a time."""
+        async for prompt_version in self._iter_query(
+            PromptVersion, "original_prompt_id = ?", (original_prompt_id,), "version_number", chunk_size
+        ):
+            yield prompt_version
+
+    async def get_prompt_versions_for_originals(self, original_prompt_ids: Sequence[int]) -> Dict[int, List[PromptVersion]]:
+        """Retrieves the prompt versions of several original prompts in one query, keyed by original prompt ID."""
+        unique_ids = list(dict.fromkeys(original_prompt_ids))
+        versions_by_original: Dict[int, List[PromptVersion]] = {original_id: [] for original_id in unique_ids}
+        table_name = self._get_table_name(PromptVersion)
+        for start in range(0, len(unique_ids), MAX_IN_CLAUSE_PARAMS):
+            chunk = unique_ids[start:start + MAX_IN_CLAUSE_PARAMS]
+            sql = (
+                f"SELECT * FROM {table_name} WHERE original_prompt_id IN ({', '.join('?' for _ in chunk)}) "
+                "ORDER BY original_prompt_id, version_number ASC"
+            )
+            for version in await self._execute_query_and_fetch_all(PromptVersion, sql, tuple(chunk)):
+                versions_by_original[version.original_prompt_id].append(version)
+        return versions_by_original
+
     async def get_evaluations_for_prompt_version(self, prompt_version_id: int) -> List[EvaluationResult]:
         """Retrieves all evaluations for a specific prompt version."""
         ai_outputs_table = self._get_table_name(AIOutput)
@@ -525,99 +851,61 @@ class SQLiteKnowledgeBase(KnowledgeBase):
         sql = f"SELECT * FROM {table_name} WHERE session_id = ? ORDER BY iteration_number ASC"
         return await self._execute_query_and_fetch_all(IterationLog, sql, (session_id,))
 
+    async def iter_iterations_for_session(self, session_id: str, chunk_size: int = 500) -> AsyncIterator[IterationLog]:
+        """Streams the iteration logs of a session in iteration order, `chunk_size` rows at a time."""
+        async for iteration_log in self._iter_query(
+            IterationLog, "session_id = ?", (session_id,), "iteration_number", chunk_size
+        ):
+            yield iteration_log
+
     async def get_active_meta_prompt(self, name_like: str = "architect") -> Optional[MetaPrompt]:
         """
         Retrieves the currently active meta-prompt from the database.
-        It prioritizes prompts with names matching the 'name_like' parameter.
+        Only prompts whose names start with 'name_like' (case-insensitively) are considered.
         """
         table_name = self._get_table_name(MetaPrompt)
-        # Prioritize finding the active prompt with the specified name pattern
-        sql = f"SELECT * FROM {table_name} WHERE is_active = 1 AND name LIKE ? ORDER BY id DESC LIMIT 1"
-        
-        async with self._conn.execute(sql, (f'%{name_like}%',)) as cursor:
-            row = await cursor.fetchone()
-        
-        if row:
-            return await self._db_row_to_model(row, MetaPrompt)
-        
-        # Fallback: if no named active prompt is found, get the most recently activated one.
-        sql_fallback = "SELECT * FROM meta_prompts WHERE name LIKE ? ORDER BY is_active DESC, updated_at DESC LIMIT 1"
-        async with self._conn.cursor() as cursor:
-            await cursor.execute(sql, (f"{name_like}%",))
-            row = await cursor.fetchone()
-            if row:
-                return await self._db_row_to_model(row, MetaPrompt)
-
-            # Fallback for older versions that may not have _v1, etc.
-            await cursor.execute(sql_fallback, (f"{name_like}%",))
-            row_fallback = await cursor.fetchone()
-            return await self._db_row_to_model(row_fallback, MetaPrompt) if row_fallback else None
+        # One query covers both cases: the newest active prompt with the prefix, or failing
+        # that the most recently updated one. The anchored prefix lets SQLite probe the
+        # name index instead of scanning the table.
+        sql = f"""
+            SELECT * FROM {table_name}
+            WHERE name LIKE ?
+            ORDER BY is_active DESC, CASE WHEN is_active = 1 THEN id END DESC, updated_at DESC
+            LIMIT 1
+        """
+        async with self.read_session() as conn:
+            async with conn.execute(sql, (f'{name_like}%',)) as cursor:
+                row = await cursor.fetchone()
+        return self._db_row_to_model(row, MetaPrompt) if row else None
 
     async def get_meta_prompt_by_name(self, name: str) -> Optional[MetaPrompt]:
         """Retrieves a specific meta-prompt by its unique name."""
         sql = f"SELECT * FROM meta_prompts WHERE name = ?"
-        async with self._conn.cursor() as cursor:
-            await cursor.execute(sql, (name,))
-            row = await cursor.fetchone()
-            if row:
-                return await self._db_row_to_model(row, MetaPrompt)
+        async with self.read_session() as conn:
+            async with conn.execute(sql, (name,)) as cursor:
+                row = await cursor.fetchone()
+        if row:
+            return self._db_row_to_model(row, MetaPrompt)
         return None
 
-    async def update_meta_prompt(self, name: str, update_data: "MetaPromptUpdate") -> Optional[MetaPrompt]:
-        """Updates a meta-prompt's template and/or active status."""
-        if not self._conn:
-            raise ConnectionError("Database not connected")
-
-        async with self._conn.transaction():
-            # If setting a prompt to active, first deactivate others of the same base name.
-            if update_data.is_active:
-                base_name = name.split('_v')[0]
-                deactivate_sql = "UPDATE meta_prompts SET is_active = 0 WHERE name LIKE ? AND name != ?"
-                await self._conn.execute(deactivate_sql, (f"{base_name}%", name))
-
-            # Build the update query dynamically
-            update_fields = update_data.model_dump(exclude_unset=True)
-            if not update_fields:
-                return await self.get_meta_prompt_by_name(name)
-
-            update_fields["updated_at"] = datetime.now(timezone.utc).isoformat()
-            
-            set_clause = ", ".join([f"{key} = ?" for key in update_fields.keys()])
-            sql = f"UPDATE meta_prompts SET {set_clause} WHERE name = ?"
-            
-            params = list(update_fields.values()) + [name]
-            
-            cursor = await self._conn.execute(sql, tuple(params))
-            if cursor.rowcount == 0:
-                    raise ValueError(f"Meta-prompt with name '{name}' not found for update.")
-
-        return await self.get_meta_prompt_by_name(name)
-
     async def get_all(self, model_cls: Type[T]) -> List[T]:
         """Retrieves all records for a given model type."""
         table_name = self._get_table_name(model_cls)
         sql = f"SELECT * FROM {table_name}"
         return await self._execute_query_and_fetch_all(model_cls, sql)
 
-    async def _db_row_to_model(self, row: aiosqlite.Row, model_cls: Type[T]) -> T:
-        """Converts a row from the database into a Pydantic model instance."""
-        data = dict(row)
-        # Handle fields that are stored as JSON strings
-        data = self._handle_json_deserialization(data, model_cls)
-        return model_cls(**data)
+    def _db_row_to_model(self, row: aiosqlite.Row, model_cls: Type[T]) -> T:
+        """
+        Converts a row from the database into a Pydantic model instance.
+
+        Used for list and history queries, where construction dominates: the row comes from
+        our own schema, so it is trusted and built without `__init__` (see `from_trusted`).
+        """
+        return model_cls.from_trusted(self._row_to_data(row, model_cls))
 
     def _get_model_from_table(self, table_name: str) -> Optional[Type[BaseMPLAModel]]:
         """Maps a table name back to its corresponding Pydantic model class."""
-        schema_map = {
-            "meta_prompts": MetaPrompt,
-            "original_prompts": OriginalPrompt,
-            "prompt_versions": PromptVersion,
-            "target_ai_profiles": TargetAIProfile,
-            "ai_outputs": AIOutput,
-            "evaluation_results": EvaluationResult,
-            "iteration_logs": IterationLog,
-        }
-        return schema_map.get(table_name)
+        return next((model_cls for model_cls, name in TABLE_NAMES.items() if name == table_name), None)
     
     # --- The methods below are potentially deprecated or need refactoring ---
     
@@ -630,9 +918,10 @@ class SQLiteKnowledgeBase(KnowledgeBase):
         """Retrieves the latest prompt version for a given original prompt ID."""
         table_name = self._get_table_name(PromptVersion)
         sql = f"SELECT * FROM {table_name} WHERE original_prompt_id = ? ORDER BY version_number DESC LIMIT 1"
-        async with self._conn.execute(sql, (original_prompt_id,)) as cursor:
-            row = await cursor.fetchone()
-        return await self._db_row_to_model(row, PromptVersion) if row else None
+        async with self.read_session() as conn:
+            async with conn.execute(sql, (original_prompt_id,)) as cursor:
+                row = await cursor.fetchone()
+        return self._db_row_to_model(row, PromptVersion) if row else None
 
     async def save_evaluation_result(self, result: EvaluationResult) -> EvaluationResult:
         """Saves an evaluation result to the database."""
@@ -649,19 +938,20 @@ class SQLiteKnowledgeBase(KnowledgeBase):
         if not self._conn:
             raise ConnectionError("Database not connected")
 
+        # Build the update query dynamically
+        update_fields = update_data.model_dump(exclude_unset=True)
+        if not update_fields:
+            return await self.get_meta_prompt_by_name(name) # Nothing to update
+
         # Use a transaction to ensure atomicity, especially when deactivating other prompts.
-        async with self._conn.executescript("BEGIN"):
+        async with self.session() as conn:
             try:
+                await conn.execute("BEGIN")
                 # If setting a prompt to active, first deactivate others of the same base name.
                 if update_data.is_active:
                     base_name = name.split('_v')[0]
                     deactivate_sql = "UPDATE meta_prompts SET is_active = 0 WHERE name LIKE ? AND name != ?"
-                    await self._conn.execute(deactivate_sql, (f"{base_name}%", name))
-
-                # Build the update query dynamically
-                update_fields = update_data.model_dump(exclude_unset=True)
-                if not update_fields:
-                    return await self.get_meta_prompt_by_name(name) # Nothing to update
+                    await conn.execute(deactivate_sql, (f"{base_name}%", name))
 
                 update_fields["updated_at"] = datetime.now(timezone.utc).isoformat()
                 
@@ -670,14 +960,14 @@ class SQLiteKnowledgeBase(KnowledgeBase):
                 
                 params = list(update_fields.values()) + [name]
                 
-                cursor = await self._conn.execute(sql, tuple(params))
+                cursor = await conn.execute(sql, tuple(params))
                 if cursor.rowcount == 0:
                      raise ValueError(f"Meta-prompt with name '{name}' not found for update.")
 
-                await self._conn.commit()
+                await conn.commit()
 
             except (aiosqlite.Error, ValueError) as e:
-                await self._conn.rollback()
+                await conn.rollback()
                 print(f"Error updating meta-prompt '{name}': {e}")
                 return None
 
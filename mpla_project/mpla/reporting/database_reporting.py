@@ -1,11 +1,16 @@
 import asyncio
-from typing import Dict, Any
-from fastapi.encoders import jsonable_encoder
+from typing import Any, AsyncIterator, Dict, List, Optional, TypeVar
 
 from mpla.core.reporting import ReportingModule
 from mpla.knowledge_base.db_connector import KnowledgeBase
 from mpla.knowledge_base.schemas import IterationLog, OriginalPrompt, PromptVersion, EvaluationResult
 
+__all__ = ["DatabaseReportingModule"]
+
+# Iterations whose prompt versions and evaluations are fetched together while streaming a report.
+REPORT_CHUNK_SIZE = 100
+
+T = TypeVar("T")
 
 class DatabaseReportingModule(ReportingModule):
     """
@@ -18,88 +23,102 @@ class DatabaseReportingModule(ReportingModule):
         """
         Saves the full IterationLog object to the database.
         This is the crucial step that persists the record of the iteration itself.
+
+        Returns a small confirmation rather than an encoding of the whole log, which
+        callers already hold.
         """
         saved_log = await self.kb.add(iteration_log)
-        return jsonable_encoder(saved_log)
+        return {
+            "id": saved_log.id,
+            "session_id": saved_log.session_id,
+            "iteration_number": saved_log.iteration_number,
+            "status": saved_log.status,
+        }
 
     async def generate_final_report(self, session_id: str) -> Dict[str, Any]:
         """
         Generates a comprehensive final report for a given session by aggregating
-        all related data from the database.
+        all related data from the database. The markdown is the concatenation of
+        `stream_final_report`.
         """
-        report = {
-            "session_id": session_id,
-            "status": "completed",
-            "iterations": [],
-            "final_prompt": None,
-            "initial_prompt": None,
-        }
+        return {"content": "".join([chunk async for chunk in self.stream_final_report(session_id)])}
 
-        iterations = await self.kb.get_iterations_for_session(session_id)
-        if not iterations:
-            report["status"] = "no_iterations_found"
-            return {"content": "## Final Report\n\nNo iterations were found for this session."}
-
-        # Fetch details for all iterations concurrently for efficiency
-        async def process_iteration(it: IterationLog):
-            prompt_version, evaluation_result, original_prompt = await asyncio.gather(
-                self.kb.get(PromptVersion, it.active_prompt_version_id) if it.active_prompt_version_id else asyncio.sleep(0, result=None),
-                self.kb.get(EvaluationResult, it.evaluation_result_id) if it.evaluation_result_id else asyncio.sleep(0, result=None),
-                self.kb.get(OriginalPrompt, it.original_prompt_id) if it.original_prompt_id else asyncio.sleep(0, result=None)
+    async def stream_final_report(self, session_id: str, chunk_size: int = REPORT_CHUNK_SIZE) -> AsyncIterator[str]:
+        """
+        Yields the final report of a session as markdown, one chunk of iterations at a time.
+
+        Iterations are read from the knowledge base with a cursor, and the records they
+        reference are fetched with one batched lookup per type and chunk, so memory is
+        bounded by `chunk_size` and the first lines are ready before the whole session
+        has been read. The session status and best prompt are only known once every
+        iteration has been seen, so they close the report.
+        """
+        iteration_count = 0
+        final_prompt: Optional[PromptVersion] = None
+        iterations = self.kb.iter_iterations_for_session(session_id, chunk_size)
+
+        async for batch in _batched(iterations, chunk_size):
+            first_batch = iteration_count == 0
+            prompt_versions, evaluation_results, original_prompts = await asyncio.gather(
+                self.kb.get_many(PromptVersion, [it.active_prompt_version_id for it in batch if it.active_prompt_version_id]),
+                self.kb.get_many(EvaluationResult, [it.evaluation_result_id for it in batch if it.evaluation_result_id]),
+                self.kb.get_many(OriginalPrompt, [batch[0].original_prompt_id] if first_batch and batch[0].original_prompt_id else [])
             )
-            # We return the raw model objects here
-            return {
-                "iteration_log": it,
-                "prompt_version": prompt_version,
-                "evaluation_result": evaluation_result,
-                "original_prompt": original_prompt,
-            }
-
-        processed_iterations = await asyncio.gather(*[process_iteration(it) for it in iterations])
-
-        # Populate the report dictionary from the processed data
-        if processed_iterations and processed_iterations[0]["original_prompt"]:
-             report["initial_prompt"] = processed_iterations[0]["original_prompt"]
-
-        report["iterations"] = processed_iterations
-        
-        last_successful_iteration = next((it for it in reversed(processed_iterations) 
-                                             if it.get('iteration_log').status == 'completed' and it.get('prompt_version')), None)
-
-        if last_successful_iteration and last_successful_iteration.get('prompt_version'):
-            report["final_prompt"] = last_successful_iteration['prompt_version']
-            report['status'] = 'completed_successfully'
-        else:
-            report['status'] = 'completed_with_errors'
-
-        # --- Generate Markdown Content ---
-        content_lines = [
-            f"# Final Report for Session: `{session_id}`",
-            f"**Status:** {report['status'].replace('_', ' ').title()}",
-            "---"
-        ]
-        
-        if report.get('initial_prompt'):
-            content_lines.append("## Initial Prompt")
-            content_lines.append(f"> {report['initial_prompt'].text}")
-            content_lines.append("\n")
-
-        content_lines.append("## Iteration Summary")
-        for i, it_data in enumerate(report['iterations']):
-            content_lines.append(f"### Iteration {i+1}")
-            if it_data.get('prompt_version'):
-                content_lines.append(f"**Prompt:** `{it_data['prompt_version'].prompt_text}`")
-            if it_data.get('evaluation_result'):
-                scores = ', '.join([f"{k}: {v:.2f}" for k, v in it_data['evaluation_result'].metric_scores.items()])
-                content_lines.append(f"**Evaluation:** {scores}")
-            content_lines.append("\n")
-
-        if report.get('final_prompt'):
+
+            header = ""
+            if first_batch:
+                initial_prompt = original_prompts.get(batch[0].original_prompt_id)
+                header = f"# Final Report for Session: `{session_id}`\n---\n"
+                if initial_prompt:
+                    header += f"## Initial Prompt\n> {initial_prompt.text}\n\n\n"
+                header += "## Iteration Summary\n"
+
+            # One pass formats each iteration and tracks the last successful prompt
+            iteration_chunks = []
+            for it in batch:
+                iteration_count += 1
+                prompt_version = prompt_versions.get(it.active_prompt_version_id)
+                if prompt_version and it.status == 'completed':
+                    final_prompt = prompt_version
+                iteration_chunks.append(
+                    _format_iteration(iteration_count, prompt_version, evaluation_results.get(it.evaluation_result_id))
+                )
+            yield header + "".join(iteration_chunks)
+
+        if iteration_count == 0:
+            yield "## Final Report\n\nNo iterations were found for this session."
+            return
+
+        status = 'completed_successfully' if final_prompt else 'completed_with_errors'
+        content_lines = ["---", f"**Status:** {status.replace('_', ' ').title()}"]
+        if final_prompt:
             content_lines.append("## Best Performing Prompt")
             content_lines.append("```")
-            content_lines.append(report['final_prompt'].prompt_text)
+            content_lines.append(final_prompt.prompt_text)
             content_lines.append("```")
-
-        report_content = "\n".join(content_lines)
-
-        return {"content": report_content} 
\ No newline at end of file
+        yield "\n".join(content_lines)
+
+def _format_iteration(
+    number: int,
+    prompt_version: Optional[PromptVersion],
+    evaluation_result: Optional[EvaluationResult]
+) -> str:
+    """Formats one iteration's section of the final report."""
+    lines = [
+        f"### Iteration {number}",
+        f"**Prompt:** `{prompt_version.prompt_text}`" if prompt_version else None,
+        f"**Evaluation:** {', '.join(f'{k}: {v:.2f}' for k, v in evaluation_result.metric_scores.items())}"
+        if evaluation_result else None,
+    ]
+    return "\n".join(filter(None, lines)) + "\n\n\n"
+
+async def _batched(items: AsyncIterator[T], size: int) -> AsyncIterator[List[T]]:
+    """Groups an async iterator into lists of up to `size` items."""
+    batch: List[T] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -0,0 +1,24 @@
+"""
+Runs the CLI's coroutines on uvloop when it is available.
+
+uvloop is a libuv-based drop-in for the asyncio event loop whose task scheduling and
+socket I/O are several times faster, which helps the many small tasks of concurrent
+LLM calls and knowledge-base queries. It is an optional dependency (and unavailable
+on Windows), so `run` falls back to the standard loop. The server doesn't need this:
+uvicorn already picks uvloop when it is installed.
+"""
+import asyncio
+from typing import Coroutine, Any, TypeVar
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None # uvloop not installed, use the default asyncio event loop
+
+T = TypeVar("T")
+
+def run(main: Coroutine[Any, Any, T]) -> T:
+    """Runs `main` to completion on a new event loop, like `asyncio.run`."""
+    if uvloop is not None:
+        return uvloop.run(main)
+    return asyncio.run(main)
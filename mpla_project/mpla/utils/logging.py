@@ -1,6 +1,9 @@
 import sys
 from loguru import logger
 
+# The (level, format) the sink was last configured with, so repeated setup calls are no-ops.
+_configured_with = None
+
 def setup_logging(log_level="INFO", log_format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>"):
     """
     Configures a structured logger using Loguru.
@@ -9,16 +12,31 @@ def setup_logging(log_level="INFO", log_format="<green>{time:YYYY-MM-DD HH:mm:ss
     that is both human-readable and detailed. It logs to stderr by default.
     An additional sink can be configured for file-based logging.
 
+    Sinks are enqueued: messages are formatted and written by a background thread,
+    so logging from a coroutine never blocks the event loop on I/O. Call
+    `await logger.complete()` before shutdown to flush pending messages. Exception
+    tracebacks skip the (costly) variable inspection of `diagnose`.
+
+    Calling it again with the same arguments does nothing, so modules may call it
+    freely without restarting the sink's thread.
+
     Args:
         log_level (str): The minimum log level to capture (e.g., "DEBUG", "INFO").
         log_format (str): The Loguru format string for log messages.
     """
+    global _configured_with
+    if _configured_with == (log_level, log_format):
+        return
+    _configured_with = (log_level, log_format)
     logger.remove()  # Remove the default handler to avoid duplicate outputs
     logger.add(
         sys.stderr,
         level=log_level.upper(),
         format=log_format,
         colorize=True,
+        enqueue=True,
+        backtrace=True,
+        diagnose=False,
     )
     # Example of adding a file logger (can be enabled via config)
     # logger.add(
@@ -26,9 +44,10 @@ def setup_logging(log_level="INFO", log_format="<green>{time:YYYY-MM-DD HH:mm:ss
     #     level="DEBUG",
     #     rotation="10 MB",  # Rotates the log file when it reaches 10 MB
     #     retention="7 days", # Keeps logs for 7 days
+    #     compression="gz", # Compresses rotated files
     #     enqueue=True,      # Makes logging non-blocking
     #     backtrace=True,
-    #     diagnose=True,
+    #     diagnose=False,
     # )
     logger.info("Logger successfully configured.")
 
@@ -0,0 +1,51 @@
+"""
+Retries for async calls that can fail transiently (rate limits, brief outages).
+
+Waits grow exponentially with full jitter, so concurrent callers that failed
+together do not retry in lockstep.
+"""
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from mpla.utils.logging import logger
+
+T = TypeVar("T")
+
+async def retry_async(
+    func: Callable[[], Awaitable[T]],
+    is_retryable: Callable[[Exception], bool],
+    max_attempts: int = 5,
+    min_wait_s: float = 0.5,
+    max_wait_s: float = 8.0,
+    retry_after: Optional[Callable[[Exception], Optional[float]]] = None
+) -> T:
+    """
+    Awaits `func()`, calling it again after a backoff while it raises retryable errors.
+
+    Args:
+        func: Starts a fresh attempt each time it is called.
+        is_retryable: Decides whether an exception is worth another attempt.
+        max_attempts: Total attempts, including the first.
+        min_wait_s: Lower bound of the wait before a retry.
+        max_wait_s: Upper bound of the exponentially growing wait.
+        retry_after: Optionally extracts a server-requested wait from an exception,
+                     which takes precedence over the computed backoff.
+
+    Returns:
+        The result of the first successful attempt.
+
+    Raises:
+        Exception: The last error, once it is not retryable or attempts run out.
+    """
+    for attempt in range(1, max_attempts + 1):
+        try:
+            return await func()
+        except Exception as e:
+            if attempt == max_attempts or not is_retryable(e):
+                raise
+            delay = retry_after(e) if retry_after is not None else None
+            if delay is None:
+                delay = random.uniform(min_wait_s, max(min_wait_s, min(max_wait_s, min_wait_s * 2 ** attempt)))
+            logger.warning("Attempt {}/{} failed with {!r}; retrying in {:.2f}s", attempt, max_attempts, e, delay)
+            await asyncio.sleep(delay)
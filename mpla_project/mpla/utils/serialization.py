@@ -0,0 +1,77 @@
+"""
+JSON helpers backed by orjson when it is available.
+
+orjson serializes directly to bytes in native code and is several times faster
+than the standard library encoder. It is an optional dependency, so every helper
+falls back to the stdlib `json` module with equivalent output.
+
+`dumps_packed`/`loads_packed` additionally zstd-compress large documents for storage
+when zstandard is installed.
+"""
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None # orjson not installed, use the stdlib json module
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None # zstandard not installed, packed JSON is stored uncompressed
+
+# Every zstd frame starts with this magic number; JSON text never does.
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+# Smaller documents don't shrink enough to be worth compressing.
+PACK_MIN_BYTES = 1024
+PACK_LEVEL = 3
+
+def dumps_bytes(obj: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """
+    Serializes `obj` to UTF-8 encoded JSON bytes.
+
+    Args:
+        obj: The object to serialize.
+        indent: If True, pretty-print with a two-space indent.
+        default: Called for objects that are not natively serializable.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=default, option=option)
+    return json.dumps(obj, indent=2 if indent else None, default=default, ensure_ascii=False).encode("utf-8")
+
+def dumps(obj: Any, indent: bool = False, default: Optional[Callable[[Any], Any]] = None) -> str:
+    """Serializes `obj` to a JSON string. See `dumps_bytes` for the arguments."""
+    if orjson is not None:
+        return dumps_bytes(obj, indent=indent, default=default).decode("utf-8")
+    return json.dumps(obj, indent=2 if indent else None, default=default, ensure_ascii=False)
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Deserializes a JSON document from a string or bytes."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def dumps_packed(obj: Any, min_size: int = PACK_MIN_BYTES) -> Union[str, bytes]:
+    """
+    Serializes `obj` for storage: zstd-compressed JSON bytes if zstandard is installed
+    and the document is at least `min_size` bytes, otherwise a JSON string.
+    """
+    data = dumps_bytes(obj)
+    if zstandard is None or len(data) < min_size:
+        return data.decode("utf-8")
+    return zstandard.compress(data, PACK_LEVEL)
+
+def loads_packed(data: Union[str, bytes]) -> Any:
+    """
+    Deserializes a value written by `dumps_packed` (or plain JSON text).
+
+    Raises:
+        ImportError: If the value is compressed and zstandard is not installed.
+    """
+    if isinstance(data, bytes) and data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ImportError("Reading compressed JSON requires 'zstandard'.")
+        data = zstandard.decompress(data)
+    return loads(data)
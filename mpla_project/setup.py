@@ -20,6 +20,26 @@ setup(
             "pytest",
             "pytest-asyncio",
         ],
+        # Optional accelerators; the code falls back to pure Python when absent.
+        "speedups": [
+            "pyahocorasick",
+            "orjson",
+            "h2",
+            "zstandard",
+            "uvloop; sys_platform != 'win32'",
+            "aiolimiter",
+        ],
+        # Async ORM sessions against Postgres (mpla.knowledge_base.orm).
+        "postgres": [
+            "sqlalchemy[asyncio]",
+            "asyncpg",
+        ],
+        # Embedding-similarity response cache (mpla.external.semantic_cache).
+        "semantic-cache": [
+            "numpy",
+            "faiss-cpu",
+            "sentence-transformers",
+        ],
     },
     entry_points={
         'console_scripts': [
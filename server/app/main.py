@@ -1,17 +1,22 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pydantic import BaseModel, Field
-import json
+import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
+from datetime import date, datetime
 from dotenv import load_dotenv
-from fastapi.encoders import jsonable_encoder
+from typing import Any, AsyncGenerator, Dict
 
 # Placeholder for our service functions
 from . import services
 from mpla.knowledge_base.schemas import MetaPrompt, MetaPromptUpdate
+from mpla.utils.logging import logger
+from mpla.utils.serialization import dumps_bytes
 from typing import List
 
 # Load .env file from the project root before other modules are initialized
@@ -24,10 +29,35 @@ if os.path.exists(dotenv_path):
 else:
     print("WARNING:  .env file not found. API keys might not be configured.")
 
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded by orjson when it is installed (stdlib json otherwise)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Keeps the shared knowledge base connected for the lifetime of the server."""
+    await services.kb.connect()
+    yield
+    # Both steps always run to completion; a failure in one is logged rather than
+    # cancelling the other (which could drop queued knowledge base writes).
+    teardown = {
+        "orchestrator close": services.close_orchestrators(),
+        "knowledge base disconnect": services.kb.disconnect(),
+    }
+    results = await asyncio.gather(*teardown.values(), return_exceptions=True)
+    for step, result in zip(teardown, results):
+        if isinstance(result, Exception):
+            logger.opt(exception=result).error("Teardown step {!r} failed: {}", step, result)
+    await logger.complete()
+
 app = FastAPI(
     title="MPLA Web API",
     description="API for the Meta-Prompt Learning Agent",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # --- CORS Middleware ---
@@ -56,11 +86,33 @@ class RefineRequest(BaseModel):
     enable_self_correction: bool = Field(default=False)
     self_correction_iterations: int = Field(default=3, gt=0, le=5)
 
+def _sse_json_default(obj: Any) -> Any:
+    # orjson encodes dicts, lists and datetimes itself and only calls this for models
+    # (and, on the stdlib json fallback, for datetimes).
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return str(obj)
+
+# Encoded "event: <name>\ndata: " line prefixes, built once per event name.
+_SSE_EVENT_PREFIXES: Dict[str, bytes] = {}
+
+def _sse_message(event_name: Any, data_payload: Any) -> bytes:
+    prefix = _SSE_EVENT_PREFIXES.get(event_name)
+    if prefix is None:
+        prefix = _SSE_EVENT_PREFIXES[event_name] = f"event: {event_name}\ndata: ".encode("utf-8")
+    # Encoded in a single pass; models and datetimes are handled by the default hook.
+    return prefix + dumps_bytes(data_payload, default=_sse_json_default) + b"\n\n"
+
 # --- API Endpoints ---
 
 # --- Static Files Configuration ---
-# Mount static files for the React frontend
-static_path = os.path.join(os.path.dirname(__file__), "..", "static")
+# Mount static files for the React frontend. The paths (and whether index.html exists)
+# are resolved once here, so page routes don't stat the filesystem on every request.
+static_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "static"))
+index_file = os.path.join(static_path, "index.html")
+index_exists = os.path.exists(index_file)
 if os.path.exists(static_path):
     # First, mount the assets directory (critical for Vite builds)
     assets_path = os.path.join(static_path, "assets")
@@ -84,10 +136,7 @@ else:
 @app.get("/")
 def read_root():
     """Serve the React frontend for the root route."""
-    static_path = os.path.join(os.path.dirname(__file__), "..", "static")
-    index_file = os.path.join(static_path, "index.html")
-    
-    if os.path.exists(index_file):
+    if index_exists:
         return FileResponse(index_file)
     else:
         # Fallback to API message if static files not found
@@ -99,31 +148,22 @@ async def refine_prompt_stream(request: Request, body: RefineRequest):
     Accepts a prompt and configuration, then streams the refinement process
     by calling the core service logic and formatting it as a text/event-stream.
     """
-    settings_dict = body.dict()
-
-    async def sse_formatted_generator():
+    async def sse_formatted_generator() -> AsyncGenerator[bytes, None]:
         """
-        Manually formats the SSE messages.
+        Manually formats the SSE messages as bytes, which the response sends without re-encoding.
         Format:
         event: <event_name>
         data: <json_string_of_data>
         """
         async for event_dict in services.run_mpla_refinement(
             initial_prompt=body.initial_prompt,
-            settings=settings_dict
+            settings=body
         ):
             if await request.is_disconnected():
                 break
             
-            event_name = event_dict.get("event")
-            data_payload = event_dict.get("data")
-
             # The data payload must be a JSON string for the frontend parser
-            # Use jsonable_encoder to handle complex types like datetime
-            data_payload_str = json.dumps(jsonable_encoder(data_payload))
-            
-            sse_message = f"event: {event_name}\ndata: {data_payload_str}\n\n"
-            yield sse_message
+            yield _sse_message(event_dict.get("event"), event_dict.get("data"))
 
     return StreamingResponse(sse_formatted_generator(), media_type="text/event-stream")
 
@@ -144,20 +184,31 @@ async def update_meta_prompt(name: str, payload: MetaPromptUpdate):
     """Updates a meta-prompt's template and/or active status."""
     return await services.update_meta_prompt(name, payload)
 
+# --- Session Report Endpoint ---
+
+@app.get("/api/sessions/{session_id}/report")
+async def get_session_report(session_id: str):
+    """Streams the final markdown report of a refinement session as it is built."""
+    return StreamingResponse(services.stream_session_report(session_id), media_type="text/markdown")
+
+# Load balancers probe the health check every few seconds; a result is reused for this long.
+HEALTH_CACHE_TTL_S = 5.0
+_health_cache: dict = {"checked_at": 0.0, "value": None}
+
 # Enhanced health check with system status
 @app.get("/api/health")
 async def health_check():
     """Comprehensive health check endpoint for monitoring and load balancers."""
+    if _health_cache["value"] is not None and time.monotonic() - _health_cache["checked_at"] < HEALTH_CACHE_TTL_S:
+        return _health_cache["value"]
+    _health_cache["value"] = await _check_health()
+    _health_cache["checked_at"] = time.monotonic()
+    return _health_cache["value"]
+
+async def _check_health() -> dict:
     try:
-        # Check database connectivity
-        from mpla.knowledge_base.sqlite_kb import SQLiteKnowledgeBase
-        import os
-        
-        db_path = os.getenv("MPLA_DATA_DIR", ".") + "/mpla_v2.db"
-        kb = SQLiteKnowledgeBase(db_path=db_path)
-        await kb.connect()
-        # SQLite KB uses disconnect() instead of close()
-        await kb.disconnect()
+        # Check database connectivity on the shared, already open connection
+        await services.check_database()
         
         health_status = {
             "status": "healthy",
@@ -199,10 +250,7 @@ async def metrics():
 async def serve_spa(full_path: str):
     """Serve React app for all non-API routes (SPA routing)."""
     # This should not be reached for API routes since they're defined above
-    static_path = os.path.join(os.path.dirname(__file__), "..", "static")
-    index_file = os.path.join(static_path, "index.html")
-    
-    if os.path.exists(index_file):
+    if index_exists:
         return FileResponse(index_file)
     else:
         return {"message": "Frontend not available", "path": full_path} 
\ No newline at end of file
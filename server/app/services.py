@@ -1,9 +1,18 @@
+"""
+Service layer behind the API: builds and caches agents, and runs refinements as event streams.
+
+Everything here is async I/O (LLM calls, SQLite, streamed events), so it benefits from
+uvloop: uvicorn uses it automatically when installed (see requirements.txt), and the
+Docker image pins it with `--loop uvloop`.
+"""
 import asyncio
-import json
+import hashlib
 import os
 import sys
-from typing import AsyncGenerator, Dict, Any
-from fastapi.encoders import jsonable_encoder
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import TYPE_CHECKING, AsyncGenerator, Dict, Any, List, Optional, Tuple
 from fastapi import HTTPException
 
 # Add project root to Python path
@@ -24,13 +33,17 @@ from mpla.reporting.database_reporting import DatabaseReportingModule
 from mpla.core.system_diagnoser import SystemDiagnoser
 from mpla.knowledge_base.schemas import MetaPrompt, MetaPromptUpdate
 
+if TYPE_CHECKING:
+    from .main import RefineRequest
+
 setup_logging()
 
 # --- Service Setup ---
 # This setup should be more robust in a production environment (e.g., using dependency injection)
 # For now, we instantiate the components directly.
 
-# Knowledge Base
+# Knowledge Base, shared by all requests. The app's lifespan connects it at startup and
+# disconnects it at shutdown (see main.py), so requests never pay for opening it.
 DATABASE_URL = "mpla_v2.db"
 kb = SQLiteKnowledgeBase(db_path=DATABASE_URL)
 
@@ -43,102 +56,262 @@ except FileNotFoundError:
     # In a real app, you might have a default fallback config or a more graceful shutdown.
     config = None 
 
+# Orchestrators hold API clients (and their connections), so they and the components built
+# on them are created once per (provider, API key hash) and reused by every request.
+# `close_orchestrators()` releases them at shutdown.
+_ORCHESTRATOR_CACHE: Dict[Tuple[str, str], Tuple[GoogleGeminiOrchestrator, ArchitectPromptEnhancer, SystemDiagnoser]] = {}
+
+def _get_orchestrator_components(
+    provider: str,
+    api_key: str
+) -> Tuple[GoogleGeminiOrchestrator, ArchitectPromptEnhancer, SystemDiagnoser]:
+    """Returns the shared orchestrator, prompt enhancer and system diagnoser for an API key."""
+    cache_key = (provider, hashlib.sha256(api_key.encode()).hexdigest())
+    components = _ORCHESTRATOR_CACHE.get(cache_key)
+    if components is None:
+        orchestrator = GoogleGeminiOrchestrator(api_key=api_key)
+        components = (
+            orchestrator,
+            ArchitectPromptEnhancer(orchestrator=orchestrator, kb=kb),
+            SystemDiagnoser(orchestrator=orchestrator)
+        )
+        _ORCHESTRATOR_CACHE[cache_key] = components
+    return components
+
+def _build_agent(api_key: str, evaluation_mode: str) -> MPLAgent:
+    """
+    Builds a refinement's own agent around the cached orchestrator components.
+
+    The agent and its evaluation, learning and reporting modules record per-run state,
+    so each refinement gets fresh ones; they are cheap to build once the orchestrator exists.
+    """
+    orchestrator, enhancer, system_diagnoser = _get_orchestrator_components("google", api_key)
+    logger.info(f"Initializing agent with enhancer='Architect', evaluation='{evaluation_mode}'")
+    return MPLAgent(
+        knowledge_base=kb,
+        prompt_enhancer=enhancer,
+        deployment_orchestrator=orchestrator,
+        evaluation_engine=create_evaluation_engine({"evaluation_mode": evaluation_mode}, orchestrator),
+        learning_refinement_module=RuleBasedLearningRefinementModule(),
+        reporting_module=DatabaseReportingModule(kb=kb),
+        system_diagnoser=system_diagnoser,
+        self_correction_config=config.agent.self_correction
+    )
+
+async def close_orchestrators() -> None:
+    """Closes the API clients of all cached orchestrators, logging (not raising) any that fail."""
+    orchestrators = [orchestrator for orchestrator, _, _ in _ORCHESTRATOR_CACHE.values()]
+    _ORCHESTRATOR_CACHE.clear()
+    results = await asyncio.gather(*(o.close() for o in orchestrators), return_exceptions=True)
+    for orchestrator, result in zip(orchestrators, results):
+        if isinstance(result, Exception):
+            logger.opt(exception=result).error("Closing {} failed: {}", type(orchestrator).__name__, result)
+
+# --- Health Service Functions ---
+
+async def check_database() -> None:
+    """Runs a trivial query on the shared knowledge base; raises if the database is unusable."""
+    async with kb.read_session() as conn:
+        async with conn.execute("SELECT 1") as cursor:
+            await cursor.fetchone()
+
 # --- Meta-Prompt Service Functions ---
 
 async def get_all_meta_prompts() -> list[MetaPrompt]:
     """Service function to retrieve all meta-prompts."""
-    await kb.connect()
-    prompts = await kb.get_all(MetaPrompt)
-    await kb.disconnect()
-    return prompts
+    return await kb.get_all(MetaPrompt)
 
 async def get_meta_prompt_by_name(name: str) -> MetaPrompt:
     """Service function to retrieve a specific meta-prompt by name."""
-    await kb.connect()
     prompt = await kb.get_meta_prompt_by_name(name)
-    await kb.disconnect()
     if not prompt:
         raise HTTPException(status_code=404, detail=f"Meta-prompt '{name}' not found.")
     return prompt
 
 async def update_meta_prompt(name: str, payload: MetaPromptUpdate) -> MetaPrompt:
     """Service function to update a meta-prompt."""
-    await kb.connect()
     updated_prompt = await kb.update_meta_prompt(name, payload)
-    await kb.disconnect()
     if not updated_prompt:
         raise HTTPException(status_code=404, detail=f"Meta-prompt '{name}' not found or update failed.")
     return updated_prompt
 
+def stream_session_report(session_id: str) -> AsyncGenerator[str, None]:
+    """Service function to stream the markdown final report of a refinement session."""
+    return DatabaseReportingModule(kb=kb).stream_final_report(session_id)
+
+# --- Refinement Service Functions ---
+
+TARGET_AI_PROFILE_NAME = "gemini-1.5-flash"
+
+# Evaluation settings shared by every refinement; only the user objective is added per
+# request. The evaluation engines only read them, so the nested values are shared too.
+# This structure for metrics will need to adapt for the LLM evaluator
+_BASE_PERFORMANCE_METRICS = MappingProxyType({
+    # For LLM
+    "quality_dimensions": ["clarity", "relevance", "completeness", "adherence_to_constraints"],
+    # For Basic
+    "target_satisfaction": 4.0,
+    "rules": {
+        "length": {"min": 20, "max": 2000, "weight": 0.2},
+        "keywords": {"absent": ["sorry", "unable", "cannot"], "weight": 0.3},
+    }
+})
+
+# Marks the end of a shared refinement's event stream.
+_STREAM_END = object()
+
+class _SharedRefinement:
+    """An in-flight refinement whose events are fanned out to every subscribed request."""
+
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self.subscribers: List[asyncio.Queue] = []
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        self.events.append(event)
+        for queue in self.subscribers:
+            queue.put_nowait(event)
+
+    def finish(self) -> None:
+        self.done = True
+        for queue in self.subscribers:
+            queue.put_nowait(_STREAM_END)
+
+    async def subscribe(self) -> AsyncGenerator[Dict[str, Any], None]:
+        """Yields every event of the run, replaying those published before subscribing."""
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.events:
+            queue.put_nowait(event)
+        if self.done:
+            queue.put_nowait(_STREAM_END)
+        else:
+            self.subscribers.append(queue)
+        try:
+            while (event := await queue.get()) is not _STREAM_END:
+                yield event
+        finally:
+            if queue in self.subscribers:
+                self.subscribers.remove(queue)
+            # Nobody is listening anymore (e.g. every client disconnected): stop spending tokens.
+            if not self.subscribers and not self.done and self.task is not None:
+                self.task.cancel()
+
+# Refinements in progress, keyed by a hash of the request. Lookups and inserts never
+# await, so concurrent requests can't race between them and no lock is needed.
+_INFLIGHT: Dict[str, _SharedRefinement] = {}
+
+# Completed refinements are replayed to identical retries instead of being run again.
+RESULT_CACHE_SIZE = 128
+RESULT_CACHE_TTL_S = 600.0
+# Maps request key to (time cached, events of the run), least recently used first.
+_result_cache: "OrderedDict[str, Tuple[float, Tuple[Dict[str, Any], ...]]]" = OrderedDict()
+
+def _cached_result(request_key: str) -> Optional[Tuple[Dict[str, Any], ...]]:
+    entry = _result_cache.get(request_key)
+    if entry is None:
+        return None
+    if time.monotonic() - entry[0] >= RESULT_CACHE_TTL_S:
+        del _result_cache[request_key]
+        return None
+    _result_cache.move_to_end(request_key)
+    return entry[1]
+
+def _cache_result(request_key: str, events: List[Dict[str, Any]]) -> None:
+    # Failed runs are not cached, so a retry after an error really runs again.
+    if any(event.get("event") == "error" for event in events):
+        return
+    _result_cache[request_key] = (time.monotonic(), tuple(events))
+    _result_cache.move_to_end(request_key)
+    if len(_result_cache) > RESULT_CACHE_SIZE:
+        _result_cache.popitem(last=False)
+
+def _request_key(initial_prompt: str, settings: "RefineRequest") -> str:
+    """
+    Hashes everything that shapes a refinement's output: the prompt, every request setting,
+    and the provider account it runs on (through the API key's hash, never the key itself).
+    The server configuration and target profile are fixed for the life of the process.
+    """
+    api_key_hash = hashlib.sha256((os.getenv("GOOGLE_API_KEY") or "").encode()).hexdigest()
+    material = f"google\0{api_key_hash}\0{initial_prompt}\0{settings.model_dump_json()}"
+    return hashlib.sha256(material.encode()).hexdigest()
+
 async def run_mpla_refinement(
     initial_prompt: str,
-    settings: Dict[str, Any]
-) -> AsyncGenerator[str, None]:
+    settings: "RefineRequest"
+) -> AsyncGenerator[Dict[str, Any], None]:
     """
-    Sets up the MPLA agent dynamically and runs the streaming refinement cycle.
+    Runs the streaming refinement cycle, or joins an identical one already in progress.
+
+    Concurrent requests with the same prompt and settings share a single run (and its
+    LLM calls); a request joining late first receives the events it missed. A request
+    repeating one that completed within `RESULT_CACHE_TTL_S` gets the recorded events
+    replayed without building an agent or calling the LLM.
+
+    Yields event dicts ({"event": ..., "data": ...}); the endpoint encodes each one
+    to an SSE message exactly once.
     """
-    agent = None
+    request_key = _request_key(initial_prompt, settings)
+    cached_events = _cached_result(request_key)
+    if cached_events is not None:
+        logger.info("Replaying the cached result of an identical refinement.")
+        for event in cached_events:
+            yield event
+            await asyncio.sleep(0) # Let the response flush each event, as a live run would
+        return
+
+    shared = _INFLIGHT.get(request_key)
+    if shared is None:
+        shared = _INFLIGHT[request_key] = _SharedRefinement()
+        shared.task = asyncio.create_task(_publish_refinement(request_key, shared, initial_prompt, settings))
+    else:
+        logger.info("Joining an identical refinement already in progress.")
+    async for event in shared.subscribe():
+        yield event
+
+async def _publish_refinement(
+    request_key: str,
+    shared: _SharedRefinement,
+    initial_prompt: str,
+    settings: "RefineRequest"
+) -> None:
+    try:
+        async for event in _run_refinement(initial_prompt, settings):
+            shared.publish(event)
+        _cache_result(request_key, shared.events)
+    finally:
+        _INFLIGHT.pop(request_key, None)
+        shared.finish()
+
+async def _run_refinement(
+    initial_prompt: str,
+    settings: "RefineRequest"
+) -> AsyncGenerator[Dict[str, Any], None]:
+    """Sets up the MPLA agent dynamically and runs the streaming refinement cycle."""
     if not config:
-        yield json.dumps({
+        yield {
             "event": "error", 
             "data": {"message": "Server configuration is missing. Cannot start refinement."}
-        })
+        }
         return
         
     try:
-        # --- Dynamic Component Instantiation ---
-        
-        # 1. Orchestrator
+        # --- Agent (one per refinement, around the shared orchestrator) ---
         api_key = os.getenv("GOOGLE_API_KEY")
         if not api_key:
             raise ValueError("GOOGLE_API_KEY environment variable not set.")
-        orchestrator = GoogleGeminiOrchestrator(api_key=api_key)
-
-        # 2. Evaluation Engine (using the factory)
-        evaluation_engine = create_evaluation_engine(settings, orchestrator)
-        
-        # 3. Prompt Enhancer
-        enhancer = ArchitectPromptEnhancer(
-            orchestrator=orchestrator,
-            kb=kb
-        )
-
-        # 4. System Diagnoser (NEW)
-        system_diagnoser = SystemDiagnoser(orchestrator=orchestrator)
-
-        # --- Agent Initialization ---
-        logger.info(f"Initializing agent with enhancer='Architect', evaluation='{settings.get('evaluation_mode', 'basic')}'")
-        agent = MPLAgent(
-            knowledge_base=kb,
-            prompt_enhancer=enhancer,
-            deployment_orchestrator=orchestrator,
-            evaluation_engine=evaluation_engine,
-            learning_refinement_module=RuleBasedLearningRefinementModule(),
-            reporting_module=DatabaseReportingModule(kb=kb),
-            system_diagnoser=system_diagnoser,
-            self_correction_config=config.agent.self_correction
-        )
+        agent = _build_agent(api_key, settings.evaluation_mode)
 
         target_ai_profile_data = {
-            "name": "gemini-1.5-flash",
+            "name": TARGET_AI_PROFILE_NAME,
             "capabilities": {
-                "temperature": settings.get("model_temperature", 0.7),
-                "architect_temperature": settings.get("architect_temperature", 0.2)
+                "temperature": settings.model_temperature,
+                "architect_temperature": getattr(settings, "architect_temperature", 0.2)
             }
         }
         
-        # This structure for metrics will need to adapt for the LLM evaluator
-        initial_performance_metrics = {
-            # For LLM
-            "user_objective": initial_prompt,
-            "quality_dimensions": ["clarity", "relevance", "completeness", "adherence_to_constraints"],
-            # For Basic
-            "target_satisfaction": 4.0,
-            "rules": {
-                "length": {"min": 20, "max": 2000, "weight": 0.2},
-                "keywords": {"absent": ["sorry", "unable", "cannot"], "weight": 0.3},
-            }
-        }
+        initial_performance_metrics = {**_BASE_PERFORMANCE_METRICS, "user_objective": initial_prompt}
         
         yield {"event": "message", "data": "Agent initialized. Starting refinement..."}
 
@@ -146,10 +319,10 @@ async def run_mpla_refinement(
             original_prompt_text=initial_prompt,
             target_ai_profile_data=target_ai_profile_data,
             initial_performance_metrics=initial_performance_metrics,
-            max_iterations=settings.get("max_iterations", 3),
+            max_iterations=settings.max_iterations,
             user_id="web_user",
-            self_correction_enabled_by_user=settings.get("enable_self_correction", False),
-            self_correction_iterations_by_user=settings.get("self_correction_iterations", 3),
+            self_correction_enabled_by_user=settings.enable_self_correction,
+            self_correction_iterations_by_user=settings.self_correction_iterations,
         ):
             yield iteration_result
 
@@ -166,10 +339,4 @@ async def run_mpla_refinement(
         # This block will run whether there was an error or not.
         final_payload = {"event": "complete", "data": "Stream finished."}
         yield final_payload
-        
-        if agent and agent.kb._conn is not None:
-            await agent.kb.disconnect()
-            logger.info("Database connection closed.")
-        if agent and agent.deployment_orchestrator:
-            await agent.deployment_orchestrator.close()
-            logger.info("Deployment orchestrator resources released.") 
\ No newline at end of file
+        # The knowledge base and orchestrator are shared with other requests and stay open until shutdown. 
\ No newline at end of file
@@ -6,6 +6,8 @@ This module contains mock implementations of the core abstract classes
 integration tests. This prevents test code from cluttering production modules.
 """
 
+import contextlib
+from collections import defaultdict
 from typing import Any, Dict, Optional, List
 
 # Core abstractions to be mocked
@@ -14,6 +16,8 @@ from mpla.core.evaluation_engine import EvaluationEngine
 from mpla.core.learning_refinement import LearningRefinementModule
 from mpla.core.prompt_enhancer import BasePromptEnhancer
 from mpla.core.reporting import ReportingModule
+from mpla.core.system_diagnoser import SystemDiagnoser
+from mpla.knowledge_base import schemas
 from mpla.knowledge_base.db_connector import KnowledgeBase
 from mpla.knowledge_base.schemas import (
     AIOutput,
@@ -63,6 +67,10 @@ class MockReportingModule(ReportingModule):
         self.kb = kb
         self.iterations = []
 
+    def reset(self) -> None:
+        """Forgets reported iterations, so one instance can be reused across tests."""
+        self.iterations.clear()
+
     async def report_iteration(self, iteration_log: IterationLog) -> None:
         self.iterations.append(iteration_log)
 
@@ -74,10 +82,34 @@ class MockReportingModule(ReportingModule):
             "iterations_summary": [{"iter": it.iteration_number, "status": it.status} for it in self.iterations]
         }
 
+class MockSystemDiagnoser(SystemDiagnoser):
+    def __init__(self):
+        super().__init__(orchestrator=None)
+
+    async def diagnose_and_propose_remedy(self, component_name, exception, traceback_str, component_input=None) -> Optional[Dict[str, Any]]:
+        return {"component": component_name, "diagnosis": f"Mock diagnosis: {exception}"}
+
+# Resolves model names passed to `MockKnowledgeBase.get` by older callers.
+_NAME_TO_CLS: Dict[str, type] = {
+    name: obj for name, obj in vars(schemas).items()
+    if not name.startswith("_") and isinstance(obj, type) and issubclass(obj, BaseMPLAModel)
+}
+
 class MockKnowledgeBase(KnowledgeBase):
     def __init__(self):
-        self._store: Dict[str, Dict[int, Any]] = {}
+        # Records bucketed by their model class
+        self._store: Dict[type, Dict[int, Any]] = {}
         self._id_counter: int = 0
+        # Secondary indexes for the filtered lookups, so they don't scan every stored record
+        self._by_session: Dict[str, List[IterationLog]] = defaultdict(list)
+        self._by_original_prompt: Dict[int, List[PromptVersion]] = defaultdict(list)
+
+    def reset(self) -> None:
+        """Empties the store and restarts IDs, so one instance can be reused across tests."""
+        self._store.clear()
+        self._by_session.clear()
+        self._by_original_prompt.clear()
+        self._id_counter = 0
 
     async def connect(self):
         pass # No-op
@@ -85,31 +117,40 @@ class MockKnowledgeBase(KnowledgeBase):
     async def disconnect(self):
         pass # No-op
 
+    @contextlib.asynccontextmanager
+    async def session(self):
+        yield self._store # No pooling, the in-memory store is the "connection"
+
     async def add(self, record: BaseMPLAModel) -> BaseMPLAModel:
         self._id_counter += 1
         record.id = self._id_counter
         # Timestamps would be set here in a real scenario
-        model_name = record.__class__.__name__
-        if model_name not in self._store:
-            self._store[model_name] = {}
-        self._store[model_name][record.id] = record
+        self._store.setdefault(type(record), {})[record.id] = record
+        self._index(record)
         return record
 
+    def _index(self, record: BaseMPLAModel) -> None:
+        if isinstance(record, IterationLog):
+            self._by_session[record.session_id].append(record)
+        elif isinstance(record, PromptVersion):
+            self._by_original_prompt[record.original_prompt_id].append(record)
+
+    def _unindex(self, record: BaseMPLAModel) -> None:
+        if isinstance(record, IterationLog):
+            self._by_session[record.session_id].remove(record)
+        elif isinstance(record, PromptVersion):
+            self._by_original_prompt[record.original_prompt_id].remove(record)
+
     async def get(self, model_cls: type | str, record_id: int) -> Optional[Any]:
-        model_name = model_cls if isinstance(model_cls, str) else model_cls.__name__
-        return self._store.get(model_name, {}).get(record_id)
+        if isinstance(model_cls, str):
+            model_cls = _NAME_TO_CLS.get(model_cls)
+        return self._store.get(model_cls, {}).get(record_id)
 
     async def get_iterations_for_session(self, session_id: str) -> List[IterationLog]:
-        return [
-            log for log in self._store.get("IterationLog", {}).values()
-            if log.session_id == session_id
-        ]
+        return list(self._by_session.get(session_id, ()))
 
     async def get_prompt_versions_for_original(self, original_prompt_id: int) -> List[PromptVersion]:
-        return [
-            pv for pv in self._store.get("PromptVersion", {}).values()
-            if pv.original_prompt_id == original_prompt_id
-        ]
+        return list(self._by_original_prompt.get(original_prompt_id, ()))
 
     async def get_evaluations_for_prompt_version(self, prompt_version_id: int) -> List[EvaluationResult]:
         # This is a bit more complex as EvaluationResult is linked to AIOutput,
@@ -121,10 +162,12 @@ class MockKnowledgeBase(KnowledgeBase):
         return await self.get(IterationLog, iteration_id)
 
     async def update(self, record_id: int, update_data: BaseMPLAModel) -> Optional[BaseMPLAModel]:
-        model_name = update_data.__class__.__name__
-        if model_name in self._store and record_id in self._store[model_name]:
+        bucket = self._store.get(type(update_data), {})
+        if record_id in bucket:
             # In a real DB, you wouldn't pass the full model, but for a mock, this is fine.
-            self._store[model_name][record_id] = update_data
+            self._unindex(bucket[record_id])
+            bucket[record_id] = update_data
+            self._index(update_data)
             return update_data
         return None
 
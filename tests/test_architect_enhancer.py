@@ -0,0 +1,27 @@
+import pytest
+
+from mpla.enhancers import architect_enhancer
+from mpla.enhancers.architect_enhancer import ArchitectPromptEnhancer
+
+RESPONSE = """**Enhanced Prompt:**
+Explain quantum computing to a beginner in three short paragraphs.
+
+**Elucidation:**
+Added an audience and a length constraint."""
+
+@pytest.fixture(params=["automaton", "fallback"])
+def enhancer(request, monkeypatch) -> ArchitectPromptEnhancer:
+    """Provides an enhancer, once with the compiled heading automaton and once without."""
+    if request.param == "fallback":
+        monkeypatch.setattr(architect_enhancer, "_HEADING_AUTOMATON", None)
+    elif architect_enhancer._HEADING_AUTOMATON is None:
+        pytest.skip("pyahocorasick is not installed")
+    return ArchitectPromptEnhancer(orchestrator=None, kb=None)
+
+def test_parse_response_extracts_both_sections(enhancer: ArchitectPromptEnhancer):
+    enhanced_prompt, elucidation = enhancer._parse_response(RESPONSE)
+    assert enhanced_prompt == "Explain quantum computing to a beginner in three short paragraphs."
+    assert elucidation == "Added an audience and a length constraint."
+
+def test_parse_response_missing_heading(enhancer: ArchitectPromptEnhancer):
+    assert enhancer._parse_response("**Enhanced Prompt:** only a prompt") == (None, None)
@@ -63,4 +63,31 @@ def test_load_config_invalid_provider(tmp_path):
         yaml.dump(invalid_config_content, f)
     
     with pytest.raises(Exception): # Pydantic's ValidationError
-        load_config(path=str(config_path)) 
\ No newline at end of file
+        load_config(path=str(config_path)) 
+
+
+def test_load_config_reparses_the_file_after_it_changes(mock_config_file):
+    """Tests that cached YAML is reused until the file is modified."""
+    with patch("mpla.config.loader.yaml.safe_load", wraps=yaml.safe_load) as safe_load:
+        load_config(path=mock_config_file)
+        load_config(path=mock_config_file)
+    assert safe_load.call_count == 1
+
+    with open(mock_config_file) as f:
+        config_content = yaml.safe_load(f)
+    config_content['agent']['knowledge_base']['db_path'] = '/changed.db'
+    with open(mock_config_file, 'w') as f:
+        yaml.dump(config_content, f)
+    os.utime(mock_config_file, ns=(0, os.stat(mock_config_file).st_mtime_ns + 1_000_000))
+
+    with patch("mpla.config.loader.yaml.safe_load", wraps=yaml.safe_load) as safe_load:
+        assert load_config(path=mock_config_file).agent.knowledge_base.db_path == '/changed.db'
+    assert safe_load.call_count == 1
+
+def test_loaded_config_is_read_only(mock_config_file):
+    """Tests that a loaded config can't be modified in place."""
+    config = load_config(path=mock_config_file)
+
+    with pytest.raises(Exception): # Pydantic's ValidationError
+        config.agent.deployment_orchestrator.provider = 'openai'
+    assert hash(config.agent.deployment_orchestrator) == hash(load_config(path=mock_config_file).agent.deployment_orchestrator)
@@ -0,0 +1,84 @@
+import pytest
+import pytest_asyncio
+
+from mpla.knowledge_base.schemas import AIOutput, EvaluationResult, IterationLog, OriginalPrompt, PromptVersion
+from mpla.knowledge_base.sqlite_kb import SQLiteKnowledgeBase
+from mpla.reporting.database_reporting import DatabaseReportingModule
+
+@pytest_asyncio.fixture
+async def kb():
+    knowledge_base = SQLiteKnowledgeBase(":memory:")
+    await knowledge_base.connect()
+    yield knowledge_base
+    await knowledge_base.disconnect()
+
+async def log_iterations(kb: SQLiteKnowledgeBase, session_id: str, statuses):
+    original = await kb.add(OriginalPrompt(text="Explain relativity."))
+    for number, status in enumerate(statuses, 1):
+        version = await kb.add(PromptVersion(original_prompt_id=original.id, version_number=number, prompt_text=f"Version {number}"))
+        output = await kb.add(AIOutput(prompt_version_id=version.id, raw_output_text="output"))
+        evaluation = await kb.add(EvaluationResult(ai_output_id=output.id, metric_scores={"clarity": 0.5 * number}))
+        await kb.add(IterationLog(
+            original_prompt_id=original.id, session_id=session_id, iteration_number=number,
+            active_prompt_version_id=version.id, ai_output_id=output.id,
+            evaluation_result_id=evaluation.id, status=status
+        ))
+
+@pytest.mark.asyncio
+async def test_final_report_summarizes_iterations_with_batched_lookups(kb: SQLiteKnowledgeBase, monkeypatch):
+    await log_iterations(kb, "session-1", ["completed", "completed", "failed"])
+    async def fail_get(*args):
+        raise AssertionError("the report should not look up records one at a time")
+    monkeypatch.setattr(kb, "get", fail_get)
+
+    content = (await DatabaseReportingModule(kb).generate_final_report("session-1"))["content"]
+
+    assert content.startswith("# Final Report for Session: `session-1`")
+    assert "> Explain relativity." in content
+    assert "### Iteration 3\n**Prompt:** `Version 3`\n**Evaluation:** clarity: 1.50" in content
+    assert "**Status:** Completed Successfully" in content
+    assert content.endswith("## Best Performing Prompt\n```\nVersion 2\n```")
+
+@pytest.mark.asyncio
+async def test_final_report_layout_puts_status_after_the_iterations(kb: SQLiteKnowledgeBase):
+    await log_iterations(kb, "session-1", ["completed", "failed"])
+
+    content = (await DatabaseReportingModule(kb).generate_final_report("session-1"))["content"]
+
+    assert content == (
+        "# Final Report for Session: `session-1`\n---\n"
+        "## Initial Prompt\n> Explain relativity.\n\n\n"
+        "## Iteration Summary\n"
+        "### Iteration 1\n**Prompt:** `Version 1`\n**Evaluation:** clarity: 0.50\n\n\n"
+        "### Iteration 2\n**Prompt:** `Version 2`\n**Evaluation:** clarity: 1.00\n\n\n"
+        "---\n**Status:** Completed Successfully\n"
+        "## Best Performing Prompt\n```\nVersion 1\n```"
+    )
+
+@pytest.mark.asyncio
+async def test_stream_final_report_yields_one_chunk_per_batch(kb: SQLiteKnowledgeBase):
+    await log_iterations(kb, "session-1", ["completed", "completed", "completed"])
+    reporting = DatabaseReportingModule(kb)
+
+    chunks = [chunk async for chunk in reporting.stream_final_report("session-1", chunk_size=2)]
+
+    assert len(chunks) == 3
+    assert "### Iteration 2" in chunks[0] and "### Iteration 3" not in chunks[0]
+    assert chunks[1].startswith("### Iteration 3")
+    assert "".join(chunks) == (await reporting.generate_final_report("session-1"))["content"]
+
+@pytest.mark.asyncio
+async def test_final_report_without_iterations(kb: SQLiteKnowledgeBase):
+    report = await DatabaseReportingModule(kb).generate_final_report("missing")
+
+    assert report == {"content": "## Final Report\n\nNo iterations were found for this session."}
+
+@pytest.mark.asyncio
+async def test_report_iteration_returns_a_small_projection(kb: SQLiteKnowledgeBase):
+    original = await kb.add(OriginalPrompt(text="Explain relativity."))
+    log = IterationLog(original_prompt_id=original.id, session_id="session-1", iteration_number=1, status="completed")
+
+    summary = await DatabaseReportingModule(kb).report_iteration(log)
+
+    assert summary == {"id": summary["id"], "session_id": "session-1", "iteration_number": 1, "status": "completed"}
+    assert summary["id"] is not None
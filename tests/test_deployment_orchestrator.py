@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from mpla.core.deployment_orchestrator import DeploymentOrchestrator
+from mpla.core.exceptions import APIConnectionError
+from mpla.knowledge_base.schemas import AIOutput, PromptVersion, TargetAIProfile
+
+class ConcurrencyTrackingOrchestrator(DeploymentOrchestrator):
+    """Echoes prompts after a short delay, failing on demand, and records peak concurrency."""
+    def __init__(self):
+        self.in_flight = 0
+        self.peak = 0
+
+    async def deploy_and_collect(self, prompt_version, ai_profile):
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            if prompt_version.prompt_text == "fail":
+                raise APIConnectionError("boom")
+            return AIOutput(prompt_version_id=prompt_version.id, raw_output_data={"text": prompt_version.prompt_text})
+        finally:
+            self.in_flight -= 1
+
+def make_prompt(i: int, text: str) -> PromptVersion:
+    return PromptVersion(id=i, original_prompt_id=1, version_number=1, prompt_text=text, target_ai_profile_id=1)
+
+@pytest.mark.asyncio
+async def test_batch_preserves_order_and_bounds_concurrency():
+    orchestrator = ConcurrencyTrackingOrchestrator()
+    prompts = [make_prompt(i, f"p{i}") for i in range(10)]
+
+    results = await orchestrator.deploy_and_collect_batch(prompts, TargetAIProfile(name="m"), max_concurrency=3)
+
+    assert [r.raw_output_data["text"] for r in results] == [f"p{i}" for i in range(10)]
+    assert orchestrator.peak == 3
+
+@pytest.mark.asyncio
+async def test_batch_turns_failures_into_error_outputs():
+    orchestrator = ConcurrencyTrackingOrchestrator()
+    prompts = [make_prompt(1, "ok"), make_prompt(2, "fail")]
+
+    ok, failed = await orchestrator.deploy_and_collect_batch(prompts, TargetAIProfile(name="m"))
+
+    assert ok.raw_output_data == {"text": "ok"}
+    assert failed.prompt_version_id == 2
+    assert failed.raw_output_data["error"] == "API communication error"
@@ -0,0 +1,185 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from google.api_core import exceptions as google_exceptions
+
+from mpla.external import google_gemini_orchestrator
+from mpla.external.google_gemini_orchestrator import GoogleGeminiOrchestrator
+from mpla.knowledge_base.schemas import PromptVersion, TargetAIProfile
+
+@pytest.fixture
+def orchestrator() -> GoogleGeminiOrchestrator:
+    return GoogleGeminiOrchestrator(api_key="test-key")
+
+@pytest.mark.asyncio
+async def test_get_model_reuses_models_with_identical_settings(orchestrator: GoogleGeminiOrchestrator):
+    model = orchestrator._get_model("gemini-1.5-flash", 0.2)
+
+    assert orchestrator._get_model("gemini-1.5-flash", "0.2") is model
+    assert orchestrator._get_model("gemini-1.5-flash", 0.2, "json_object") is not model
+    assert model._async_client is orchestrator._generative_client
+
+@pytest.mark.asyncio
+async def test_get_model_evicts_least_recently_used(orchestrator: GoogleGeminiOrchestrator, monkeypatch):
+    monkeypatch.setattr(google_gemini_orchestrator, "MODEL_CACHE_SIZE", 2)
+    first = orchestrator._get_model("gemini-1.5-flash", 0.1)
+    orchestrator._get_model("gemini-1.5-flash", 0.2)
+    orchestrator._get_model("gemini-1.5-flash", 0.1)
+    orchestrator._get_model("gemini-1.5-flash", 0.3)
+
+    assert orchestrator._get_model("gemini-1.5-flash", 0.1) is first
+    assert len(orchestrator._models) == 2
+
+class FakeChunk:
+    def __init__(self, text):
+        self.text = text
+        self.parts = [text] if text else []
+
+class FakeStreamingModel:
+    async def generate_content_async(self, prompt, stream=False):
+        async def chunks():
+            for text in ("Hel", "", "lo"):
+                yield FakeChunk(text)
+        return chunks()
+
+@pytest.mark.asyncio
+async def test_stream_yields_fragments_then_assembled_output(orchestrator: GoogleGeminiOrchestrator, monkeypatch):
+    monkeypatch.setattr(orchestrator, "_get_model", lambda *args, **kwargs: FakeStreamingModel())
+    prompt_version = PromptVersion(id=3, original_prompt_id=1, version_number=1, prompt_text="Hi", target_ai_profile_id=1)
+
+    items = [item async for item in orchestrator.deploy_and_collect_stream(prompt_version, TargetAIProfile(name="m"))]
+
+    assert items[:2] == ["Hel", "lo"]
+    assert items[2].prompt_version_id == 3
+    assert items[2].raw_output_data == {"text": "Hello"}
+
+class FlakyModel:
+    """Fails with a transient error once, then answers every call."""
+    def __init__(self):
+        self.calls = 0
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        if self.calls == 1:
+            raise google_exceptions.ServiceUnavailable("try again")
+        return FakeChunk(f"echo: {prompt}")
+
+@pytest.mark.asyncio
+async def test_invoke_model_retries_transient_errors(orchestrator: GoogleGeminiOrchestrator, monkeypatch):
+    model = FlakyModel()
+    monkeypatch.setattr(orchestrator, "_get_model", lambda *args, **kwargs: model)
+    async def no_sleep(delay):
+        pass
+    monkeypatch.setattr("mpla.utils.retry.asyncio.sleep", no_sleep)
+
+    assert await orchestrator.invoke_model("Hi", temperature=0.7) == {"text": "echo: Hi"}
+    assert model.calls == 2
+
+class FakeCacheClient:
+    """Records context cache creations and deletions; declines prefixes listed in `declined`."""
+    def __init__(self, declined=()):
+        self.declined = set(declined)
+        self.created = []
+        self.deleted = []
+
+    async def create_cached_content(self, request):
+        text = request.cached_content.contents[0].parts[0].text
+        if text in self.declined:
+            raise ValueError("too small to cache")
+        await asyncio.sleep(0)
+        self.created.append(text)
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}", expire_time=datetime.now(timezone.utc) + timedelta(hours=1))
+
+    async def delete_cached_content(self, name):
+        self.deleted.append(name)
+
+def use_cache_client(orchestrator: GoogleGeminiOrchestrator, client: FakeCacheClient) -> None:
+    orchestrator._cache_client = client
+    orchestrator._get_cache_client = lambda: client
+
+@pytest.mark.asyncio
+async def test_history_caches_only_the_first_turn(orchestrator: GoogleGeminiOrchestrator, monkeypatch):
+    client = FakeCacheClient()
+    use_cache_client(orchestrator, client)
+    chats = []
+    class FakeModel:
+        def start_chat(self, history=None):
+            chats.append(history)
+            return "chat"
+    monkeypatch.setattr(orchestrator, "_get_model", lambda *args, **kwargs: FakeModel())
+    async def call_gemini(target, content):
+        return f"reply to {content}"
+    monkeypatch.setattr(orchestrator, "_call_gemini", call_gemini)
+
+    for turn in ("first draft", "second draft"):
+        output = await orchestrator.deploy_and_collect_from_history(["meta-prompt", "ok", turn, "revise"], TargetAIProfile(name="m"))
+
+    assert output.raw_output_data == {"text": "reply to revise"}
+    assert client.created == ["meta-prompt"]
+    assert [[message["parts"][0] for message in history] for history in chats] == [["ok", "first draft"], ["ok", "second draft"]]
+
+@pytest.mark.asyncio
+async def test_declined_prefixes_are_retried_later(orchestrator: GoogleGeminiOrchestrator, monkeypatch):
+    client = FakeCacheClient(declined={"tiny"})
+    use_cache_client(orchestrator, client)
+    prefix = [{"role": "user", "parts": ["tiny"]}]
+
+    assert await orchestrator._get_context_cache("m", prefix) is None
+    client.declined.clear()
+    assert await orchestrator._get_context_cache("m", prefix) is None
+
+    monkeypatch.setattr(google_gemini_orchestrator, "CONTEXT_CACHE_RETRY_S", 0.0)
+    assert await orchestrator._get_context_cache("m", prefix) is not None
+    assert client.created == ["tiny"]
+
+@pytest.mark.asyncio
+async def test_context_caches_are_bounded_and_deleted_on_close(orchestrator: GoogleGeminiOrchestrator, monkeypatch):
+    monkeypatch.setattr(google_gemini_orchestrator, "CONTEXT_CACHE_SIZE", 2)
+    client = FakeCacheClient()
+    use_cache_client(orchestrator, client)
+    async def close_transport():
+        pass
+    client.transport = SimpleNamespace(close=close_transport)
+    def prefix(text):
+        return [{"role": "user", "parts": [text]}]
+
+    first = await orchestrator._get_context_cache("m", prefix("first"))
+    await orchestrator._get_context_cache("m", prefix("second"))
+    assert await orchestrator._get_context_cache("m", prefix("first")) is first
+    await orchestrator._get_context_cache("m", prefix("third"))
+    assert client.deleted == ["cachedContents/2"]
+    assert len(orchestrator._context_caches) == 2
+
+    await orchestrator.close()
+    assert sorted(client.deleted) == ["cachedContents/1", "cachedContents/2", "cachedContents/3"]
+    assert not orchestrator._context_caches
+
+@pytest.mark.asyncio
+async def test_concurrent_first_calls_share_one_context_cache(orchestrator: GoogleGeminiOrchestrator):
+    client = FakeCacheClient()
+    use_cache_client(orchestrator, client)
+    prefix = [{"role": "user", "parts": ["shared"]}]
+
+    caches = await asyncio.gather(*(orchestrator._get_context_cache("m", prefix) for _ in range(3)))
+
+    assert client.created == ["shared"]
+    assert all(cached is caches[0] for cached in caches)
+
+class HangingModel:
+    async def generate_content_async(self, prompt):
+        await asyncio.sleep(1)
+
+@pytest.mark.asyncio
+async def test_timeouts_are_reported_as_error_outputs(monkeypatch):
+    orchestrator = GoogleGeminiOrchestrator(api_key="test-key", call_timeout_s=0.01)
+    monkeypatch.setattr(orchestrator, "_get_model", lambda *args, **kwargs: HangingModel())
+    prompt_version = PromptVersion(id=3, original_prompt_id=1, version_number=1, prompt_text="Hi", target_ai_profile_id=1)
+
+    output = await orchestrator.deploy_and_collect(prompt_version, TargetAIProfile(name="m", capabilities={"temperature": 0.7}))
+
+    assert output.prompt_version_id == 3
+    assert output.raw_output_data["error"] == "API communication error"
+    assert "did not complete" in output.raw_output_data["details"]
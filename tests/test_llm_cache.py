@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from mpla.core.exceptions import APIConnectionError
+from mpla.external.llm_cache import InMemoryLRUBackend, LLMCache, SingleFlight
+
+@pytest.mark.parametrize("temperature, expected", [(0, True), (0.0, True), (None, False), (0.7, False)])
+def test_is_cacheable_only_for_explicit_zero_temperature(temperature, expected):
+    assert LLMCache.is_cacheable(temperature) is expected
+
+def test_make_key_is_stable_and_parameter_sensitive():
+    key = LLMCache.make_key("model-a", "Hello", "json_object", max_tokens=10)
+
+    assert key == LLMCache.make_key("model-a", "Hello", "json_object", max_tokens=10)
+    assert key != LLMCache.make_key("model-b", "Hello", "json_object", max_tokens=10)
+    assert key != LLMCache.make_key("model-a", "Hello", None, max_tokens=10)
+    assert key != LLMCache.make_key("model-a", "Hello", "json_object", max_tokens=20)
+
+@pytest.mark.asyncio
+async def test_cache_round_trip_updates_stats():
+    cache = LLMCache()
+    key = LLMCache.make_key("model-a", "Hello")
+
+    assert await cache.get(key) is None
+    await cache.set(key, {"text": "Hi"})
+
+    assert await cache.get(key) == {"text": "Hi"}
+    assert cache.stats == {"hits": 1, "misses": 1}
+
+@pytest.mark.asyncio
+async def test_lru_backend_evicts_least_recently_used():
+    backend = InMemoryLRUBackend(max_entries=2)
+    await backend.set("a", b"1")
+    await backend.set("b", b"2")
+    await backend.get("a")
+    await backend.set("c", b"3")
+
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+    assert await backend.get("c") == b"3"
+
+@pytest.mark.asyncio
+async def test_lru_backend_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("mpla.external.llm_cache.time.monotonic", lambda: now[0])
+    backend = InMemoryLRUBackend()
+    await backend.set("a", b"1", ttl=10)
+
+    assert await backend.get("a") == b"1"
+    now[0] += 11
+    assert await backend.get("a") is None
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"text": "shared"}
+
+    results = await asyncio.gather(*(flight.do("k", call) for _ in range(5)))
+
+    assert results == [{"text": "shared"}] * 5
+    assert len(calls) == 1
+    assert await flight.do("k", call) == {"text": "shared"}
+    assert len(calls) == 2
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_failures():
+    flight = SingleFlight()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise APIConnectionError("down")
+
+    results = await asyncio.gather(*(flight.do("k", call) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(r, APIConnectionError) for r in results)
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelling_the_leading_caller():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def call():
+        await release.wait()
+        return {"text": "shared"}
+
+    leader = asyncio.create_task(flight.do("k", call))
+    await asyncio.sleep(0)
+    joiner = asyncio.create_task(flight.do("k", call))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await joiner == {"text": "shared"}
+    assert leader.cancelled()
+
+@pytest.mark.asyncio
+async def test_single_flight_cancels_the_call_once_every_caller_left():
+    flight = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def call():
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.create_task(flight.do("k", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+    for caller in callers:
+        caller.cancel()
+
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    assert not flight._calls
@@ -7,15 +7,23 @@ from .mocks import (
     MockEvaluationEngine,
     MockLearningRefinementModule,
     MockReportingModule,
+    MockSystemDiagnoser,
 )
 from mpla.knowledge_base.schemas import EvaluationResult, PromptVersion
 
-@pytest.fixture
-def mock_agent() -> MPLAgent:
-    """Provides a fully mocked MPLAgent for testing."""
+@pytest.fixture(scope="session")
+def mock_stores() -> tuple[MockKnowledgeBase, MockReportingModule]:
+    """The stateful mocks, created once and reset by `mock_agent` before each test."""
     kb = MockKnowledgeBase()
     # The reporting module needs a reference to the KB to build its final report
-    reporting_module = MockReportingModule(kb=kb)
+    return kb, MockReportingModule(kb=kb)
+
+@pytest.fixture
+def mock_agent(mock_stores) -> MPLAgent:
+    """Provides a fully mocked MPLAgent for testing. Tests may swap its components."""
+    kb, reporting_module = mock_stores
+    kb.reset()
+    reporting_module.reset()
     agent = MPLAgent(
         knowledge_base=kb,
         prompt_enhancer=MockPromptEnhancer(),
@@ -23,9 +31,16 @@ def mock_agent() -> MPLAgent:
         evaluation_engine=MockEvaluationEngine(),
         learning_refinement_module=MockLearningRefinementModule(),
         reporting_module=reporting_module,
+        system_diagnoser=MockSystemDiagnoser(),
     )
     return agent
 
+async def run_cycle(agent: MPLAgent, **kwargs) -> dict:
+    """Drains `run_refinement_cycle` and returns the data of its closing `final_report` event."""
+    events = [event async for event in agent.run_refinement_cycle(**kwargs)]
+    assert events[-1]["event"] == "final_report"
+    return events[-1]["data"]
+
 @pytest.mark.asyncio
 async def test_run_refinement_cycle_successful_run(mock_agent: MPLAgent):
     """
@@ -36,7 +51,8 @@ async def test_run_refinement_cycle_successful_run(mock_agent: MPLAgent):
     initial_metrics = {"target_satisfaction": 4.5}
     max_iterations = 3
 
-    final_report = await mock_agent.run_refinement_cycle(
+    final_report = await run_cycle(
+        mock_agent,
         original_prompt_text=original_prompt,
         target_ai_profile_data=target_profile,
         initial_performance_metrics=initial_metrics,
@@ -79,7 +95,8 @@ async def test_run_refinement_cycle_meets_criteria_early(mock_agent: MPLAgent):
 
     mock_agent.evaluation_engine = HighScoreEvaluationEngine()
 
-    final_report = await mock_agent.run_refinement_cycle(
+    final_report = await run_cycle(
+        mock_agent,
         original_prompt_text="This prompt is already perfect.",
         target_ai_profile_data={"name": "TestAI"},
         initial_performance_metrics={"target_satisfaction": 4.5},
@@ -103,7 +120,8 @@ async def test_run_refinement_cycle_handles_deployment_failure(mock_agent: MPLAg
 
     mock_agent.deployment_orchestrator = FailingOrchestrator()
 
-    await mock_agent.run_refinement_cycle(
+    await run_cycle(
+        mock_agent,
         original_prompt_text="This will fail.",
         target_ai_profile_data={"name": "TestAI"},
         initial_performance_metrics={"target_satisfaction": 4.0},
@@ -126,7 +144,8 @@ async def test_run_refinement_cycle_handles_evaluation_failure(mock_agent: MPLAg
 
     mock_agent.evaluation_engine = FailingEvaluationEngine()
 
-    await mock_agent.run_refinement_cycle(
+    await run_cycle(
+        mock_agent,
         original_prompt_text="This will fail during evaluation.",
         target_ai_profile_data={"name": "TestAI"},
         initial_performance_metrics={"target_satisfaction": 4.0},
@@ -150,7 +169,8 @@ async def test_run_refinement_cycle_handles_learning_failure(mock_agent: MPLAgen
 
     mock_agent.learning_refinement_module = FailingLearningModule()
 
-    await mock_agent.run_refinement_cycle(
+    await run_cycle(
+        mock_agent,
         original_prompt_text="Learning will fail.",
         target_ai_profile_data={"name": "TestAI"},
         initial_performance_metrics={"target_satisfaction": 4.5},
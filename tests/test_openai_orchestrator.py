@@ -0,0 +1,134 @@
+import httpx
+import pytest
+
+from mpla.core.exceptions import APIResponseError
+from mpla.external.openai_orchestrator import OpenAIDeploymentOrchestrator
+from mpla.knowledge_base.schemas import PromptVersion, TargetAIProfile
+from mpla.utils.serialization import dumps, loads
+
+def make_prompt(i: int, text: str) -> PromptVersion:
+    return PromptVersion(id=i, original_prompt_id=1, version_number=1, prompt_text=text, target_ai_profile_id=1)
+
+def completion(text: str) -> dict:
+    return {"choices": [{"message": {"role": "assistant", "content": text}}]}
+
+class FakeBatchAPI:
+    """Serves the Files and Batches endpoints, answering each request with its prompt reversed."""
+    def __init__(self, final_status: str = "completed"):
+        self.final_status = final_status
+        self.polls = 0
+        self.input_lines = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert request.headers["Authorization"] == "Bearer test-key"
+        path = request.url.path
+        if path == "/v1/files" and request.method == "POST":
+            body = request.content
+            start = body.index(b"{")
+            end = body.rindex(b"}") + 1
+            self.input_lines = [loads(line) for line in body[start:end].splitlines()]
+            return httpx.Response(200, json={"id": "file-in"})
+        if path == "/v1/batches":
+            return httpx.Response(200, json={"id": "batch-1", "status": "validating"})
+        if path == "/v1/batches/batch-1":
+            self.polls += 1
+            status = self.final_status if self.polls >= 2 else "in_progress"
+            return httpx.Response(200, json={"id": "batch-1", "status": status, "output_file_id": "file-out"})
+        if path == "/v1/files/file-out/content":
+            lines = [
+                dumps({
+                    "custom_id": line["custom_id"],
+                    "response": {"status_code": 200, "body": completion(line["body"]["messages"][0]["content"][::-1])},
+                })
+                for line in self.input_lines[:-1] # Drop the last request to simulate a missing result.
+            ]
+            return httpx.Response(200, content="\n".join(lines).encode())
+        return httpx.Response(404)
+
+def make_orchestrator(api: FakeBatchAPI) -> OpenAIDeploymentOrchestrator:
+    orchestrator = OpenAIDeploymentOrchestrator(api_key="test-key")
+    orchestrator.client = httpx.AsyncClient(
+        base_url=orchestrator.api_base,
+        headers=orchestrator.client.headers,
+        transport=httpx.MockTransport(api)
+    )
+    return orchestrator
+
+@pytest.mark.asyncio
+async def test_batch_offline_maps_results_back_in_order():
+    api = FakeBatchAPI()
+    orchestrator = make_orchestrator(api)
+    prompts = [make_prompt(1, "abc"), make_prompt(2, "xyz"), make_prompt(3, "lost")]
+
+    outputs = await orchestrator.deploy_and_collect_batch_offline(
+        prompts, TargetAIProfile(name="gpt-4o-mini", capabilities={"temperature": 0.5}), poll_interval_s=0
+    )
+
+    assert [line["body"]["temperature"] for line in api.input_lines] == [0.5, 0.5, 0.5]
+    assert [o.raw_output_data.get("text") for o in outputs[:2]] == ["cba", "zyx"]
+    assert outputs[2].prompt_version_id == 3
+    assert outputs[2].raw_output_data["error"] == "Missing from batch output"
+
+@pytest.mark.asyncio
+async def test_batch_offline_raises_when_batch_fails():
+    orchestrator = make_orchestrator(FakeBatchAPI(final_status="failed"))
+
+    with pytest.raises(APIResponseError):
+        await orchestrator.deploy_and_collect_batch_offline(
+            [make_prompt(1, "abc")], TargetAIProfile(name="gpt-4o-mini"), poll_interval_s=0
+        )
+
+def sse_handler(request: httpx.Request) -> httpx.Response:
+    assert loads(request.content)["stream"] is True
+    events = [
+        dumps({"choices": [{"delta": {"role": "assistant"}}]}),
+        dumps({"choices": [{"delta": {"content": "Hel"}}]}),
+        dumps({"choices": [{"delta": {"content": "lo"}}]}),
+        "[DONE]",
+    ]
+    return httpx.Response(200, content="".join(f"data: {event}\n\n" for event in events).encode())
+
+@pytest.mark.asyncio
+async def test_stream_yields_fragments_then_assembled_output():
+    orchestrator = OpenAIDeploymentOrchestrator(api_key="test-key")
+    orchestrator.client = httpx.AsyncClient(base_url=orchestrator.api_base, transport=httpx.MockTransport(sse_handler))
+
+    items = [item async for item in orchestrator.deploy_and_collect_stream(make_prompt(7, "Hi"), TargetAIProfile(name="m"))]
+
+    assert items[:2] == ["Hel", "lo"]
+    assert items[2].prompt_version_id == 7
+    assert items[2].raw_output_data == {"text": "Hello"}
+
+@pytest.mark.asyncio
+async def test_deploy_retries_rate_limited_requests():
+    statuses = [429, 503, 200]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if status != 200:
+            return httpx.Response(status, headers={"Retry-After": "0"}, json={"error": {"message": "slow down"}})
+        return httpx.Response(200, json=completion("Paris"))
+
+    orchestrator = OpenAIDeploymentOrchestrator(api_key="test-key")
+    orchestrator.client = httpx.AsyncClient(base_url=orchestrator.api_base, transport=httpx.MockTransport(handler))
+
+    output = await orchestrator.deploy_and_collect(make_prompt(1, "Capital of France?"), TargetAIProfile(name="m"))
+
+    assert output.raw_output_data == {"text": "Paris"}
+    assert statuses == []
+
+@pytest.mark.asyncio
+async def test_deploy_does_not_retry_client_errors():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(400, json={"error": {"message": "bad request"}})
+
+    orchestrator = OpenAIDeploymentOrchestrator(api_key="test-key")
+    orchestrator.client = httpx.AsyncClient(base_url=orchestrator.api_base, transport=httpx.MockTransport(handler))
+
+    output = await orchestrator.deploy_and_collect(make_prompt(1, "?"), TargetAIProfile(name="m"))
+
+    assert output.raw_output_data["error"] == "HTTP 400"
+    assert len(calls) == 1
@@ -0,0 +1,170 @@
+import pytest
+
+pytest.importorskip("greenlet") # SQLAlchemy's asyncio extension runs on greenlet
+
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload
+from sqlmodel import select, text, update
+
+from mpla.knowledge_base.orm import (
+    bulk_log_iterations, copy_iteration_logs, create_engine, create_tables, get_target_ai_profile,
+    invalidate_target_ai_profiles, make_session_factory, persist_iteration, read_only
+)
+from mpla.knowledge_base.schemas import (
+    AIOutput, EvaluationResult, IterationLog, IterationStatus, OriginalPrompt, PromptVersion, TargetAIProfile
+)
+
+SESSION_ID = "5f0c6c1e-8a59-4b8e-9d3c-2f1d1b8e6a41"
+
+@pytest.mark.asyncio
+async def test_session_factory_writes_and_reads_back():
+    engine = create_engine("sqlite+aiosqlite://")
+    await create_tables(engine)
+    factory = make_session_factory(engine)
+
+    async with factory() as session, session.begin():
+        prompt = OriginalPrompt(text="Explain relativity.")
+        session.add(prompt)
+    async with factory() as session:
+        stored = (await session.exec(select(OriginalPrompt))).one()
+
+    assert prompt.id == stored.id
+    assert stored.text == "Explain relativity."
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_bulk_log_iterations_returns_ids_in_row_order():
+    engine = create_engine("sqlite+aiosqlite://", insertmanyvalues_page_size=2)
+    await create_tables(engine)
+    factory = make_session_factory(engine)
+    rows = [
+        {"original_prompt_id": 1, "session_id": SESSION_ID, "iteration_number": i,
+         "active_prompt_version_id": i, "ai_output_id": i, "evaluation_result_id": i}
+        for i in (3, 1, 2)
+    ]
+
+    async with factory() as session, session.begin():
+        ids = await bulk_log_iterations(session, rows)
+    async with factory() as session:
+        logs = [await session.get(IterationLog, record_id) for record_id in ids]
+
+    assert [log.iteration_number for log in logs] == [3, 1, 2]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_read_only_queries_load_only_requested_relationships():
+    engine = create_engine("sqlite+aiosqlite://")
+    await create_tables(engine)
+    factory = make_session_factory(engine)
+    async with factory() as session, session.begin():
+        prompt = OriginalPrompt(text="Explain relativity.")
+        session.add(prompt)
+        await session.flush()
+        await bulk_log_iterations(session, [{
+            "original_prompt_id": prompt.id, "session_id": SESSION_ID, "iteration_number": 1,
+            "active_prompt_version_id": 1, "ai_output_id": 1, "evaluation_result_id": 1
+        }])
+
+    async with factory() as session:
+        statement = read_only(select(IterationLog)).options(selectinload(IterationLog.original_prompt))
+        log = (await session.exec(statement)).one()
+
+    assert log.original_prompt.text == "Explain relativity."
+    with pytest.raises(InvalidRequestError):
+        log.active_prompt_version
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_copy_iteration_logs_falls_back_to_inserts_off_postgres():
+    engine = create_engine("sqlite+aiosqlite://")
+    await create_tables(engine)
+    factory = make_session_factory(engine)
+    rows = [
+        {"original_prompt_id": 1, "session_id": SESSION_ID, "iteration_number": i,
+         "active_prompt_version_id": i, "ai_output_id": i, "evaluation_result_id": i}
+        for i in range(1, 4)
+    ]
+
+    async with factory() as session, session.begin():
+        assert await copy_iteration_logs(session, rows) == 3
+    async with factory() as session:
+        logs = (await session.exec(select(IterationLog))).all()
+
+    assert [log.iteration_number for log in logs] == [1, 2, 3]
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_target_ai_profiles_are_cached_across_sessions():
+    engine = create_engine("sqlite+aiosqlite://")
+    await create_tables(engine)
+    factory = make_session_factory(engine)
+    invalidate_target_ai_profiles()
+    async with factory() as session, session.begin():
+        session.add(TargetAIProfile(name="gemini", capabilities={"temperature": 0}))
+
+    async with factory() as session:
+        first = await get_target_ai_profile(session, 1)
+    async with factory() as session:
+        await session.exec(update(TargetAIProfile).values(name="renamed"))
+        await session.commit()
+        cached = await get_target_ai_profile(session, 1)
+    invalidate_target_ai_profiles()
+    async with factory() as session:
+        refreshed = await get_target_ai_profile(session, 1)
+
+    assert cached is first
+    assert cached.name == "gemini"
+    assert refreshed.name == "renamed"
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_persist_iteration_links_and_commits_the_bundle(tmp_path):
+    engine = create_engine(f"sqlite+aiosqlite:///{tmp_path / 'mpla.db'}")
+    await create_tables(engine)
+    factory = make_session_factory(engine)
+    async with factory() as session:
+        assert (await session.exec(text("PRAGMA journal_mode"))).scalar() == "wal"
+        prompt = OriginalPrompt(text="Explain relativity.")
+        session.add(prompt)
+        await session.commit()
+
+        log = await persist_iteration(
+            session,
+            PromptVersion(original_prompt_id=prompt.id, version_number=1, prompt_text="v1"),
+            AIOutput(target_ai_profile_id=1, raw_output_data={"text": "answer"}),
+            EvaluationResult(metric_scores={"overall_satisfaction": 4}),
+            IterationLog(original_prompt_id=prompt.id, session_id=SESSION_ID, iteration_number=1)
+        )
+
+    async with factory() as session:
+        stored = await session.get(IterationLog, log.id)
+        output = await session.get(AIOutput, stored.ai_output_id)
+        evaluation = await session.get(EvaluationResult, stored.evaluation_result_id)
+
+    assert output.prompt_version_id == stored.active_prompt_version_id
+    assert evaluation.ai_output_id == output.id
+    await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_iteration_logs_match_across_write_paths():
+    engine = create_engine("sqlite+aiosqlite://")
+    await create_tables(engine)
+    factory = make_session_factory(engine)
+    row = {"original_prompt_id": 1, "session_id": SESSION_ID, "active_prompt_version_id": 1, "ai_output_id": 1, "evaluation_result_id": 1}
+
+    async with factory() as session, session.begin():
+        session.add(IterationLog(**row, iteration_number=1, status="evaluated"))
+        await bulk_log_iterations(session, [{**row, "iteration_number": 2, "status": "completed"}])
+        await session.exec(text(
+            "INSERT INTO iterationlog (original_prompt_id, session_id, iteration_number, active_prompt_version_id,"
+            " ai_output_id, evaluation_result_id, status) VALUES (1, :session_id, 3, 1, 1, 1, 'failed')"
+        ), params={"session_id": SESSION_ID})
+    async with factory() as session:
+        stored = (await session.exec(text("SELECT session_id, status FROM iterationlog ORDER BY iteration_number"))).all()
+        logs = (await session.exec(
+            read_only(select(IterationLog)).where(IterationLog.session_id == SESSION_ID).order_by(IterationLog.iteration_number)
+        )).all()
+
+    assert [tuple(r) for r in stored] == [(SESSION_ID, "evaluated"), (SESSION_ID, "completed"), (SESSION_ID, "failed")]
+    assert [log.status for log in logs] == [IterationStatus.evaluated, IterationStatus.completed, IterationStatus.failed]
+    await engine.dispose()
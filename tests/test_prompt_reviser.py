@@ -0,0 +1,59 @@
+import pytest
+
+from mpla.core.prompt_reviser import MAX_REVISE_CHARS, PromptReviser
+
+class RecordingOrchestrator:
+    """Returns a fixed revision and records every prompt it is asked to run."""
+    def __init__(self):
+        self.prompts = []
+
+    async def invoke_model(self, prompt, temperature, **kwargs):
+        self.prompts.append(prompt)
+        return {"text": "  Revised prompt.  "}
+
+@pytest.fixture
+def orchestrator() -> RecordingOrchestrator:
+    return RecordingOrchestrator()
+
+@pytest.fixture
+def reviser(orchestrator: RecordingOrchestrator) -> PromptReviser:
+    return PromptReviser(
+        orchestrator=orchestrator,
+        meta_prompt_template="Prompt: {prompt}\nReport: {analysis_report}",
+    )
+
+@pytest.mark.asyncio
+async def test_revise_calls_llm_when_flaws_found(reviser: PromptReviser, orchestrator: RecordingOrchestrator):
+    revised = await reviser.revise("Original.", {"flaws_found": True, "feedback_summary": "Too vague."})
+
+    assert revised == "Revised prompt."
+    assert len(orchestrator.prompts) == 1
+    assert orchestrator.prompts[0].startswith("Prompt: Original.\nReport: {")
+    assert '"feedback_summary": "Too vague."' in orchestrator.prompts[0]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("report", [
+    {"flaws_found": False},
+    {},
+    {"flaws_found": [{"severity": "info"}, {"severity": "Trivial"}]},
+])
+async def test_revise_skips_llm_without_actionable_flaws(reviser: PromptReviser, orchestrator: RecordingOrchestrator, report):
+    assert await reviser.revise("Original.", report) == "Original."
+    assert orchestrator.prompts == []
+    assert reviser.skipped_revisions == 1
+
+@pytest.mark.asyncio
+async def test_revise_skips_oversized_prompt(reviser: PromptReviser, orchestrator: RecordingOrchestrator):
+    prompt = "x" * (MAX_REVISE_CHARS + 1)
+    assert await reviser.revise(prompt, {"flaws_found": [{"severity": "major"}]}) == prompt
+    assert orchestrator.prompts == []
+
+@pytest.mark.parametrize("template", [
+    "Prompt: {prompt}\nReport: {analysis_report}\nSchema: {{\"key\": \"value\"}}",
+    "Report first: {analysis_report} then {prompt}, twice: {prompt}",
+    "Uses a spec: {prompt!r} {analysis_report}",
+])
+def test_render_matches_str_format(orchestrator: RecordingOrchestrator, template: str):
+    reviser = PromptReviser(orchestrator=orchestrator, meta_prompt_template=template)
+    expected = template.format(prompt="P {x}", analysis_report='{"a": 1}')
+    assert reviser._render("P {x}", '{"a": 1}') == expected
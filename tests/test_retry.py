@@ -0,0 +1,53 @@
+import pytest
+
+from mpla.utils import retry
+from mpla.utils.retry import retry_async
+
+class Flaky:
+    """Raises the queued errors in order, then returns "ok"."""
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "ok"
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+
+    async def fake_sleep(delay):
+        recorded.append(delay)
+
+    monkeypatch.setattr(retry.asyncio, "sleep", fake_sleep)
+    return recorded
+
+@pytest.mark.asyncio
+async def test_retries_until_success_with_bounded_backoff(sleeps):
+    func = Flaky(ConnectionError(), ConnectionError())
+
+    assert await retry_async(func, lambda e: True, min_wait_s=0.5, max_wait_s=8.0) == "ok"
+    assert func.calls == 3
+    assert len(sleeps) == 2
+    assert all(0.5 <= delay <= 8.0 for delay in sleeps)
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_is_raised_immediately(sleeps):
+    func = Flaky(ValueError("bad request"))
+
+    with pytest.raises(ValueError):
+        await retry_async(func, lambda e: isinstance(e, ConnectionError))
+    assert func.calls == 1
+    assert sleeps == []
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_attempts_and_honors_retry_after(sleeps):
+    func = Flaky(*(ConnectionError() for _ in range(3)))
+
+    with pytest.raises(ConnectionError):
+        await retry_async(func, lambda e: True, max_attempts=3, retry_after=lambda e: 1.5)
+    assert func.calls == 3
+    assert sleeps == [1.5, 1.5]
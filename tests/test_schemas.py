@@ -0,0 +1,166 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
+from sqlmodel import Session, SQLModel, select
+
+from mpla.knowledge_base.schemas import (
+    AIOutput, EvaluationResult, FastJSON, IterationLog, IterationLogDTO, OriginalPrompt, PromptVersion, TargetAIProfile
+)
+from mpla.utils.serialization import loads
+
+SESSION_ID = "5f0c6c1e-8a59-4b8e-9d3c-2f1d1b8e6a41"
+
+def test_fast_json_round_trips_through_sqlite():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(TargetAIProfile(name="gemini", capabilities={"temperature": 0.2, "tags": ["fast"]}))
+        session.commit()
+
+        stored = session.exec(text("SELECT capabilities FROM targetaiprofile")).scalar_one()
+        profile = session.get(TargetAIProfile, 1)
+
+    assert isinstance(stored, str)
+    assert profile.capabilities == {"temperature": 0.2, "tags": ["fast"]}
+
+def test_fast_json_is_jsonb_on_postgres():
+    ddl = str(CreateTable(TargetAIProfile.__table__).compile(dialect=postgresql.dialect()))
+
+    assert "capabilities JSONB" in ddl
+
+def test_fast_json_passes_none_through():
+    column_type = FastJSON()
+    dialect = create_engine("sqlite://").dialect
+
+    assert column_type.process_bind_param(None, dialect) is None
+    assert column_type.process_result_value(None, dialect) is None
+
+def test_timestamps_are_set_in_python_and_kept_by_the_database():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    profile = TargetAIProfile(name="gemini")
+    created_at = profile.created_at
+    assert created_at is not None and created_at.tzinfo is not None
+
+    with Session(engine) as session:
+        session.add(profile)
+        session.commit()
+        session.refresh(profile)
+
+    assert profile.created_at.replace(tzinfo=None) == created_at.replace(tzinfo=None)
+    assert profile.updated_at is not None
+
+def test_bulk_create_returns_ids_in_row_order():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    rows = [{"name": f"profile {i}", "capabilities": {"rank": i}} for i in range(5)]
+
+    with Session(engine) as session:
+        ids = TargetAIProfile.bulk_create(session, rows, chunk_size=2)
+        session.commit()
+        profiles = [session.get(TargetAIProfile, record_id) for record_id in ids]
+
+    assert len(set(ids)) == 5
+    assert [p.capabilities["rank"] for p in profiles] == [0, 1, 2, 3, 4]
+    assert all(p.created_at is not None for p in profiles)
+
+def test_ai_output_payload_is_loaded_on_first_access():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(AIOutput(prompt_version_id=1, target_ai_profile_id=1, raw_output_data={"text": "long answer"}))
+        session.commit()
+
+    with Session(engine) as session:
+        output = session.exec(select(AIOutput)).one()
+        assert "raw_output_data" not in output.__dict__
+        assert output.raw_output_data == {"text": "long answer"}
+
+def make_session_log(iterations: int):
+    """Returns an engine holding one refinement session (SESSION_ID) with the given number of iterations."""
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        prompt = OriginalPrompt(text="Explain relativity.")
+        session.add(prompt)
+        session.flush()
+        for i in range(1, iterations + 1):
+            version = PromptVersion(original_prompt_id=prompt.id, version_number=i, prompt_text=f"v{i}")
+            session.add(version)
+            session.flush()
+            output = AIOutput(prompt_version_id=version.id, target_ai_profile_id=1, raw_output_data={})
+            session.add(output)
+            session.flush()
+            evaluation = EvaluationResult(ai_output_id=output.id, metric_scores={})
+            session.add(evaluation)
+            session.flush()
+            session.add(IterationLog(
+                original_prompt_id=prompt.id, session_id=SESSION_ID, iteration_number=i,
+                active_prompt_version_id=version.id, ai_output_id=output.id, evaluation_result_id=evaluation.id
+            ))
+        session.commit()
+    return engine
+
+def test_iteration_log_relationships_load_without_a_query_per_log():
+    engine = make_session_log(3)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    with Session(engine) as session:
+        logs = session.exec(select(IterationLog)).all()
+        versions = [log.active_prompt_version.prompt_text for log in logs]
+        scores = [log.evaluation_result.metric_scores for log in logs]
+
+    assert versions == ["v1", "v2", "v3"]
+    assert scores == [{}, {}, {}]
+    assert len(statements) == 5 # the logs, then one query per relationship
+
+def test_hot_lookups_are_indexed():
+    iteration_indexes = {index.name: [c.name for c in index.columns] for index in IterationLog.__table__.indexes}
+    version_indexes = {index.name: [c.name for c in index.columns] for index in PromptVersion.__table__.indexes}
+
+    assert iteration_indexes["ix_iterlog_session_iter"] == ["session_id", "iteration_number"]
+    assert version_indexes["ix_pv_orig_ver"] == ["original_prompt_id", "version_number"]
+
+def test_iteration_log_dtos_are_plain_slotted_rows():
+    engine = make_session_log(2)
+
+    with Session(engine) as session:
+        dtos = IterationLogDTO.select_for_session(session, SESSION_ID)
+
+    assert [dto.iteration_number for dto in dtos] == [1, 2]
+    assert not hasattr(dtos[0], "__dict__")
+
+def test_to_json_bytes_matches_model_dump_json():
+    prompt = OriginalPrompt(id=1, text="Describe quantum computing.", created_at=datetime(2024, 1, 2, tzinfo=timezone.utc))
+
+    assert loads(prompt.to_json_bytes()) == loads(prompt.model_dump_json())
+
+def test_iteration_log_dto_serializes_without_the_orm(monkeypatch):
+    dto = IterationLogDTO(
+        id=1, original_prompt_id=1, session_id=SESSION_ID, iteration_number=1, active_prompt_version_id=2,
+        ai_output_id=3, evaluation_result_id=4, status="evaluated",
+        created_at=datetime(2024, 1, 2, tzinfo=timezone.utc), updated_at=datetime(2024, 1, 3, tzinfo=timezone.utc)
+    )
+    expected = {
+        "id": 1, "original_prompt_id": 1, "session_id": SESSION_ID, "iteration_number": 1, "active_prompt_version_id": 2,
+        "ai_output_id": 3, "evaluation_result_id": 4, "status": "evaluated",
+        "created_at": "2024-01-02T00:00:00+00:00", "updated_at": "2024-01-03T00:00:00+00:00"
+    }
+
+    assert loads(dto.to_json_bytes()) == expected
+    monkeypatch.setattr("mpla.utils.serialization.orjson", None)
+    assert loads(dto.to_json_bytes()) == expected
+
+def test_from_trusted_matches_regular_construction_and_starts_clean():
+    values = {"id": 7, "original_prompt_id": 1, "version_number": 2, "prompt_text": "Text", "unknown_column": "ignored"}
+
+    record = PromptVersion.from_trusted(values)
+    record.prompt_text = "Edited"
+
+    # Timestamps are excluded: both records get their own creation time.
+    volatile = {"prompt_text", "created_at", "updated_at"}
+    assert record.model_dump(exclude=volatile) == PromptVersion(id=7, original_prompt_id=1, version_number=2, prompt_text="Text").model_dump(exclude=volatile)
+    assert record.model_fields_set == {"prompt_text"}
+    assert record.prompt_text == "Edited"
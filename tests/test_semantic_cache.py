@@ -0,0 +1,38 @@
+import pytest
+
+from mpla.external.semantic_cache import SemanticCache
+
+EMBEDDINGS = {
+    "What's the capital of France?": [1.0, 0.0, 0.1],
+    "Capital of France?": [0.98, 0.0, 0.12],
+    "Write a haiku about autumn.": [0.0, 1.0, 0.0],
+}
+
+@pytest.fixture
+def cache() -> SemanticCache:
+    return SemanticCache(embedder=EMBEDDINGS.__getitem__, threshold=0.92)
+
+@pytest.mark.asyncio
+async def test_paraphrase_hits_cached_response(cache: SemanticCache):
+    await cache.set("model-a", await cache.embed("What's the capital of France?"), {"text": "Paris"})
+
+    assert await cache.get("model-a", await cache.embed("Capital of France?")) == {"text": "Paris"}
+    assert cache.stats == {"hits": 1, "misses": 0}
+
+@pytest.mark.asyncio
+async def test_dissimilar_prompt_or_other_model_misses(cache: SemanticCache):
+    await cache.set("model-a", await cache.embed("What's the capital of France?"), {"text": "Paris"})
+
+    assert await cache.get("model-a", await cache.embed("Write a haiku about autumn.")) is None
+    assert await cache.get("model-b", await cache.embed("Capital of France?")) is None
+    assert cache.stats == {"hits": 0, "misses": 2}
+
+@pytest.mark.parametrize("capabilities, expected", [
+    ({"semantic_cache": True, "temperature": 0.2}, True),
+    ({"semantic_cache": True, "temperature": 0.7}, False),
+    ({"semantic_cache": True}, False),
+    ({"temperature": 0.0}, False),
+    (None, False),
+])
+def test_applies_to_requires_opt_in_and_low_temperature(capabilities, expected):
+    assert SemanticCache.applies_to(capabilities) is expected
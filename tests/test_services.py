@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from server.app import services
+
+PROMPT = "Explain relativity to a child."
+
+class Settings(BaseModel):
+    max_iterations: int = 3
+
+class FakeRun:
+    """Stands in for `_run_refinement`: counts runs and publishes events as the test releases them."""
+    def __init__(self):
+        self.runs = 0
+        self.release = asyncio.Event()
+        self.cancelled = asyncio.Event()
+
+    async def __call__(self, initial_prompt, settings):
+        self.runs += 1
+        yield {"event": "message", "data": "started"}
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled.set()
+            raise
+        yield {"event": "complete", "data": "Stream finished."}
+
+@pytest.fixture
+def fake_run(monkeypatch) -> FakeRun:
+    run = FakeRun()
+    monkeypatch.setattr(services, "_run_refinement", run)
+    monkeypatch.setenv("GOOGLE_API_KEY", "key-1")
+    services._result_cache.clear()
+    yield run
+    services._result_cache.clear()
+
+@pytest.mark.asyncio
+async def test_late_subscriber_replays_events_of_the_shared_run(fake_run: FakeRun):
+    first = services.run_mpla_refinement(PROMPT, Settings())
+    assert (await anext(first))["data"] == "started"
+
+    late = services.run_mpla_refinement(PROMPT, Settings())
+    assert (await anext(late))["data"] == "started"
+    fake_run.release.set()
+
+    assert [event["event"] async for event in first] == ["complete"]
+    assert [event["event"] async for event in late] == ["complete"]
+    assert fake_run.runs == 1
+
+@pytest.mark.asyncio
+async def test_run_is_cancelled_when_the_last_subscriber_leaves(fake_run: FakeRun):
+    first = services.run_mpla_refinement(PROMPT, Settings())
+    second = services.run_mpla_refinement(PROMPT, Settings())
+    await anext(first)
+    await anext(second)
+
+    await first.aclose()
+    await asyncio.sleep(0)
+    assert not fake_run.cancelled.is_set()
+
+    await second.aclose()
+    await asyncio.wait_for(fake_run.cancelled.wait(), timeout=1)
+    await asyncio.sleep(0)
+    assert not services._INFLIGHT
+
+@pytest.mark.asyncio
+async def test_requests_on_different_api_keys_run_separately(fake_run: FakeRun, monkeypatch):
+    fake_run.release.set()
+    assert len([event async for event in services.run_mpla_refinement(PROMPT, Settings())]) == 2
+    assert len([event async for event in services.run_mpla_refinement(PROMPT, Settings())]) == 2
+    assert fake_run.runs == 1 # The repeat was replayed from the result cache
+
+    monkeypatch.setenv("GOOGLE_API_KEY", "key-2")
+    assert len([event async for event in services.run_mpla_refinement(PROMPT, Settings())]) == 2
+    assert fake_run.runs == 2
+
+@pytest.mark.asyncio
+async def test_close_orchestrators_closes_every_orchestrator_despite_a_failure(monkeypatch):
+    closed = []
+
+    class Orchestrator:
+        def __init__(self, name: str, fails: bool = False):
+            self.name, self.fails = name, fails
+
+        async def close(self):
+            await asyncio.sleep(0)
+            if self.fails:
+                raise RuntimeError(f"{self.name} failed to close")
+            closed.append(self.name)
+
+    cache = {"a": (Orchestrator("a", fails=True), None, None), "b": (Orchestrator("b"), None, None)}
+    monkeypatch.setattr(services, "_ORCHESTRATOR_CACHE", cache)
+
+    await services.close_orchestrators()
+
+    assert closed == ["b"]
+    assert not cache
@@ -0,0 +1,322 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+
+import aiosqlite
+import pytest
+import pytest_asyncio
+
+from mpla.knowledge_base.schemas import AIOutput, MetaPrompt, OriginalPrompt, PromptVersion
+from mpla.knowledge_base.sqlite_kb import SQLiteKnowledgeBase
+
+@pytest_asyncio.fixture
+async def kb():
+    knowledge_base = SQLiteKnowledgeBase(":memory:")
+    await knowledge_base.connect()
+    yield knowledge_base
+    await knowledge_base.disconnect()
+
+@pytest_asyncio.fixture
+async def original_prompt(kb: SQLiteKnowledgeBase) -> OriginalPrompt:
+    return await kb.add(OriginalPrompt(text="Explain relativity."))
+
+def make_versions(original_prompt_id: int, count: int):
+    return [
+        PromptVersion(original_prompt_id=original_prompt_id, version_number=i, prompt_text=f"Version {i}")
+        for i in range(1, count + 1)
+    ]
+
+@pytest.mark.asyncio
+async def test_add_many_returns_persisted_records_in_order(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    added = await kb.add_many(make_versions(original_prompt.id, 3) + [OriginalPrompt(text="Another prompt.")])
+
+    assert [type(r) for r in added] == [PromptVersion, PromptVersion, PromptVersion, OriginalPrompt]
+    assert all(r.id is not None for r in added)
+    assert [r.prompt_text for r in added[:3]] == ["Version 1", "Version 2", "Version 3"]
+    assert added[:3] == await kb.get_prompt_versions_for_original(original_prompt.id)
+    assert added[0] == await kb.get(PromptVersion, added[0].id)
+
+@pytest.mark.asyncio
+async def test_add_many_maps_ids_back_to_interleaved_records(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    first, second = make_versions(original_prompt.id, 2)
+    added = await kb.add_many([first, OriginalPrompt(text="Interleaved."), second])
+
+    assert [type(r) for r in added] == [PromptVersion, OriginalPrompt, PromptVersion]
+    assert [r.prompt_text for r in (added[0], added[2])] == ["Version 1", "Version 2"]
+    assert (await kb.get(OriginalPrompt, added[1].id)).text == "Interleaved."
+
+@pytest.mark.asyncio
+async def test_add_many_rolls_back_the_whole_batch_on_error(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    orphan = AIOutput(prompt_version_id=9999, raw_output_data={})
+
+    with pytest.raises(sqlite3.IntegrityError):
+        await kb.add_many(make_versions(original_prompt.id, 2) + [orphan])
+
+    assert await kb.get_prompt_versions_for_original(original_prompt.id) == []
+
+@pytest.mark.asyncio
+async def test_timestamps_are_read_back_as_datetimes(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    await kb.add_many(make_versions(original_prompt.id, 1))
+
+    (version,) = await kb.get_prompt_versions_for_original(original_prompt.id)
+
+    assert isinstance(original_prompt.created_at, datetime)
+    assert isinstance(version.updated_at, datetime)
+
+@pytest.mark.asyncio
+async def test_add_many_with_no_records_is_a_no_op(kb: SQLiteKnowledgeBase):
+    assert await kb.add_many([]) == []
+
+@pytest.mark.asyncio
+async def test_get_many_returns_found_records_keyed_by_id(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt, monkeypatch):
+    monkeypatch.setattr("mpla.knowledge_base.sqlite_kb.MAX_IN_CLAUSE_PARAMS", 2)
+    added = await kb.add_many(make_versions(original_prompt.id, 5))
+    wanted = [added[4].id, added[0].id, 9999, added[2].id, added[0].id]
+
+    found = await kb.get_many(PromptVersion, wanted)
+
+    assert set(found) == {added[4].id, added[0].id, added[2].id}
+    assert found[added[4].id].prompt_text == "Version 5"
+
+@pytest.mark.asyncio
+async def test_get_prompt_versions_for_originals_groups_by_original(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    other = await kb.add(OriginalPrompt(text="Other."))
+    await kb.add_many(make_versions(original_prompt.id, 2) + make_versions(other.id, 1))
+
+    versions = await kb.get_prompt_versions_for_originals([other.id, original_prompt.id, 9999])
+
+    assert [v.prompt_text for v in versions[original_prompt.id]] == ["Version 1", "Version 2"]
+    assert [v.prompt_text for v in versions[other.id]] == ["Version 1"]
+    assert versions[9999] == []
+
+@pytest.mark.asyncio
+async def test_iter_prompt_versions_streams_in_chunks(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    await kb.add_many(make_versions(original_prompt.id, 5))
+
+    streamed = [pv async for pv in kb.iter_prompt_versions_for_original(original_prompt.id, chunk_size=2)]
+
+    assert streamed == await kb.get_prompt_versions_for_original(original_prompt.id)
+    assert len(streamed) == 5
+
+@pytest.mark.asyncio
+async def test_iteration_pages_are_keyed_on_the_last_row(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    await kb.add_many(make_versions(original_prompt.id, 4))
+
+    streamed = []
+    async for pv in kb.iter_prompt_versions_for_original(original_prompt.id, chunk_size=2):
+        streamed.append(pv.version_number)
+        if len(streamed) == 2:
+            # Sorts before the rows already read; an OFFSET-based page would repeat version 2.
+            await kb.add(PromptVersion(original_prompt_id=original_prompt.id, version_number=0, prompt_text="Version 0"))
+
+    assert streamed == [1, 2, 3, 4]
+
+@pytest.mark.asyncio
+async def test_iteration_does_not_hold_a_connection_between_chunks(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    await kb.add_many(make_versions(original_prompt.id, 3))
+
+    streamed = []
+    async for pv in kb.iter_prompt_versions_for_original(original_prompt.id, chunk_size=2):
+        # A single-connection pool would deadlock here if the generator kept its session.
+        streamed.append(await kb.get(PromptVersion, pv.id))
+
+    assert [pv.version_number for pv in streamed] == [1, 2, 3]
+
+@pytest.mark.asyncio
+async def test_pooled_sessions_serve_concurrent_writers(tmp_path):
+    kb = SQLiteKnowledgeBase(str(tmp_path / "mpla.db"), pool_size=3)
+    await kb.connect()
+    try:
+        added = await asyncio.gather(*(kb.add(OriginalPrompt(text=f"Prompt {i}")) for i in range(10)))
+
+        assert len({p.id for p in added}) == 10
+        assert len(await kb.get_many(OriginalPrompt, [p.id for p in added])) == 10
+        assert kb._pool.qsize() == 3
+    finally:
+        await kb.disconnect()
+
+def test_in_memory_database_uses_a_single_connection():
+    assert SQLiteKnowledgeBase(":memory:", pool_size=4).pool_size == 1
+
+@pytest.mark.asyncio
+async def test_update_writes_only_the_fields_that_were_set(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    pv = await kb.add(PromptVersion(original_prompt_id=original_prompt.id, version_number=1, prompt_text="Old", enhancement_rationale="Kept"))
+
+    updated = await kb.update(pv.id, PromptVersion(original_prompt_id=original_prompt.id, version_number=1, prompt_text="New"))
+
+    assert updated.prompt_text == "New"
+    assert updated.enhancement_rationale == "Kept"
+
+@pytest.mark.asyncio
+async def test_update_of_a_loaded_record_writes_only_changed_fields(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    pv = await kb.add(PromptVersion(original_prompt_id=original_prompt.id, version_number=1, prompt_text="Old", enhancement_rationale="Kept"))
+    async with kb.session() as conn:
+        await conn.execute("UPDATE prompt_versions SET enhancement_rationale = 'Changed elsewhere' WHERE id = ?", (pv.id,))
+        await conn.commit()
+
+    pv.prompt_text = "New"
+    updated = await kb.update(pv.id, pv)
+
+    assert updated.prompt_text == "New"
+    assert updated.enhancement_rationale == "Changed elsewhere"
+
+@pytest.mark.asyncio
+async def test_file_databases_use_wal_journaling(tmp_path):
+    kb = SQLiteKnowledgeBase(str(tmp_path / "mpla.db"))
+    await kb.connect()
+    try:
+        async with kb.session() as conn:
+            async with conn.execute("PRAGMA journal_mode") as cursor:
+                journal_mode = (await cursor.fetchone())[0]
+            async with conn.execute("PRAGMA synchronous") as cursor:
+                synchronous = (await cursor.fetchone())[0]
+
+        assert journal_mode == "wal"
+        assert synchronous == 1 # NORMAL
+    finally:
+        await kb.disconnect()
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sql, params, index", [
+    ("SELECT * FROM prompt_versions WHERE original_prompt_id = ? ORDER BY version_number ASC", (1,), "idx_pv_original"),
+    ("SELECT * FROM iteration_logs WHERE session_id = ? ORDER BY iteration_number ASC", ("s",), "idx_il_session"),
+    ("SELECT * FROM evaluation_results WHERE ai_output_id = ?", (1,), "idx_er_ai_output"),
+    ("SELECT * FROM meta_prompts WHERE name LIKE ?", ("architect%",), "idx_mp_name_nocase"),
+])
+async def test_hot_lookups_use_an_index(kb: SQLiteKnowledgeBase, sql: str, params: tuple, index: str):
+    async with kb.session() as conn:
+        async with conn.execute(f"EXPLAIN QUERY PLAN {sql}", params) as cursor:
+            plan = " ".join(row["detail"] for row in await cursor.fetchall())
+
+    assert index in plan
+    assert "TEMP B-TREE" not in plan
+
+@pytest.mark.asyncio
+async def test_get_active_meta_prompt_prefers_active_then_latest_by_prefix(kb: SQLiteKnowledgeBase):
+    assert (await kb.get_active_meta_prompt("architect")).name == "architect_v1"
+
+    async with kb.session() as conn:
+        await conn.execute("UPDATE meta_prompts SET is_active = 0 WHERE name LIKE 'architect%'")
+        await conn.commit()
+    assert (await kb.get_active_meta_prompt("architect")).name == "architect_v1"
+    assert await kb.get_active_meta_prompt("missing") is None
+
+@pytest.mark.asyncio
+async def test_list_queries_return_booleans(kb: SQLiteKnowledgeBase):
+    meta_prompts = await kb.get_all(MetaPrompt)
+
+    assert meta_prompts and all(meta_prompt.is_active is True for meta_prompt in meta_prompts)
+
+@pytest.mark.asyncio
+async def test_large_results_are_converted_off_the_event_loop(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt, monkeypatch):
+    await kb.add_many(make_versions(original_prompt.id, 3))
+    inline = await kb.get_prompt_versions_for_original(original_prompt.id)
+    offloaded = []
+    real_to_thread = asyncio.to_thread
+    async def recording_to_thread(func, *args):
+        offloaded.append(func)
+        return await real_to_thread(func, *args)
+    monkeypatch.setattr("mpla.knowledge_base.sqlite_kb.THREAD_OFFLOAD_MIN_ROWS", 3)
+    monkeypatch.setattr("mpla.knowledge_base.sqlite_kb.asyncio.to_thread", recording_to_thread)
+
+    assert await kb.get_prompt_versions_for_original(original_prompt.id) == inline
+    assert len(offloaded) == 1
+
+@pytest.mark.asyncio
+async def test_query_results_are_fetched_in_batches(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt, monkeypatch):
+    await kb.add_many(make_versions(original_prompt.id, 5))
+    monkeypatch.setattr("mpla.knowledge_base.sqlite_kb.FETCH_BATCH_SIZE", 2)
+
+    versions = await kb.get_prompt_versions_for_original(original_prompt.id)
+
+    assert [v.prompt_text for v in versions] == [f"Version {i}" for i in range(1, 6)]
+
+@pytest.mark.asyncio
+async def test_reads_use_read_only_connections_on_file_databases(tmp_path):
+    kb = SQLiteKnowledgeBase(str(tmp_path / "mpla.db"), read_pool_size=2)
+    await kb.connect()
+    try:
+        added = await kb.add(OriginalPrompt(text="Read me."))
+
+        assert kb._read_pool.qsize() == 2
+        assert (await kb.get(OriginalPrompt, added.id)).text == "Read me."
+        async with kb.read_session() as conn:
+            with pytest.raises(sqlite3.OperationalError, match="readonly"):
+                await conn.execute("DELETE FROM original_prompts")
+    finally:
+        await kb.disconnect()
+
+@pytest.mark.asyncio
+async def test_large_json_payloads_are_stored_compressed(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    pytest.importorskip("zstandard")
+    pv = await kb.add(PromptVersion(original_prompt_id=original_prompt.id, version_number=1, prompt_text="Long"))
+    payload = {"text": "All work and no play. " * 200}
+    small, large = await kb.add_many([
+        AIOutput(prompt_version_id=pv.id, raw_output_data={"text": "Short."}),
+        AIOutput(prompt_version_id=pv.id, raw_output_data=payload),
+    ])
+
+    async with kb.session() as conn:
+        async with conn.execute("SELECT typeof(raw_output_data), length(raw_output_data) FROM ai_outputs ORDER BY id") as cursor:
+            stored = [tuple(row) for row in await cursor.fetchall()]
+
+    assert stored[0][0] == "text"
+    assert stored[1][0] == "blob" and stored[1][1] < len(payload["text"]) / 10
+    assert large.raw_output_data == payload
+    assert (await kb.get(AIOutput, small.id)).raw_output_data == {"text": "Short."}
+
+@pytest.mark.asyncio
+async def test_reconnecting_does_not_reseed_meta_prompts(tmp_path):
+    db_path = str(tmp_path / "mpla.db")
+    kb = SQLiteKnowledgeBase(db_path)
+    await kb.connect()
+    async with kb.session() as conn:
+        await conn.execute("UPDATE meta_prompts SET is_active = 0 WHERE name = 'architect_v1'")
+        await conn.commit()
+    await kb.disconnect()
+
+    await kb.connect()
+    try:
+        async with kb.session() as conn:
+            async with conn.execute("SELECT name, is_active FROM meta_prompts ORDER BY name") as cursor:
+                rows = [tuple(row) for row in await cursor.fetchall()]
+    finally:
+        await kb.disconnect()
+
+    assert rows == [("analyzer_v1", 1), ("architect_v1", 0), ("reviser_v1", 1)]
+
+@pytest.mark.asyncio
+async def test_concurrent_first_uses_connect_once(tmp_path):
+    kb = SQLiteKnowledgeBase(str(tmp_path / "mpla.db"), read_pool_size=2)
+    try:
+        results = await asyncio.gather(*(kb.get_many(MetaPrompt, [1, 2, 3]) for _ in range(3)))
+        assert [len(found) for found in results] == [3, 3, 3]
+        assert len(kb._connections) == 3 # One write connection and two readers, opened once
+    finally:
+        await kb.disconnect()
+
+@pytest.mark.asyncio
+async def test_concurrent_adds_share_a_commit(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt, monkeypatch):
+    commits = []
+    real_commit = aiosqlite.Connection.commit
+    async def counting_commit(self):
+        commits.append(self)
+        await real_commit(self)
+    monkeypatch.setattr(aiosqlite.Connection, "commit", counting_commit)
+
+    added = await asyncio.gather(*(kb.add(pv) for pv in make_versions(original_prompt.id, 20)))
+
+    assert len({pv.id for pv in added}) == 20
+    assert len(commits) < 20
+    assert len(await kb.get_prompt_versions_for_original(original_prompt.id)) == 20
+
+@pytest.mark.asyncio
+async def test_a_failed_write_does_not_fail_its_batch(kb: SQLiteKnowledgeBase, original_prompt: OriginalPrompt):
+    good, orphan = await asyncio.gather(
+        kb.add(make_versions(original_prompt.id, 1)[0]),
+        kb.add(AIOutput(prompt_version_id=9999, raw_output_data={})),
+        return_exceptions=True,
+    )
+
+    assert isinstance(orphan, sqlite3.IntegrityError)
+    assert await kb.get(PromptVersion, good.id) == good